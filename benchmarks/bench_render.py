@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Render Benchmark
+Times each renderer, directory ingest and file export across input sizes, without a display
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+import context_engine  # noqa: E402
+
+DEFAULT_SIZES = "1K,64K,1M,10M,50M"
+# Committed results of a full run; regenerate with -o on the machine that checks for regressions
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_render_baseline.json")
+NOISE_FLOOR_S = 0.0005     # slowdowns smaller than this are never flagged
+INGEST_FILE_SIZE = 16 * 1024
+
+# A stamp fixed in time keeps output sizes identical between runs
+CLOCK = context_engine.reproducible_clock()
+
+LINE = "- Handle case {} without blocking the UI & keep <state> consistent\n"
+
+# name -> (render(fields), field that carries the sized input)
+RENDERERS = {
+    "app_context": (lambda fields: context_engine.render("web_app", fields, clock=CLOCK), "Core Features"),
+    "mcp_context": (lambda fields: context_engine.render("mcp_development", fields, clock=CLOCK), "Tools to Implement"),
+    "bug_context": (lambda fields: context_engine.render("bug_report", fields, clock=CLOCK), "Error Messages"),
+    "feature_context": (lambda fields: context_engine.render("feature_request", fields, clock=CLOCK),
+                        "Feature Description"),
+    "xml_context": (lambda fields: context_engine.render("web_app", fields, xml=True, clock=CLOCK), "Core Features"),
+    "xml_list": (lambda fields: context_engine.format_xml_list(fields["text"]), "text"),
+}
+
+CASES = [*RENDERERS, "export", "ingest", "ingest_cached"]
+
+BASE_FIELDS = {"Project Name": "Task Manager", "Project Description": "Boards and lists for small teams",
+               "MCP Server Name": "files", "Bug Title": "Login fails", "Feature Name": "Sharing",
+               "Steps to Reproduce": "Open app\nClick login", "Frontend Framework": "React 18"}
+
+
+def parse_size(text):
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3}
+    text = text.strip().upper()
+    if text[-1:] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def format_size(size):
+    for unit, scale in (("G", 1024**3), ("M", 1024**2), ("K", 1024)):
+        if size >= scale and size % scale == 0:
+            return f"{size // scale}{unit}"
+    return str(size)
+
+
+def make_text(size):
+    """Return list-like text of about size characters, the shape pasted into the big form fields."""
+    lines = []
+    total = 0
+    index = 0
+    while total < size:
+        line = LINE.format(index)
+        lines.append(line)
+        total += len(line)
+        index += 1
+    return "".join(lines)[:size]
+
+
+def make_tree(root, size):
+    """Write size bytes of source files under root, a few per directory."""
+    text = make_text(INGEST_FILE_SIZE)
+    for index in range(max(1, size // INGEST_FILE_SIZE)):
+        directory = os.path.join(root, f"pkg{index // 32}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"module{index}.py"), 'w', encoding='utf-8') as f:
+            f.write(text if size >= INGEST_FILE_SIZE else text[:size])
+
+
+def time_call(func, repeat):
+    """Return per-call seconds for repeat samples, looping fast calls until a sample takes 0.2 s."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return [total / number for total in timer.repeat(repeat, number)]
+
+
+def measure_renderer(name, size, repeat):
+    render, field = RENDERERS[name]
+    fields = {**BASE_FIELDS, field: make_text(size)}
+    output = render(fields)
+    return time_call(lambda: render(fields), repeat), len(output)
+
+
+def measure_export(size, repeat, scratch):
+    fields = {**BASE_FIELDS, "Core Features": make_text(size)}
+    path = os.path.join(scratch, "export.md")
+
+    def export():
+        return context_engine.write_context_file(context_engine.iter_render("web_app", fields, clock=CLOCK), path)
+    return time_call(export, repeat), export()
+
+
+def measure_ingest(size, repeat, scratch, cached):
+    from ingest_cache import IngestCache
+    from repo_ingest import ingest
+    root = os.path.join(scratch, f"tree_{size}")
+    if not os.path.isdir(root):
+        make_tree(root, size)
+    cache = IngestCache(os.path.join(scratch, f"ingest_{size}.sqlite3")) if cached else None
+
+    def run():
+        relpaths, sources = ingest(root, cache=cache)
+        return sum(len(source.text or "") for source in sources)
+    try:
+        # The first run also warms the cache for the cached case
+        output_chars = run()
+        return time_call(run, repeat), output_chars
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def benchmark(name, size, repeat, scratch):
+    if name in RENDERERS:
+        samples, output_chars = measure_renderer(name, size, repeat)
+    elif name == "export":
+        samples, output_chars = measure_export(size, repeat, scratch)
+    else:
+        samples, output_chars = measure_ingest(size, repeat, scratch, cached=(name == "ingest_cached"))
+    median = statistics.median(samples)
+    return {"case": name, "input_bytes": size, "output_chars": output_chars, "median_s": median,
+            "min_s": min(samples), "mb_per_s": size / 1024**2 / median if median else None}
+
+
+def compare(results, baseline, tolerance):
+    """Return a message for every case that got slower than the baseline by more than tolerance."""
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        before, after = previous["median_s"], result["median_s"]
+        if after > before * (1 + tolerance) and after - before > NOISE_FLOOR_S:
+            regressions.append(f"{key}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms "
+                               f"({(after / before - 1) * 100:+.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure render, ingest and export throughput")
+    parser.add_argument("cases", nargs="*", metavar="CASE", help=f"Cases to run: {', '.join(CASES)} (default: all)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Input sizes, e.g. 1K,1M (default: {DEFAULT_SIZES})")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="Samples per measurement")
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="Previous results to compare against (default: bench_render_baseline.json beside this script)")
+    parser.add_argument("--no-baseline", dest="baseline", action="store_const", const=None,
+                        help="Only measure, without comparing")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+    try:
+        sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    except ValueError:
+        parser.error(f"invalid --sizes: {args.sizes}")
+
+    results = {}
+    scratch = tempfile.mkdtemp(prefix="bench_render_")
+    try:
+        for name in args.cases or CASES:
+            for size in sizes:
+                key = f"{name}/{format_size(size)}"
+                result = results[key] = benchmark(name, size, args.repeat, scratch)
+                print(f"{key:24} {result['median_s'] * 1000:10.3f} ms   {result['mb_per_s']:9.1f} MB/s", file=sys.stderr)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    output = json.dumps({"python": sys.version.split()[0], "results": results}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
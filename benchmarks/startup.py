@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Records import cost and time-to-first-render for each entry point in a fresh interpreter
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# The builders must not read or write the user's autosave journals and history
+PROBE_ENV = dict(os.environ, CONTEXT_BUILDER_AUTOSAVE="off", CONTEXT_BUILDER_HISTORY="off")
+
+SAMPLE_FIELDS = {"Project Name": "Task Manager", "Core Features": "Login\nBoards\nSharing",
+                 "Bug Title": "Login fails", "Steps to Reproduce": "Open app\nClick login"}
+
+GUI_RENDER = """
+import tkinter as tk
+root = tk.Tk()
+root.withdraw()
+builder = {module}.{cls}(root)
+builder.generate_preview()
+# The preview renders on a worker thread and is drained into the widget by the Tk loop
+while builder.live_preview.rendering or builder.live_preview.after_id is not None:
+    root.update()
+root.update_idletasks()
+"""
+
+CLI_RENDER = """
+import io, contextlib
+with contextlib.redirect_stdout(io.StringIO()):
+    {module}.main(["render", "web_app", "--xml"])
+"""
+
+# name -> (module, first-render snippet)
+ENTRY_POINTS = {
+    "engine": ("context_engine", "context_engine.render('web_app', FIELDS, xml=True)"),
+    "cli": ("context_cli", CLI_RENDER.format(module="context_cli")),
+    "launcher": ("context_builder_launcher", CLI_RENDER.format(module="context_builder_launcher")),
+    "ai_builder": ("ai_context_builder", GUI_RENDER.format(module="ai_context_builder", cls="ContextTemplateBuilder")),
+    "app_builder": ("app_context_builder", GUI_RENDER.format(module="app_context_builder", cls="AppContextBuilder")),
+}
+
+PROBE = """
+import time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+import sys
+gui_loaded = "tkinter" in sys.modules
+FIELDS = {fields!r}
+error = None
+try:
+{render}
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+done = time.perf_counter()
+import json
+print(json.dumps({{"import_s": imported - start, "first_render_s": done - start,
+                  "tkinter_on_import": gui_loaded, "error": error}}))
+"""
+
+
+def run_python(args):
+    return subprocess.run([sys.executable] + args, cwd=SRC_DIR, env=PROBE_ENV, capture_output=True, text=True)
+
+
+def parse_importtime(stderr):
+    """Return (total self time in us, top-level imports sorted by cumulative time)."""
+    total = 0
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        total += int(self_us)
+        if not name.startswith("  "):
+            top_level.append((name.strip(), int(cumulative_us)))
+    top_level.sort(key=lambda item: item[1], reverse=True)
+    return total, top_level
+
+
+def measure_importtime(module):
+    result = run_python(["-X", "importtime", "-c", f"import {module}"])
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1]}
+    total, top_level = parse_importtime(result.stderr)
+    return {"import_us": total, "heaviest": top_level[:8]}
+
+
+def measure_first_render(module, render):
+    body = "\n".join("    " + line for line in render.strip().splitlines())
+    result = run_python(["-c", PROBE.format(module=module, fields=SAMPLE_FIELDS, render=body)])
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark(name, repeat):
+    module, render = ENTRY_POINTS[name]
+    imports = [measure_importtime(module) for _ in range(repeat)]
+    renders = [measure_first_render(module, render) for _ in range(repeat)]
+
+    result = {"module": module}
+    errors = [run["error"] for run in imports + renders if run.get("error")]
+    if errors:
+        result["error"] = errors[0]
+    if all("import_us" in run for run in imports):
+        result["import_us"] = statistics.median(run["import_us"] for run in imports)
+        result["heaviest_imports"] = imports[0]["heaviest"]
+    if not errors:
+        result["import_s"] = statistics.median(run["import_s"] for run in renders)
+        result["first_render_s"] = statistics.median(run["first_render_s"] for run in renders)
+        result["tkinter_on_import"] = renders[0]["tkinter_on_import"]
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Return a message for every metric that got slower than the baseline by more than tolerance."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name, {})
+        for metric in ("import_us", "first_render_s"):
+            if metric in result and metric in previous and result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {previous[metric]:.4g} -> {result[metric]:.4g}")
+        if result.get("tkinter_on_import") and previous.get("tkinter_on_import") is False:
+            regressions.append(f"{name}: now imports tkinter at import time")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure startup cost of each entry point")
+    parser.add_argument("entry_points", nargs="*", metavar="ENTRY_POINT",
+                        help=f"Entry points to measure: {', '.join(ENTRY_POINTS)} (default: all)")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.entry_points if name not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown entry point(s): {', '.join(unknown)}")
+
+    results = {}
+    for name in args.entry_points or ENTRY_POINTS:
+        result = results[name] = benchmark(name, args.repeat)
+        if "first_render_s" in result:
+            print(f"{name:12} import {result['import_us'] / 1000:8.1f} ms   first render {result['first_render_s'] * 1000:8.1f} ms"
+                  f"   tkinter on import: {'yes' if result['tkinter_on_import'] else 'no'}", file=sys.stderr)
+        else:
+            print(f"{name:12} {result.get('error')}", file=sys.stderr)
+
+    output = json.dumps({"python": sys.version.split()[0], "results": results}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
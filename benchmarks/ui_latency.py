@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+UI Latency Benchmark
+Replays interaction scripts against the builders and records event-to-idle latency percentiles
+"""
+
+import argparse
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+# The builders must not read or write the user's autosave journals and history
+os.environ["CONTEXT_BUILDER_AUTOSAVE"] = "off"
+os.environ["CONTEXT_BUILDER_HISTORY"] = "off"
+
+NOISE_FLOOR_MS = 2.0       # slowdowns smaller than this are never flagged
+SETTLE_TIMEOUT = 60.0      # seconds an interaction may take before the run is abandoned
+PERCENTILES = (50, 90, 99)
+
+SAMPLE_LINE = "- Keep the board in sync across tabs & devices without <blocking> the UI\n"
+
+# Scripts are lists of (step name, action, argument); every step is timed separately
+SCRIPTS = {
+    "app_builder": ("app_context_builder", "AppContextBuilder", [
+        ("switch_type", "switch_type", "desktop_app"),
+        ("switch_type", "switch_type", "web_app"),
+        ("fill_form", "fill", "Core Features"),
+        ("generate_preview", "generate", False),
+        ("generate_preview_cached", "generate", True),
+        ("generate_xml", "toggle_xml", None),
+        ("copy_to_clipboard", "copy", None),
+        ("generate_plain", "toggle_xml", None),
+    ]),
+    "ai_builder": ("ai_context_builder", "ContextTemplateBuilder", [
+        ("switch_template", "switch_template", "bug_report"),
+        ("switch_template", "switch_template", "app_development"),
+        ("fill_form", "fill", "Requirements"),
+        ("generate_preview", "generate", False),
+        ("generate_preview_cached", "generate", True),
+    ]),
+}
+
+
+def parse_size(text):
+    units = {"K": 1024, "M": 1024**2}
+    text = text.strip().upper()
+    if text[-1:] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def start_display():
+    """Start Xvfb when there is no display; returns the process, or None when a display exists."""
+    if os.environ.get("DISPLAY"):
+        return None
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        raise SystemExit("ui_latency: no DISPLAY and Xvfb is not installed (install xvfb or run under xvfb-run)")
+    # Xvfb writes the display number it picked to -displayfd once it accepts connections
+    read_fd, write_fd = os.pipe()
+    process = subprocess.Popen([xvfb, "-displayfd", str(write_fd), "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        number = f.readline().strip()
+    if not number:
+        process.kill()
+        raise SystemExit("ui_latency: Xvfb failed to start")
+    os.environ["DISPLAY"] = f":{number}"
+    return process
+
+
+class Driver:
+    """Runs builder actions the way their widgets would and waits until the UI is idle again.
+
+    Idle means no render is being drained into the preview or waiting for typing to pause,
+    no export is running and Tk has processed every pending event and redraw.
+    """
+
+    def __init__(self, root, builder, size):
+        self.root = root
+        self.builder = builder
+        self.text = "".join(SAMPLE_LINE for _ in range(size // len(SAMPLE_LINE) + 1))[:size]
+
+    def busy(self):
+        preview = self.builder.live_preview
+        worker = getattr(self.builder, "export_worker", None)
+        # A queued live-preview patch counts too, so edits are measured until the preview catches up
+        return preview.rendering or preview.after_id is not None or (worker is not None and worker.busy)
+
+    def settle(self):
+        deadline = time.perf_counter() + SETTLE_TIMEOUT
+        self.root.update()
+        while self.busy():
+            if time.perf_counter() > deadline:
+                raise RuntimeError("the builder did not become idle")
+            time.sleep(0.0005)
+            self.root.update()
+        self.root.update_idletasks()
+
+    def measure(self, action, argument):
+        getattr(self, f"prepare_{action}", lambda argument: None)(argument)
+        start = time.perf_counter()
+        getattr(self, action)(argument)
+        self.settle()
+        return (time.perf_counter() - start) * 1000
+
+    # --- Actions ---
+
+    def switch_type(self, app_type):
+        self.builder.app_type_var.set(app_type)
+        self.builder.on_type_change()
+
+    def switch_template(self, template_name):
+        self.builder.template_var.set(template_name)
+        self.builder.load_template()
+
+    def prepare_fill(self, field_name):
+        import tkinter as tk
+        # Scroll the row into view, empty it and put the text on the clipboard, as a user would
+        form = self.builder.form_view
+        index = form.names.index(field_name)
+        form.yview("moveto", form.tops[index] / form.layouts[form.key][3])
+        form.set(field_name, "")
+        widget = form.rows_by_name[field_name].widget
+        widget.focus_set()
+        if isinstance(widget, tk.Text):
+            widget.event_generate("<FocusIn>")   # clears the placeholder
+            widget.mark_set(tk.INSERT, "1.0")
+        self.root.clipboard_clear()
+        self.root.clipboard_append(self.text)
+        self.settle()
+
+    def fill(self, field_name):
+        # Pasting goes through the widget's own bindings: the insert, <<Modified>> and the form's edit tracking
+        self.builder.form_view.rows_by_name[field_name].widget.event_generate("<<Paste>>")
+
+    def prepare_generate(self, cached):
+        if not cached:
+            import context_engine
+            context_engine.RENDER_CACHE.clear()
+
+    def generate(self, cached):
+        self.builder.generate_preview()
+
+    def toggle_xml(self, argument):
+        self.builder.xml_tags_var.set(not self.builder.xml_tags_var.get())
+        self.builder.generate_preview()
+
+    def copy(self, argument):
+        self.builder.copy_to_clipboard()
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def benchmark(name, repeat, warmup, size):
+    import tkinter as tk
+    from tkinter import messagebox
+    # Confirmation dialogs are modal; they are not part of the work being measured
+    for dialog in ("showinfo", "showwarning"):
+        setattr(messagebox, dialog, lambda *args, **kwargs: None)
+
+    module_name, class_name, script = SCRIPTS[name]
+    module = importlib.import_module(module_name)
+    root = tk.Tk()
+    root.geometry("1200x800")
+    try:
+        builder = getattr(module, class_name)(root)
+        driver = Driver(root, builder, size)
+        driver.settle()
+        samples = {}
+        for iteration in range(warmup + repeat):
+            for step, action, argument in script:
+                elapsed = driver.measure(action, argument)
+                if iteration >= warmup:
+                    samples.setdefault(step, []).append(elapsed)
+    finally:
+        root.destroy()
+
+    return {step: {"samples": len(values), "mean_ms": sum(values) / len(values), "max_ms": max(values),
+                   **{f"p{q}_ms": percentile(values, q) for q in PERCENTILES}}
+            for step, values in samples.items()}
+
+
+def compare(results, baseline, tolerance):
+    """Return a message for every step whose p50 or p90 got slower than the baseline by more than tolerance."""
+    regressions = []
+    for script, steps in results.items():
+        for step, result in steps.items():
+            previous = baseline.get(script, {}).get(step)
+            if not previous:
+                continue
+            for metric in ("p50_ms", "p90_ms"):
+                before, after = previous[metric], result[metric]
+                if after > before * (1 + tolerance) and after - before > NOISE_FLOOR_MS:
+                    regressions.append(f"{script}.{step}.{metric}: {before:.1f} -> {after:.1f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure event-to-idle latency of scripted builder interactions")
+    parser.add_argument("scripts", nargs="*", metavar="SCRIPT", help=f"Scripts to run: {', '.join(SCRIPTS)} (default: all)")
+    parser.add_argument("-n", "--repeat", type=int, default=20, help="Times each script is replayed")
+    parser.add_argument("--warmup", type=int, default=2, help="Replays before measuring starts")
+    parser.add_argument("--size", default="256K", help="Size of the text pasted into the form (default: 256K)")
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown before flagging (0.5 = 50%%)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scripts if name not in SCRIPTS]
+    if unknown:
+        parser.error(f"unknown script(s): {', '.join(unknown)}")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    try:
+        size = parse_size(args.size)
+    except ValueError:
+        parser.error(f"invalid --size: {args.size}")
+
+    display = start_display()
+    try:
+        results = {}
+        for name in args.scripts or SCRIPTS:
+            results[name] = benchmark(name, args.repeat, args.warmup, size)
+            for step, result in results[name].items():
+                print(f"{name + '.' + step:40} p50 {result['p50_ms']:8.1f} ms   p90 {result['p90_ms']:8.1f} ms"
+                      f"   p99 {result['p99_ms']:8.1f} ms", file=sys.stderr)
+    finally:
+        if display is not None:
+            display.terminate()
+            display.wait()
+
+    output = json.dumps({"python": sys.version.split()[0], "size": size, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,11 +5,21 @@ Specialized tool for creating application development contexts
 """
 
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
-import json
-import os
-from datetime import datetime
-from tooltip import ToolTip
+from tkinter import ttk, scrolledtext
+from tooltip_manager import TooltipManager
+import context_engine
+import context_templates
+import token_budget
+from autosave import FormAutosave, open_journal
+from export_worker import ExportWorker
+from history_panel import HistoryPanel, record_preview
+from history_store import default_store
+from instrumentation import default_recorder, iter_timed
+from live_preview import LivePreview
+from virtual_form import VirtualForm
+
+# Written side by side by Export All Formats
+ALL_FORMATS = ["markdown", "plain", "xml", "json"]
 
 class AppContextBuilder:
     def __init__(self, root):
@@ -21,9 +31,31 @@ class AppContextBuilder:
         style = ttk.Style()
         style.configure("App.TLabel", foreground="#28A745")
         
+        self.live_preview = None
+        self.autosave = None
+        # Generated contexts are saved to a local searchable history
+        self.history = default_store()
+        # Per-stage timings of generate and export; a no-op unless CONTEXT_BUILDER_TRACE is set
+        self.recorder = default_recorder()
+        self.previewed = None
+        self.tooltips = TooltipManager.for_root(self.root)
         self.setup_ui()
         
+        # Form edits are journaled so a closed window or a crash picks up where it left off
+        journal = open_journal("app_builder")
+        if journal is not None:
+            self.autosave = FormAutosave(self.form_view, journal)
+            self.restore_autosave()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
     def setup_ui(self):
+        # Stage timings of the last generate or export, shown when instrumentation is on
+        if self.recorder.enabled:
+            self.trace_status = tk.StringVar()
+            ttk.Label(self.root, textvariable=self.trace_status, relief=tk.SUNKEN,
+                      anchor=tk.W).pack(side=tk.BOTTOM, fill=tk.X)
+            self.recorder.subscribe(lambda trace: self.trace_status.set(trace.summary()))
+        
         # Header
         header_frame = ttk.Frame(self.root)
         header_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -50,6 +82,11 @@ class AppContextBuilder:
         notebook.add(preview_frame, text="📋 Context Preview")
         self.setup_preview_tab(preview_frame)
         
+        # History Tab
+        history_frame = ttk.Frame(notebook)
+        notebook.add(history_frame, text="🕘 History")
+        self.setup_history_tab(history_frame)
+        
         # Templates Tab
         templates_frame = ttk.Frame(notebook)
         notebook.add(templates_frame, text="📝 App Templates")
@@ -73,23 +110,9 @@ class AppContextBuilder:
             ttk.Radiobutton(type_frame, text=text, variable=self.app_type_var, 
                            value=value, command=self.on_type_change).pack(anchor=tk.W, padx=10, pady=2)
         
-        # Scrollable form
-        canvas = tk.Canvas(parent)
-        scrollbar = ttk.Scrollbar(parent, orient="vertical", command=canvas.yview)
-        self.scrollable_frame = ttk.Frame(canvas)
-        
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True, padx=5)
-        scrollbar.pack(side="right", fill="y")
-        
-        self.form_fields = {}
+        # Form rows are virtualized: only rows near the viewport have widgets,
+        # and every value lives in the form's model
+        self.form_view = VirtualForm(parent, style="labelframe", on_change=self.field_changed)
         self.load_app_form()
         
     def setup_preview_tab(self, parent):
@@ -108,14 +131,40 @@ class AppContextBuilder:
         # XML tags option
         self.xml_tags_var = tk.BooleanVar(value=False)
         xml_check = ttk.Checkbutton(button_frame, text="Include XML Tags", 
-                                   variable=self.xml_tags_var)
+                                   variable=self.xml_tags_var, command=self.refresh_live_preview)
         xml_check.pack(side=tk.LEFT, padx=5)
-        ToolTip(xml_check, "Add XML tags for better AI comprehension\n(Recommended for Claude and advanced AI models)")
+        self.tooltips.register(xml_check, "Add XML tags for better AI comprehension\n(Recommended for Claude and advanced AI models)")
         
         ttk.Button(button_frame, text="💾 Export Context", 
                   command=self.export_context).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="🗂️ Export All Formats", 
+                  command=self.export_all).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="📋 Copy to Clipboard", 
                   command=self.copy_to_clipboard).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="🔢 Token Report", 
+                  command=self.show_token_report).pack(side=tk.LEFT, padx=5)
+        self.dedupe_var = tk.BooleanVar(value=False)
+        dedupe_check = ttk.Checkbutton(button_frame, text="Remove Duplicates", variable=self.dedupe_var)
+        dedupe_check.pack(side=tk.LEFT, padx=5)
+        self.tooltips.register(dedupe_check, "Replace text repeated across sections with a short back-reference\n(Applied when exporting or copying)")
+        
+        # Full renders run on a worker thread; a small indicator shows while one is in progress
+        self.render_status = tk.StringVar()
+        ttk.Label(button_frame, textvariable=self.render_status).pack(side=tk.RIGHT, padx=5)
+        
+        # Live preview re-renders only the sections whose fields changed
+        self.live_preview = LivePreview(self.preview_text, self.read_field, on_busy=self.render_busy,
+                                        cache=context_engine.RENDER_CACHE)
+        self.live_var = tk.BooleanVar(value=False)
+        live_check = ttk.Checkbutton(button_frame, text="Live Preview", variable=self.live_var,
+                                    command=self.toggle_live_preview)
+        live_check.pack(side=tk.LEFT, padx=5)
+        self.tooltips.register(live_check, "Update the preview as you type\n(Only the sections you edit are re-rendered)")
+        
+        # Exports render and write on a worker thread; progress shows here
+        self.export_status = tk.StringVar()
+        ttk.Label(button_frame, textvariable=self.export_status).pack(side=tk.RIGHT, padx=5)
+        self.export_worker = ExportWorker(self.root, self.export_progress)
         
     def setup_templates_tab(self, parent):
         ttk.Label(parent, text="Application Development Templates", 
@@ -250,417 +299,130 @@ Native or cross-platform mobile applications.
         templates_text.insert("1.0", templates_content)
         templates_text.config(state=tk.DISABLED)
         
+    def setup_history_tab(self, parent):
+        if self.history is None:
+            ttk.Label(parent, text="History is disabled or unavailable.").pack(anchor=tk.W, padx=5, pady=5)
+            return
+        self.history_panel = HistoryPanel(parent, self.history, context_engine.APP_TYPES, self.load_from_history)
+    
+    def load_from_history(self, entry):
+        # Switch forms first: switching carries shared fields over, which would overwrite the clone
+        self.app_type_var.set(entry.template)
+        self.xml_tags_var.set(entry.xml)
+        self.form_view.load(entry.template, context_templates.app_form_fields(entry.template))
+        if self.autosave:
+            self.autosave.form_loaded(entry.template)
+        self.form_view.restore({entry.template: entry.fields}, replace=True)
+        if self.autosave:
+            for field_name in self.form_view.names:
+                self.autosave.field_changed(field_name)
+        self.refresh_live_preview()
+    
     def on_type_change(self):
         self.load_app_form()
         
     def load_app_form(self):
-        # Clear existing fields
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.form_fields.clear()
-        
         app_type = self.app_type_var.get()
+        # Schemas are built once per app type and reused on every switch
+        self.form_view.load(app_type, context_templates.app_form_fields(app_type))
+        if self.autosave:
+            self.autosave.form_loaded(app_type)
         
-        # Common fields for all app types
-        common_fields = {
-            "Project Name": {
-                "type": "entry", "required": True,
-                "tooltip": f"Enter a clear, descriptive name for your {app_type.replace('_', ' ')}:\n• Be specific: 'Task Manager Pro' not 'My App'\n• Avoid generic terms like 'System' or 'Tool'\n• Consider branding and user recognition"
-            },
-            "Project Description": {
-                "type": "text", "height": 3, "required": True,
-                "tooltip": "Describe what your application does and why it's valuable:\n• Focus on user benefits and problems solved\n• Mention key features and capabilities\n• Keep it concise but comprehensive"
-            },
-            "Target Users": {
-                "type": "text", "height": 2, "required": True,
-                "tooltip": "Who will use this application?\n• Primary users: 'Small business owners managing inventory'\n• Secondary users: 'Employees tracking daily tasks'\n• User personas help guide design decisions"
-            },
-            "Core Features": {
-                "type": "text", "height": 6, "required": True,
-                "tooltip": "List the main features your application must have:\n• User authentication and profiles\n• Data visualization with charts\n• Export functionality (PDF, CSV)\n• Real-time notifications\n• Search and filtering\n\nPrioritize essential features first."
-            }
-        }
-        
-        # Type-specific fields
-        if app_type == "web_app":
-            specific_fields = {
-                "Frontend Framework": {
-                    "type": "combo", "values": ["React", "Vue.js", "Angular", "Svelte", "Next.js", "Nuxt.js", "Vanilla JavaScript", "TypeScript", "jQuery"], "required": False,
-                    "tooltip": "Choose your frontend technology:\n• React: Large ecosystem, component-based\n• Vue.js: Gentle learning curve, flexible\n• Angular: Full framework, TypeScript-first\n• Svelte: Compile-time optimization\n• Next.js: React with SSR/SSG\n• Nuxt.js: Vue with SSR/SSG\n• Vanilla JavaScript: No framework dependencies\n• TypeScript: Type-safe JavaScript\n• jQuery: Legacy support, simple DOM manipulation"
-                },
-                "Backend Framework": {
-                    "type": "combo", "values": ["Python (Django)", "Python (Flask)", "Python (FastAPI)", "Node.js (Express)", "Node.js (NestJS)", "Ruby on Rails", "PHP (Laravel)", "Java (Spring Boot)", "C# (ASP.NET Core)", "Go (Gin)", "Rust (Actix)"], "required": True,
-                    "tooltip": "Select your backend framework:\n• Django: Python, batteries included, rapid development\n• Flask: Python, lightweight, flexible\n• FastAPI: Python, modern, automatic API docs\n• Express: Node.js, minimal, flexible\n• NestJS: Node.js, TypeScript, enterprise-grade\n• Rails: Ruby, convention over configuration\n• Laravel: PHP, elegant syntax, full-featured\n• Spring Boot: Java, enterprise, microservices\n• ASP.NET Core: C#, high performance, cross-platform\n• Gin: Go, fast, minimal\n• Actix: Rust, extremely fast, safe"
-                },
-                "Database": {
-                    "type": "combo", "values": ["PostgreSQL", "MySQL", "MongoDB", "SQLite", "Redis", "Cassandra", "DynamoDB", "Firebase"], "required": True,
-                    "tooltip": "Choose your database:\n• PostgreSQL: Advanced features, JSON support, ACID\n• MySQL: Reliable, widely supported, fast\n• MongoDB: Document-based, flexible schema\n• SQLite: Lightweight, serverless, embedded\n• Redis: In-memory, caching, pub/sub\n• Cassandra: Distributed, high availability\n• DynamoDB: AWS NoSQL, serverless\n• Firebase: Google, real-time, easy setup"
-                },
-                "Authentication": {
-                    "type": "text", "height": 2, "required": False,
-                    "tooltip": "Specify authentication requirements:\n• Email/password with verification\n• OAuth (Google, GitHub, Facebook, Apple)\n• Two-factor authentication (2FA)\n• Role-based access control (RBAC)\n• JWT tokens with refresh\n• Session management\n• Single Sign-On (SSO)"
-                },
-                "Styling/CSS": {
-                    "type": "combo", "values": ["Tailwind CSS", "Bootstrap", "Material-UI", "Ant Design", "Chakra UI", "Styled Components", "CSS Modules", "SCSS/Sass", "Vanilla CSS"], "required": False,
-                    "tooltip": "Choose your styling approach:\n• Tailwind CSS: Utility-first, highly customizable\n• Bootstrap: Component library, responsive\n• Material-UI: Google's Material Design\n• Ant Design: Enterprise-class UI language\n• Chakra UI: Modular, accessible components\n• Styled Components: CSS-in-JS\n• CSS Modules: Scoped CSS\n• SCSS/Sass: CSS preprocessor\n• Vanilla CSS: Pure CSS, no dependencies"
-                }
-            }
-        elif app_type == "desktop_app":
-            specific_fields = {
-                "Desktop Framework": {
-                    "type": "combo", "values": ["Electron", "Python (Tkinter)", "Python (PyQt/PySide)", "Python (Kivy)", "C# (WPF)", "C# (WinUI)", "Java (Swing)", "Java (JavaFX)", "C++ (Qt)", "Rust (Tauri)", "Go (Fyne)"], "required": True,
-                    "tooltip": "Choose your desktop framework:\n• Electron: Web technologies, cross-platform, large apps\n• Tkinter: Python built-in, simple GUIs\n• PyQt/PySide: Professional Python GUIs, native look\n• Kivy: Python, touch-friendly, mobile support\n• WPF: Modern Windows applications, XAML\n• WinUI: Latest Windows UI framework\n• Swing: Cross-platform Java GUIs, mature\n• JavaFX: Modern Java UI, rich graphics\n• Qt: C++, native performance, cross-platform\n• Tauri: Rust backend, web frontend, small size\n• Fyne: Go, simple, cross-platform"
-                },
-                "Target OS": {
-                    "type": "combo", "values": ["Windows", "macOS", "Linux", "Cross-platform"], "required": True,
-                    "tooltip": "Select target operating systems:\n• Windows: Largest desktop market, .NET ecosystem\n• macOS: Premium user base, App Store\n• Linux: Developer and enterprise users\n• Cross-platform: Maximum reach, consistent experience"
-                },
-                "Installation Method": {
-                    "type": "text", "height": 2, "required": False,
-                    "tooltip": "How will users install your app?\n• Installer package (.msi, .dmg, .deb, .rpm)\n• Portable executable (no installation)\n• App store distribution (Microsoft Store, Mac App Store)\n• Package managers (Chocolatey, Homebrew, apt)\n• Auto-updater integration\n• Silent/enterprise deployment"
-                },
-                "UI Library": {
-                    "type": "combo", "values": ["Native OS", "Material Design", "Fluent Design", "Custom Theme"], "required": False,
-                    "tooltip": "Choose your UI design approach:\n• Native OS: Platform-specific look and feel\n• Material Design: Google's design language\n• Fluent Design: Microsoft's design system\n• Custom Theme: Branded, unique appearance"
-                }
-            }
-        elif app_type == "cli_tool":
-            specific_fields = {
-                "CLI Framework": {
-                    "type": "combo", "values": ["Python (Click)", "Python (argparse)", "Python (Typer)", "Node.js (Commander)", "Node.js (Yargs)", "Go (Cobra)", "Rust (Clap)", "C# (System.CommandLine)", "Java (Picocli)"], "required": True,
-                    "tooltip": "Choose your CLI framework:\n• Click: Python, decorator-based, powerful features\n• argparse: Python built-in, standard library\n• Typer: Python, modern, type hints, FastAPI style\n• Commander: Node.js, feature-rich, popular\n• Yargs: Node.js, flexible, interactive\n• Cobra: Go, used by Docker, Kubernetes\n• Clap: Rust, performance-focused, derive macros\n• System.CommandLine: C#, modern .NET CLI\n• Picocli: Java, annotation-based, GraalVM ready"
-                },
-                "Command Structure": {
-                    "type": "text", "height": 3, "required": True,
-                    "tooltip": "Define your command structure:\n• mytool init --config config.json\n• mytool process --input file.txt --output result.txt\n• mytool status --verbose\n• mytool deploy --env production\n\nInclude subcommands, options, and arguments."
-                },
-                "Configuration": {
-                    "type": "text", "height": 2, "required": False,
-                    "tooltip": "How will your CLI be configured?\n• Configuration files (JSON, YAML, TOML, INI)\n• Environment variables\n• Command-line flags and options\n• Interactive setup wizard\n• Config file auto-generation\n• Profile/workspace support"
-                },
-                "Output Format": {
-                    "type": "combo", "values": ["Plain Text", "JSON", "YAML", "Table", "Progress Bars", "Interactive"], "required": False,
-                    "tooltip": "Choose output formatting:\n• Plain Text: Simple, readable output\n• JSON: Machine-readable, structured\n• YAML: Human-readable, structured\n• Table: Tabular data display\n• Progress Bars: Long-running operations\n• Interactive: Menus, prompts, TUI"
-                }
-            }
-        elif app_type == "api_service":
-            specific_fields = {
-                "API Framework": {
-                    "type": "combo", "values": ["Python (FastAPI)", "Python (Django REST)", "Python (Flask-RESTful)", "Node.js (Express)", "Node.js (NestJS)", "Java (Spring Boot)", "C# (ASP.NET Core)", "Go (Gin)", "Go (Echo)", "Rust (Actix)", "Ruby (Rails API)"], "required": True,
-                    "tooltip": "Choose your API framework:\n• FastAPI: Python, automatic docs, type hints, async\n• Django REST: Python, batteries included, serializers\n• Flask-RESTful: Python, lightweight, flexible\n• Express: Node.js, minimal, middleware-based\n• NestJS: Node.js, TypeScript, decorator-based\n• Spring Boot: Java, enterprise-grade, microservices\n• ASP.NET Core: C#, high performance, cross-platform\n• Gin: Go, fast HTTP router, minimal\n• Echo: Go, high performance, middleware\n• Actix: Rust, extremely fast, actor-based\n• Rails API: Ruby, convention over configuration"
-                },
-                "API Type": {
-                    "type": "combo", "values": ["REST", "GraphQL", "gRPC", "WebSocket", "Server-Sent Events"], "required": True,
-                    "tooltip": "Select your API type:\n• REST: Standard HTTP methods, widely supported\n• GraphQL: Flexible queries, single endpoint, type-safe\n• gRPC: High performance, binary protocol, streaming\n• WebSocket: Real-time, bidirectional communication\n• Server-Sent Events: Real-time, server-to-client"
-                },
-                "Authentication": {
-                    "type": "combo", "values": ["JWT", "OAuth 2.0", "API Keys", "Basic Auth", "Bearer Token", "mTLS"], "required": True,
-                    "tooltip": "Choose authentication method:\n• JWT: Stateless, scalable tokens, claims-based\n• OAuth 2.0: Industry standard, secure, delegated auth\n• API Keys: Simple, good for service-to-service\n• Basic Auth: Simple but less secure, base64 encoded\n• Bearer Token: Token-based, stateless\n• mTLS: Mutual TLS, certificate-based, high security"
-                },
-                "Documentation": {
-                    "type": "combo", "values": ["OpenAPI/Swagger", "GraphQL Playground", "Postman", "Insomnia", "Custom Docs"], "required": False,
-                    "tooltip": "API documentation approach:\n• OpenAPI/Swagger: Standard, interactive docs\n• GraphQL Playground: GraphQL schema explorer\n• Postman: Collection-based, team collaboration\n• Insomnia: REST client with documentation\n• Custom Docs: Tailored documentation site"
-                }
-            }
-        else:  # mobile_app
-            specific_fields = {
-                "Mobile Framework": {
-                    "type": "combo", "values": ["React Native", "Flutter", "Native iOS (Swift)", "Native Android (Kotlin)", "Xamarin", "Ionic", "Cordova/PhoneGap", "Unity (Games)", "Expo"], "required": True,
-                    "tooltip": "Choose your mobile framework:\n• React Native: JavaScript, code sharing, large community\n• Flutter: Dart, high performance, single codebase\n• Native iOS: Swift, platform-specific, best performance\n• Native Android: Kotlin, platform-specific, Material Design\n• Xamarin: C#, Microsoft ecosystem, native performance\n• Ionic: Web technologies, hybrid apps, plugins\n• Cordova/PhoneGap: HTML/CSS/JS, web-based\n• Unity: Game development, 3D/2D, cross-platform\n• Expo: React Native with managed workflow"
-                },
-                "Target Platforms": {
-                    "type": "combo", "values": ["iOS only", "Android only", "Both iOS and Android", "Web Progressive App"], "required": True,
-                    "tooltip": "Select target platforms:\n• iOS only: Premium market, consistent hardware, App Store\n• Android only: Larger market share, diverse devices, Google Play\n• Both: Maximum reach, more development effort\n• Web Progressive App: Web-based, app-like experience"
-                },
-                "Device Features": {
-                    "type": "text", "height": 3, "required": False,
-                    "tooltip": "What device features will you use?\n• Camera for photo/video capture\n• GPS for location services and mapping\n• Push notifications for engagement\n• Biometric authentication (Face ID, Touch ID)\n• Offline data storage and sync\n• Accelerometer/Gyroscope for motion\n• Bluetooth for device connectivity\n• NFC for payments/data transfer\n• Background processing"
-                },
-                "App Store Strategy": {
-                    "type": "text", "height": 2, "required": False,
-                    "tooltip": "Distribution and monetization:\n• Free app with ads\n• Paid app (one-time purchase)\n• Freemium with in-app purchases\n• Subscription model\n• Enterprise distribution\n• Beta testing strategy (TestFlight, Play Console)\n• App Store Optimization (ASO)"
-                },
-                "Backend Services": {
-                    "type": "combo", "values": ["Firebase", "AWS Amplify", "Supabase", "Custom API", "Parse", "Back4App"], "required": False,
-                    "tooltip": "Choose backend services:\n• Firebase: Google, real-time database, auth, hosting\n• AWS Amplify: Amazon, full-stack, GraphQL\n• Supabase: Open source Firebase alternative\n• Custom API: Your own backend service\n• Parse: Open source, self-hosted\n• Back4App: Parse hosting service"
-                }
-            }
-        
-        # Combine common and specific fields
-        all_fields = {**common_fields, **specific_fields}
-        
-        # Add remaining common fields
-        all_fields.update({
-            "Technical Requirements": {
-                "type": "text", "height": 4, "required": False,
-                "tooltip": "Specify technical constraints and requirements:\n• Performance: Load time under 2 seconds\n• Scalability: Support 10,000 concurrent users\n• Security: Encrypt sensitive data\n• Compatibility: Support modern browsers/OS versions\n• Accessibility: WCAG 2.1 compliance"
-            },
-            "Dependencies": {
-                "type": "text", "height": 3, "required": False,
-                "tooltip": "List external dependencies:\n• Third-party libraries and versions\n• External APIs and services\n• Database requirements\n• System dependencies\n• Development tools"
-            },
-            "Testing Strategy": {
-                "type": "text", "height": 3, "required": False,
-                "tooltip": "Define your testing approach:\n• Unit tests for core business logic\n• Integration tests for API endpoints\n• End-to-end tests for user workflows\n• Performance tests for load handling\n• Security tests for vulnerabilities"
-            },
-            "Deployment": {
-                "type": "text", "height": 2, "required": False,
-                "tooltip": "How will you deploy your application?\n• Cloud platforms: AWS, Azure, Google Cloud\n• Containerization: Docker, Kubernetes\n• CI/CD pipelines: GitHub Actions, Jenkins\n• Monitoring: Application performance monitoring\n• Backup and recovery strategies"
-            }
-        })
-        
-        # Create form fields
-        for field_name, config in all_fields.items():
-            frame = ttk.LabelFrame(self.scrollable_frame, text=field_name + (" *" if config.get("required") else ""))
-            frame.pack(fill=tk.X, padx=5, pady=5)
-            
-            if config["type"] == "entry":
-                widget = ttk.Entry(frame)
-                widget.pack(fill=tk.X, padx=10, pady=5)
-            elif config["type"] == "combo":
-                widget = ttk.Combobox(frame, values=config["values"], state="readonly")
-                widget.pack(fill=tk.X, padx=10, pady=5)
-            elif config["type"] == "text":
-                widget = scrolledtext.ScrolledText(frame, height=config.get("height", 4), wrap=tk.WORD)
-                widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-            
-            if "tooltip" in config:
-                ToolTip(widget, config["tooltip"])
-            
-            self.form_fields[field_name] = {"widget": widget, "config": config}
+        self.refresh_live_preview()
+    
+    def restore_autosave(self):
+        def switch_form(app_type):
+            if app_type in context_engine.APP_TYPES and app_type != self.app_type_var.get():
+                self.app_type_var.set(app_type)
+                self.load_app_form()
+        self.autosave.restore(switch_form)
+        self.refresh_live_preview()
+    
+    def on_close(self):
+        if self.autosave:
+            self.autosave.close()
+        if self.history:
+            self.history.wait()
+        self.root.destroy()
+    
+    def field_changed(self, field_name):
+        if self.live_preview:
+            self.live_preview.field_changed(field_name)
+        if self.autosave:
+            self.autosave.field_changed(field_name)
+    
+    def toggle_live_preview(self):
+        self.live_preview.enabled = self.live_var.get()
+        if self.live_preview.enabled:
+            self.generate_preview()
+        else:
+            self.live_preview.cancel()
+    
+    def refresh_live_preview(self):
+        # Switching app type or XML mode changes the plan, so re-render everything
+        if self.live_preview and self.live_preview.enabled:
+            self.generate_preview()
     
     def generate_preview(self):
         use_xml = self.xml_tags_var.get()
-        if use_xml:
-            context = self.build_xml_context()
-        else:
-            context = self.build_app_context()
-        self.preview_text.delete("1.0", tk.END)
-        self.preview_text.insert("1.0", context)
+        trace = self.recorder.begin("generate", template=self.app_type_var.get(), xml=use_xml)
+        with trace.stage("form read"):
+            data = self.get_form_data()
+        plan, values = context_engine.prepare(self.app_type_var.get(), data, xml=use_xml)
+        # The history entry is saved from the preview's own text once it is rendered
+        self.live_preview.render(plan, values, trace, on_done=self.save_history)
+        self.previewed = (self.app_type_var.get(), use_xml)
+    
+    def save_history(self, texts=None):
+        if self.history is not None and self.previewed:
+            app_type, use_xml = self.previewed
+            record_preview(self.history, app_type, self.live_preview, use_xml, texts)
     
     def build_xml_context(self):
-        data = self.get_form_data()
-        app_type = self.app_type_var.get().replace('_', ' ').title()
-        timestamp = datetime.now().strftime("%A, %Y-%m-%dT%H:%M:%S.%f")[:-3] + "-07:00"
-        
-        context = f"""--- CONTEXT ENTRY BEGIN ---
-<metadata>
-<generated_by>App Development Context Builder</generated_by>
-<application_type>{app_type}</application_type>
-<created>{timestamp}</created>
-<xml_enhanced>true</xml_enhanced>
-</metadata>
---- CONTEXT ENTRY END ---
-
---- CONTEXT ENTRY BEGIN ---
-<application_specification>
-
-<project_info>
-<name>{data.get('Project Name', 'Unnamed Application')}</name>
-<type>{app_type}</type>
-<description>{data.get('Project Description', 'No description provided')}</description>
-</project_info>
-
-<target_audience>
-{data.get('Target Users', 'Not specified')}
-</target_audience>
-
-<core_features>
-{self.format_xml_list(data.get('Core Features', 'No features specified'))}
-</core_features>
-
-"""
-        
-        # Add technical stack in XML format
-        if any(key in data for key in ['Frontend Framework', 'Backend Framework', 'Database']):
-            context += "<technical_stack>\n"
-            if 'Frontend Framework' in data:
-                context += f"<frontend framework=\"{data['Frontend Framework']}\"/>\n"
-            if 'Backend Framework' in data:
-                context += f"<backend framework=\"{data['Backend Framework']}\"/>\n"
-            if 'Database' in data:
-                context += f"<database type=\"{data['Database']}\"/>\n"
-            if 'Styling/CSS' in data:
-                context += f"<styling framework=\"{data['Styling/CSS']}\"/>\n"
-            context += "</technical_stack>\n\n"
-        
-        # Add requirements in XML format
-        if data.get('Technical Requirements'):
-            context += f"<technical_requirements>\n{self.format_xml_requirements(data['Technical Requirements'])}\n</technical_requirements>\n\n"
-        
-        if data.get('Dependencies'):
-            context += f"<dependencies>\n{self.format_xml_list(data['Dependencies'])}\n</dependencies>\n\n"
-        
-        if data.get('Testing Strategy'):
-            context += f"<testing_strategy>\n{self.format_xml_list(data['Testing Strategy'])}\n</testing_strategy>\n\n"
-        
-        if data.get('Deployment'):
-            context += f"<deployment_plan>\n{data['Deployment']}\n</deployment_plan>\n\n"
-        
-        context += """<development_checklist>
-<task status="pending">Set up development environment</task>
-<task status="pending">Initialize version control (Git)</task>
-<task status="pending">Create project structure</task>
-<task status="pending">Implement core features</task>
-<task status="pending">Add user authentication</task>
-<task status="pending">Set up database/data storage</task>
-<task status="pending">Implement error handling</task>
-<task status="pending">Add logging and monitoring</task>
-<task status="pending">Write comprehensive tests</task>
-<task status="pending">Create deployment pipeline</task>
-<task status="pending">Document APIs and usage</task>
-<task status="pending">Perform security review</task>
-<task status="pending">Optimize performance</task>
-<task status="pending">Plan maintenance strategy</task>
-</development_checklist>
-
-<quality_assurance>
-<test_type>Unit tests for business logic</test_type>
-<test_type>Integration tests for components</test_type>
-<test_type>End-to-end user workflow tests</test_type>
-<test_type>Performance and load testing</test_type>
-<test_type>Security vulnerability assessment</test_type>
-<test_type>Accessibility compliance check</test_type>
-<test_type>Cross-platform compatibility</test_type>
-<test_type>User acceptance testing</test_type>
-</quality_assurance>
-</application_specification>
---- CONTEXT ENTRY END ---
-
---- USER MESSAGE BEGIN ---
-<request>
-Build me this application based on the specification above
-</request>
---- USER MESSAGE END ---"""
-        
-        return context
+        return context_engine.build_xml_context(self.app_type_var.get(), self.get_form_data())
     
     def format_xml_list(self, text):
-        if not text:
-            return ""
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        return '\n'.join(f"<item>{line}</item>" for line in lines)
+        return context_engine.format_xml_list(text)
     
     def format_xml_requirements(self, text):
-        if not text:
-            return ""
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        return '\n'.join(f"<requirement>{line}</requirement>" for line in lines)
+        return context_engine.format_xml_requirements(text)
     
     def build_app_context(self):
-        data = self.get_form_data()
-        app_type = self.app_type_var.get().replace('_', ' ').title()
-        timestamp = datetime.now().strftime("%A, %Y-%m-%dT%H:%M:%S.%f")[:-3] + "-07:00"
-        
-        context = f"""--- CONTEXT ENTRY BEGIN ---
-Generated by App Development Context Builder
-Application Type: {app_type}
-Created: {timestamp}
---- CONTEXT ENTRY END ---
-
---- CONTEXT ENTRY BEGIN ---
-APPLICATION SPECIFICATION
-
-PROJECT: {data.get('Project Name', 'Unnamed Application')}
-TYPE: {app_type}
-DESCRIPTION: {data.get('Project Description', 'No description provided')}
-
-TARGET USERS:
-{data.get('Target Users', 'Not specified')}
-
-CORE FEATURES:
-{data.get('Core Features', 'No features specified')}
-
-"""
-        
-        # Add type-specific information
-        if 'Frontend Framework' in data:
-            context += f"FRONTEND: {data['Frontend Framework']}\n"
-        if 'Backend Framework' in data:
-            context += f"BACKEND: {data['Backend Framework']}\n"
-        if 'Database' in data:
-            context += f"DATABASE: {data['Database']}\n"
-        if 'Desktop Framework' in data:
-            context += f"FRAMEWORK: {data['Desktop Framework']}\n"
-        if 'CLI Framework' in data:
-            context += f"CLI FRAMEWORK: {data['CLI Framework']}\n"
-        if 'API Framework' in data:
-            context += f"API FRAMEWORK: {data['API Framework']}\n"
-        if 'Mobile Framework' in data:
-            context += f"MOBILE FRAMEWORK: {data['Mobile Framework']}\n"
-        
-        context += "\n"
-        
-        # Add additional sections
-        for field in ['Authentication', 'Target OS', 'Command Structure', 'API Type', 'Target Platforms', 'Device Features', 'Styling/CSS', 'UI Library', 'Output Format', 'Documentation', 'App Store Strategy', 'Backend Services']:
-            if field in data:
-                context += f"{field.upper().replace(' ', '_')}:\n{data[field]}\n\n"
-        
-        if data.get('Technical Requirements'):
-            context += f"TECHNICAL REQUIREMENTS:\n{data['Technical Requirements']}\n\n"
-        
-        if data.get('Dependencies'):
-            context += f"DEPENDENCIES:\n{data['Dependencies']}\n\n"
-        
-        if data.get('Testing Strategy'):
-            context += f"TESTING STRATEGY:\n{data['Testing Strategy']}\n\n"
-        
-        if data.get('Deployment'):
-            context += f"DEPLOYMENT:\n{data['Deployment']}\n\n"
-        
-        context += """DEVELOPMENT CHECKLIST:
-□ Set up development environment
-□ Initialize version control (Git)
-□ Create project structure
-□ Implement core features
-□ Add user authentication
-□ Set up database/data storage
-□ Implement error handling
-□ Add logging and monitoring
-□ Write comprehensive tests
-□ Create deployment pipeline
-□ Document APIs and usage
-□ Perform security review
-□ Optimize performance
-□ Plan maintenance strategy
-
-QUALITY ASSURANCE:
-□ Unit tests for business logic
-□ Integration tests for components
-□ End-to-end user workflow tests
-□ Performance and load testing
-□ Security vulnerability assessment
-□ Accessibility compliance check
-□ Cross-platform compatibility
-□ User acceptance testing
---- CONTEXT ENTRY END ---
-
---- USER MESSAGE BEGIN ---
-Build me this application based on the specification above
---- USER MESSAGE END ---"""
-        
-        return context
+        return context_engine.build_app_context(self.app_type_var.get(), self.get_form_data())
+    
+    def render_busy(self, busy):
+        self.render_status.set("rendering…" if busy else "")
+    
+    def read_field(self, field_name):
+        # Fields of a form switched away from since the last preview keep their previewed values
+        if field_name not in self.form_view.schema:
+            return None
+        return self.form_view.get(field_name)
     
     def get_form_data(self):
-        data = {}
-        for field_name, field_info in self.form_fields.items():
-            widget = field_info["widget"]
-            
-            if isinstance(widget, ttk.Entry):
-                value = widget.get().strip()
-            elif isinstance(widget, ttk.Combobox):
-                value = widget.get().strip()
-            else:  # ScrolledText
-                value = widget.get("1.0", tk.END).strip()
-            
-            if value:
-                data[field_name] = value
-        
-        return data
+        return self.form_view.get_values()
+    
+    def show_token_report(self):
+        from tkinter import messagebox
+        if not self.live_preview.plan:
+            messagebox.showwarning("Warning", "Generate context first!")
+            return
+        
+        # Attached files are read in full to be counted, so that happens off the Tk thread
+        counter = token_budget.get_counter()
+        self.live_preview.measure(counter, lambda usages: self.open_token_report(usages, counter.name))
+    
+    def open_token_report(self, usages, counter_name):
+        window = tk.Toplevel(self.root)
+        window.title("Token Report")
+        report = scrolledtext.ScrolledText(window, width=72, height=20, font=("Courier", 10))
+        report.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        report.insert("1.0", token_budget.format_report(usages, counter_name))
+        report.config(state=tk.DISABLED)
     
     def export_context(self):
-        content = self.preview_text.get("1.0", tk.END).strip()
-        if not content:
+        from tkinter import filedialog, messagebox
+        if not self.live_preview.plan:
             messagebox.showwarning("Warning", "Generate context first!")
             return
         
@@ -671,18 +433,73 @@ Build me this application based on the specification above
         )
         
         if filename:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(content)
+            if self.export_worker.busy:
+                messagebox.showwarning("Warning", "An export is already running!")
+                return
+            # The form's current values are read now; rendering and the atomic write
+            # happen on the worker, with attached files streamed straight from disk
+            trace = self.recorder.begin("export", template=self.previewed[0], xml=self.previewed[1])
+            with trace.stage("form read"):
+                chunks = self.live_preview.iter_export(self.dedupe_var.get())
+            self.export_worker.start(chunks, filename, self.export_finished, trace)
+            self.export_status.set("Exporting...")
+            self.save_history()
+    
+    def export_all(self):
+        from tkinter import filedialog, messagebox
+        if not self.live_preview.plan:
+            messagebox.showwarning("Warning", "Generate context first!")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            title="Export All Formats (.md, .txt, .xml, .json)",
+            filetypes=[("All files", "*.*")]
+        )
+        
+        if filename:
+            if self.export_worker.busy:
+                messagebox.showwarning("Warning", "An export is already running!")
+                return
+            # The form is read once; formats that serialize alike share one rendering on the worker
+            app_type = self.previewed[0]
+            trace = self.recorder.begin("export", template=app_type, formats=ALL_FORMATS)
+            with trace.stage("form read"):
+                data = context_engine.field_values(self.live_preview.export_values())
+            groups = context_engine.iter_format_groups(app_type, data, ALL_FORMATS, dedupe=self.dedupe_var.get())
+            self.export_worker.start_formats(groups, context_engine.format_paths(filename, ALL_FORMATS),
+                                             self.formats_exported, trace)
+            self.export_status.set("Exporting...")
+            self.save_history()
+    
+    def formats_exported(self, paths, written, error):
+        self.export_finished("\n".join(paths.values()), written, error)
+    
+    def export_progress(self, written):
+        self.export_status.set(f"Exporting... {written:,} characters")
+    
+    def export_finished(self, filename, written, error):
+        from tkinter import messagebox
+        self.export_status.set("")
+        if error is not None:
+            messagebox.showerror("Error", f"Export failed: {error}")
+        else:
             messagebox.showinfo("Success", f"App context exported to {filename}")
     
     def copy_to_clipboard(self):
-        content = self.preview_text.get("1.0", tk.END).strip()
-        if not content:
+        from tkinter import messagebox
+        if not self.live_preview.plan:
             messagebox.showwarning("Warning", "Generate context first!")
             return
         
-        self.root.clipboard_clear()
-        self.root.clipboard_append(content)
+        trace = self.recorder.begin("copy", template=self.previewed[0], xml=self.previewed[1])
+        with trace.stage("form read"):
+            chunks = self.live_preview.iter_export(self.dedupe_var.get())
+        text = "".join(iter_timed(chunks, trace, "render"))
+        with trace.stage("clipboard", len(text)):
+            self.root.clipboard_clear()
+            self.root.clipboard_append(text)
+        trace.finish()
+        self.save_history()
         messagebox.showinfo("Success", "Context copied to clipboard!")
 
 def main():
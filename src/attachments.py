@@ -0,0 +1,73 @@
+"""
+Attachments
+Files attached to a context by path and streamed into the output at render time
+"""
+
+import codecs
+import mmap
+import os
+
+CHUNK_SIZE = 1 << 20        # bytes decoded per chunk
+SNIFF_SIZE = 8192           # bytes checked for NUL when deciding a file is binary
+
+
+def parse_paths(value):
+    """Return the attached paths from a newline-separated string or a list of paths."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.splitlines()
+    return [path.strip() for path in value if path and path.strip()]
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def iter_blocks(f, size, chunk_size):
+    """Yield byte blocks of an open file, memory-mapped when the OS allows it."""
+    try:
+        view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # Pipes and some special files cannot be mapped; fall back to buffered reads
+        yield from iter(lambda: f.read(chunk_size), b"")
+        return
+    with view:
+        for start in range(0, size, chunk_size):
+            yield view[start:start + chunk_size]
+
+
+def iter_file_text(path, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """Yield the decoded text of a file in chunks without ever holding the whole file.
+
+    Raises OSError if the file cannot be opened and ValueError if it looks binary.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        first = True
+        for block in iter_blocks(f, size, chunk_size):
+            if first and b"\0" in block[:SNIFF_SIZE]:
+                raise ValueError("binary file")
+            first = False
+            text = decoder.decode(block)
+            if text:
+                yield text
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
+
+
+def describe(path):
+    """Return a one-line placeholder for an attachment, used where contents are not shown."""
+    if os.path.isdir(path):
+        return f"[attached directory: {path} - files included on export]"
+    try:
+        return f"[attached file: {path}, {format_size(os.path.getsize(path))} - contents included on export]"
+    except OSError:
+        return f"[attached file: {path} - not found]"
@@ -0,0 +1,211 @@
+"""
+Autosave
+Append-only journal of form edits, written off the UI thread and compacted into snapshots
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+from context_engine import write_context_file
+
+AUTOSAVE_ENV = "CONTEXT_BUILDER_AUTOSAVE"
+AUTOSAVE_DELAY = 1000     # ms of typing pause before edits are journaled
+FSYNC_INTERVAL = 2.0      # seconds between fsyncs of the journal while edits keep coming
+COMPACT_AFTER = 500       # journal entries before they are folded into the snapshot
+SNAPSHOT_VERSION = 1
+
+STOP = object()
+
+
+def apply_entry(models, state, entry):
+    if "field" in entry:
+        models.setdefault(entry["form"], {})[entry["field"]] = entry["value"]
+    elif "state" in entry:
+        state.update(entry["state"])
+
+
+def load_state(path):
+    """Return (models, state) from the snapshot beside path plus the journal entries after it.
+
+    A torn last line from a crash mid-append is ignored.
+    """
+    models = {}
+    state = {}
+    try:
+        with open(path + ".snapshot", 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") == SNAPSHOT_VERSION:
+            models = snapshot.get("models", {})
+            state = snapshot.get("state", {})
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    apply_entry(models, state, json.loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    break
+    except OSError:
+        pass
+    return models, state
+
+
+class AutosaveJournal:
+    """Journals form edits on a writer thread.
+
+    record() only queues an entry, so it is safe and cheap to call from the Tk thread. The
+    writer appends each batch to the journal, fsyncs at most every fsync_interval seconds
+    and, every compact_after entries, replaces the snapshot and truncates the journal.
+    Replaying an entry twice is harmless, so a crash between those two steps loses nothing.
+    """
+
+    def __init__(self, path, fsync_interval=FSYNC_INTERVAL, compact_after=COMPACT_AFTER):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+        # The writer keeps its own copy of the saved state so compaction never asks the UI
+        self.models, self.state = load_state(path)
+        self.entries = 0
+        self.queue = queue.Queue()
+        self.file = open(path, 'a', encoding='utf-8')
+        self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.thread.start()
+
+    def saved(self):
+        """Return copies of the (models, state) loaded at startup."""
+        return {key: dict(values) for key, values in self.models.items()}, dict(self.state)
+
+    def record(self, form, field, value):
+        self.queue.put({"form": form, "field": field, "value": value})
+
+    def record_state(self, **state):
+        self.queue.put({"state": state})
+
+    def run(self):
+        last_sync = time.monotonic()
+        unsynced = False
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self.queue.get(timeout=self.fsync_interval)]
+            except queue.Empty:
+                batch = []
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if STOP in batch:
+                stopping = True
+                batch = [entry for entry in batch if entry is not STOP]
+
+            if batch:
+                self.file.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch))
+                self.file.flush()
+                for entry in batch:
+                    apply_entry(self.models, self.state, entry)
+                self.entries += len(batch)
+                unsynced = True
+
+            if self.entries >= self.compact_after or (stopping and self.entries):
+                self.compact()
+                unsynced = False
+            elif unsynced and (stopping or time.monotonic() - last_sync >= self.fsync_interval):
+                os.fsync(self.file.fileno())
+                unsynced = False
+            if not unsynced:
+                last_sync = time.monotonic()
+        self.file.close()
+
+    def compact(self):
+        snapshot = {"version": SNAPSHOT_VERSION, "models": self.models, "state": self.state}
+        write_context_file([json.dumps(snapshot, ensure_ascii=False)], self.snapshot_path)
+        self.file.close()
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.entries = 0
+
+    def close(self):
+        """Write everything queued, compact, and stop the writer."""
+        self.queue.put(STOP)
+        self.thread.join()
+
+
+class FormAutosave:
+    """Journals a VirtualForm's edits once typing pauses, and restores saved values into it."""
+
+    def __init__(self, form, journal, delay=AUTOSAVE_DELAY):
+        self.form = form
+        self.journal = journal
+        self.delay = delay
+        self.pending = set()
+        self.after_id = None
+
+    def restore(self, switch_form=None):
+        """Load saved values into the form's models; returns the saved UI state.
+
+        switch_form(key) is called with the saved form key before any value is restored, since
+        switching forms carries shared fields over and would overwrite the restored values.
+        """
+        models, state = self.journal.saved()
+        if switch_form is not None and state.get("form") is not None:
+            switch_form(state["form"])
+        self.form.restore(models)
+        return state
+
+    def field_changed(self, field_name):
+        self.pending.add((self.form.key, field_name))
+        if self.after_id is not None:
+            self.form.canvas.after_cancel(self.after_id)
+        self.after_id = self.form.canvas.after(self.delay, self.flush)
+
+    def form_loaded(self, key):
+        self.journal.record_state(form=key)
+        # Values carried over from the previous form changed this one too
+        for field_name in self.form.carried:
+            self.field_changed(field_name)
+
+    def flush(self):
+        self.after_id = None
+        for key, field_name in self.pending:
+            # Rows of a form switched away from were synced into its model when released
+            if key == self.form.key:
+                value = self.form.get_raw(field_name)
+            else:
+                value = self.form.models.get(key, {}).get(field_name, "")
+            self.journal.record(key, field_name, value)
+        self.pending.clear()
+
+    def close(self):
+        if self.after_id is not None:
+            self.form.canvas.after_cancel(self.after_id)
+        self.flush()
+        self.journal.close()
+
+
+def default_journal_path(name):
+    base = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.path.join(base, "context_builder", f"{name}.journal")
+
+
+def open_journal(name):
+    """Return the autosave journal for a builder, or None when disabled or unavailable.
+
+    Set CONTEXT_BUILDER_AUTOSAVE to a directory to move journals, or to "off" to disable them.
+    """
+    setting = os.environ.get(AUTOSAVE_ENV)
+    if setting and setting.lower() in ("0", "off", "none"):
+        return None
+    path = os.path.join(setting, f"{name}.journal") if setting else default_journal_path(name)
+    try:
+        return AutosaveJournal(path)
+    except OSError:
+        return None
@@ -0,0 +1,350 @@
+"""
+Context Analyzer
+Scores rendered contexts 0-100 for structure, required and recommended sections, and content quality
+"""
+
+import re
+
+import context_engine
+from render_plan import (TEXT, LINE, BLOCK, ATTACHMENTS, XML_INLINE, XML_TEXT, XML_LIST,
+                         XML_REQUIREMENTS, XML_GROUP, XML_ATTACHMENTS)
+from xml_writer import XmlValidationError, check_well_formed
+
+# Points per category, as described in the hydration sheet
+STRUCTURE_POINTS = 20
+REQUIRED_POINTS = 40
+RECOMMENDED_POINTS = 20
+CONTENT_POINTS = 20
+
+RATINGS = (
+    (90, "Excellent - Ready to use"),
+    (75, "Good - Minor improvements recommended"),
+    (60, "Fair - Several improvements needed"),
+    (0, "Poor - Significant improvements required"),
+)
+
+# Best-practice sections that are optional in the plans, per kind of context
+RECOMMENDED = {
+    "app_development": ("Framework", "Requirements", "Dependencies", "Testing Requirements"),
+    "mcp_development": ("Tools to Implement", "Resources to Provide", "Error Handling"),
+    "bug_report": ("Error Messages", "Code Context"),
+    "feature_request": ("Technical Requirements", "Integration Points"),
+    "app": ("Technical Requirements", "Dependencies", "Testing Strategy", "Deployment"),
+    "xml": ("Technical Requirements", "Dependencies", "Testing Strategy", "Deployment"),
+}
+
+LABEL_OPS = (LINE, BLOCK, ATTACHMENTS)
+TAG_OPS = (XML_INLINE, XML_TEXT, XML_LIST, XML_REQUIREMENTS, XML_GROUP, XML_ATTACHMENTS)
+
+TEMPLATE_HEADER = re.compile(r"^Template: (.+)$", re.M)
+APP_HEADER = "App Development Context Builder"    # both the plain and the XML metadata name it
+XML_MARKER = "<xml_enhanced>true</xml_enhanced>"
+
+DELIMITER = r"--- (?:CONTEXT ENTRY|USER MESSAGE) (?:BEGIN|END) ---$"
+# The lookahead lets the scanner reject most positions on their first character
+PLACEHOLDER = r"(?=[TFXLl?\[])(?:\b(?:TODO|TBD|FIXME|XXX|[Ll]orem ipsum)\b|\?\?\?|\[(?:insert|add|describe) [^\]\n]*\])"
+INNER_TAG = re.compile(r"</?\w+[^>\n]*>")
+ATTR_VALUE = re.compile(r'="([^"]*)"')
+WORD = re.compile(r"\w+")
+SPECIFIC = re.compile(r"\b\d+(?:\.\d+)+\b|\b[A-Z][\w.+#-]* v?\d+\b|\bv\d+\b|`[^`\n]+`|https?://\S+|\b\w+\(\)")
+LIST_LINE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+\S", re.M)
+MIN_WORDS = 60          # words of filled-in content for full depth points
+SHORT_BLOCK_WORDS = 3   # block sections shorter than this get a finding
+
+
+class Finding:
+    """One issue or suggestion for a section of a context."""
+
+    def __init__(self, section, severity, message):
+        self.section = section
+        self.severity = severity
+        self.message = message
+
+    def to_dict(self):
+        return {"section": self.section, "severity": self.severity, "message": self.message}
+
+
+class Analysis:
+    """Score, per-category breakdown, per-section status and findings for one context."""
+
+    def __init__(self, kind, breakdown, sections, findings):
+        self.kind = kind
+        self.breakdown = breakdown
+        self.sections = sections
+        self.findings = findings
+
+    @property
+    def score(self):
+        return round(sum(self.breakdown.values()))
+
+    @property
+    def rating(self):
+        return next(label for minimum, label in RATINGS if self.score >= minimum)
+
+    def to_dict(self):
+        return {
+            "score": self.score,
+            "rating": self.rating,
+            "kind": self.kind,
+            "breakdown": {name: round(points, 1) for name, points in self.breakdown.items()},
+            "sections": self.sections,
+            "findings": [finding.to_dict() for finding in self.findings],
+        }
+
+
+# --- Scanners ---
+
+def is_form_field(section):
+    return isinstance(section.field, str) and not section.field.startswith("@")
+
+
+def section_title(section):
+    return section.field if is_form_field(section) else section.label
+
+
+def marker_for(section):
+    if section.op in LABEL_OPS:
+        return f"{section.label}:"
+    if section.op in TAG_OPS:
+        return f"<{section.label}>"
+    return None
+
+
+class Scanner:
+    """Precompiled single-pass scanner for the contexts one plan renders."""
+
+    def __init__(self, kind, plan, recommended, xml=False):
+        self.kind = kind
+        self.xml = xml
+        self.sections = {}
+        boundaries = []
+        for section in plan:
+            marker = marker_for(section)
+            if marker is not None:
+                self.sections[marker] = section
+            elif section.op == TEXT:
+                # Static text ends the section before it; its first line marks where
+                first = next((line for line in section.label.split("\n") if line.strip()), None)
+                if first:
+                    boundaries.append(first)
+
+        self.titles = {marker: section_title(section) for marker, section in self.sections.items()}
+        # Sections holding what the user typed, as opposed to values the renderer fills in
+        self.content = [marker for marker, section in self.sections.items()
+                        if not (isinstance(section.field, str) and section.field.startswith("@"))]
+        self.required = [marker for marker, section in self.sections.items()
+                         if section.required and is_form_field(section)]
+        by_title = {title: marker for marker, title in self.titles.items()}
+        self.recommended = [by_title[field] for field in recommended if field in by_title]
+        self.plan_order = {marker: index for index, marker in enumerate(self.sections)}
+
+        markers = sorted(self.sections, key=len, reverse=True)
+        boundaries = sorted(set(boundaries), key=len, reverse=True)
+        self.pattern = re.compile(
+            f"^(?:(?P<delimiter>{DELIMITER})"
+            f"|(?P<marker>{'|'.join(map(re.escape, markers))})"
+            f"|(?P<boundary>{'|'.join(map(re.escape, boundaries))})$)"
+            f"|(?P<placeholder>{PLACEHOLDER})",
+            re.M)
+
+    def scan(self, text):
+        """Return (delimiters, {marker: value}, marker order, {marker: placeholder hits}) in one pass."""
+        delimiters = []
+        values = {}
+        order = []
+        placeholders = {}
+        current = None
+        start = 0
+
+        def close(end):
+            if current is not None and current not in values:
+                values[current] = text[start:end]
+
+        for match in self.pattern.finditer(text):
+            kind = match.lastgroup
+            if kind == "placeholder":
+                if current is not None:
+                    placeholders.setdefault(current, []).append(match.group())
+                continue
+            close(match.start())
+            if kind == "marker":
+                current = match.group()
+                start = match.end()
+                order.append(current)
+            else:
+                current = None
+                if kind == "delimiter":
+                    delimiters.append(match.group())
+        close(len(text))
+        return delimiters, values, order, placeholders
+
+
+def build_scanners():
+    scanners = {
+        name: Scanner(name, plan, RECOMMENDED[name])
+        for name, plan in context_engine.TEMPLATE_PLANS.items()
+    }
+    scanners["app"] = Scanner("app", context_engine.APP_PLAN, RECOMMENDED["app"])
+    scanners["xml"] = Scanner("xml", context_engine.XML_PLAN, RECOMMENDED["xml"], xml=True)
+    return scanners
+
+
+SCANNERS = build_scanners()
+TEMPLATE_KINDS = {name.replace('_', ' ').title(): name for name in context_engine.TEMPLATE_NAMES}
+
+
+def detect_kind(text):
+    """Return the scanner key for a rendered context, or None when it is not recognized."""
+    head = text[:2048]
+    if APP_HEADER in head:
+        return "xml" if XML_MARKER in head else "app"
+    match = TEMPLATE_HEADER.search(head)
+    if match:
+        return TEMPLATE_KINDS.get(match.group(1).strip())
+    return None
+
+
+# --- Scoring ---
+
+def clean_value(marker, value):
+    value = value.strip()
+    if marker.startswith("<"):
+        closing = f"</{marker[1:]}"
+        if value.endswith(closing):
+            value = value[:-len(closing)].strip()
+        # Attribute values (e.g. <frontend framework="React"/>) are content too
+        value = INNER_TAG.sub(lambda tag: " ".join(ATTR_VALUE.findall(tag.group())) or " ", value).strip()
+    return value
+
+
+def score_structure(scanner, text, delimiters, order, findings):
+    points = 0.0
+    context_edges = [d for d in delimiters if "CONTEXT ENTRY" in d]
+    balanced = (bool(context_edges) and len(context_edges) % 2 == 0
+                and all(("BEGIN" in edge) == (index % 2 == 0) for index, edge in enumerate(context_edges)))
+    if balanced:
+        points += 8
+    else:
+        findings.append(Finding("(structure)", "high", "CONTEXT ENTRY BEGIN/END delimiters are missing or unbalanced"))
+
+    if sum("USER MESSAGE" in d for d in delimiters) == 2:
+        points += 4
+    else:
+        findings.append(Finding("(structure)", "medium", "Add a USER MESSAGE BEGIN/END block for the request"))
+
+    if "Created: " in text[:2048] or "<created>" in text[:2048]:
+        points += 4
+    else:
+        findings.append(Finding("(structure)", "low", "Metadata header with a creation time is missing"))
+
+    if scanner.xml:
+        try:
+            check_well_formed([text])
+            points += 4
+        except XmlValidationError as e:
+            findings.append(Finding("(structure)", "high", f"XML is not well-formed: {e}"))
+    else:
+        positions = [scanner.plan_order[marker] for marker in order]
+        if positions == sorted(positions) and len(set(positions)) == len(positions):
+            points += 4
+        else:
+            findings.append(Finding("(structure)", "medium", "Sections are repeated or out of template order"))
+    return points * STRUCTURE_POINTS / 20
+
+
+def analyze(text):
+    """Score one rendered context; returns an Analysis."""
+    kind = detect_kind(text)
+    if kind is None:
+        finding = Finding("(structure)", "high", "Not a context rendered by the context builders")
+        return Analysis(None, {"structure": 0.0, "required": 0.0, "recommended": 0.0, "content": 0.0},
+                        {}, [finding])
+
+    scanner = SCANNERS[kind]
+    delimiters, raw, order, placeholders = scanner.scan(text)
+    findings = []
+    sections = {}
+    filled = {}
+    for marker in scanner.content:
+        if marker not in raw:
+            continue
+        section = scanner.sections[marker]
+        title = scanner.titles[marker]
+        value = clean_value(marker, raw[marker])
+        if section.required and section.default and value == section.default:
+            sections[title] = {"status": "placeholder", "words": 0}
+            continue
+        words = len(WORD.findall(value))
+        sections[title] = {"status": "present" if words else "empty", "words": words}
+        if words:
+            filled[marker] = value
+            if section.op in (BLOCK, XML_TEXT) and words < SHORT_BLOCK_WORDS:
+                findings.append(Finding(title, "low", f"{title} is very short; add more detail"))
+
+    structure = score_structure(scanner, text, delimiters, order, findings)
+
+    required = 0
+    for marker in scanner.required:
+        title = scanner.titles[marker]
+        status = sections.get(title, {}).get("status", "missing")
+        if status == "present":
+            required += 1
+        elif status == "placeholder":
+            default = scanner.sections[marker].default
+            findings.append(Finding(title, "high", f"{title} still has its default value '{default}'"))
+        else:
+            findings.append(Finding(title, "high", f"Required section {title} is missing"))
+    required_points = REQUIRED_POINTS * required / len(scanner.required) if scanner.required else REQUIRED_POINTS
+
+    recommended = 0
+    for marker in scanner.recommended:
+        title = scanner.titles[marker]
+        if sections.get(title, {}).get("status") == "present":
+            recommended += 1
+        else:
+            findings.append(Finding(title, "low", f"Add {title} for a more complete context"))
+    recommended_points = (RECOMMENDED_POINTS * recommended / len(scanner.recommended)
+                          if scanner.recommended else RECOMMENDED_POINTS)
+
+    content_points = score_content(scanner, filled, placeholders, findings)
+    breakdown = {"structure": structure, "required": required_points,
+                 "recommended": recommended_points, "content": content_points}
+    return Analysis(kind, breakdown, sections, findings)
+
+
+def score_content(scanner, filled, placeholders, findings):
+    """Specificity, examples and clarity of the filled-in sections, out of CONTENT_POINTS."""
+    points = 0.0
+    if placeholders:
+        for marker, hits in placeholders.items():
+            title = scanner.titles[marker]
+            findings.append(Finding(title, "medium", f"Contains placeholder text: {', '.join(sorted(set(hits)))}"))
+    else:
+        points += 5
+
+    if any(SPECIFIC.search(value) for value in filled.values()):
+        points += 5
+    else:
+        findings.append(Finding("(content)", "low", "Name specific versions, commands, APIs or links"))
+
+    if any(scanner.sections[marker].op in (XML_LIST, XML_REQUIREMENTS) or LIST_LINE.search(value)
+           for marker, value in filled.items()):
+        points += 5
+    else:
+        findings.append(Finding("(content)", "low", "Break requirements into lists or add concrete examples"))
+
+    words = sum(len(WORD.findall(value)) for value in filled.values())
+    points += 5 * min(words / MIN_WORDS, 1.0)
+    if words < MIN_WORDS:
+        findings.append(Finding("(content)", "low", f"Only {words} words of detail; aim for at least {MIN_WORDS}"))
+    return points * CONTENT_POINTS / 20
+
+
+def format_report(analysis, name=None):
+    """Return a plain-text summary of an Analysis."""
+    lines = [f"{name}: " if name else ""]
+    lines[0] += f"{analysis.score}/100 ({analysis.rating})"
+    lines.append("  " + "  ".join(f"{key} {points:.0f}" for key, points in analysis.breakdown.items()))
+    for finding in analysis.findings:
+        lines.append(f"  [{finding.severity}] {finding.section}: {finding.message}")
+    return "\n".join(lines)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Context Builder Launcher
+Main entry point: opens a builder window, or forwards render/batch/analyze commands to the CLI
+"""
+
+import importlib
+import sys
+
+# Builder modules pull in the whole Tk stack, so they are imported only when a window opens
+BUILDERS = {
+    "ai": ("AI Context Builder", "ai_context_builder", "ContextTemplateBuilder"),
+    "app": ("App Context Builder", "app_context_builder", "AppContextBuilder"),
+}
+
+CLI_COMMANDS = ("render", "batch", "analyze")
+
+
+def load_builder(key):
+    title, module_name, class_name = BUILDERS[key]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def open_builder(root, key):
+    import tkinter as tk
+    window = tk.Toplevel(root)
+    window.builder = load_builder(key)(window)
+    return window
+
+
+def launch_gui(builder=None):
+    import tkinter as tk
+    from tkinter import ttk
+
+    root = tk.Tk()
+    if builder:
+        # Open a single builder directly in the root window
+        root.builder = load_builder(builder)(root)
+        root.mainloop()
+        return 0
+
+    root.title("Context Builder Suite")
+    root.geometry("360x200")
+    ttk.Label(root, text="Choose a builder", font=("Arial", 14, "bold")).pack(pady=15)
+    for key, (title, module_name, class_name) in BUILDERS.items():
+        ttk.Button(root, text=title, command=lambda key=key: open_builder(root, key)).pack(fill=tk.X, padx=40, pady=5)
+    root.mainloop()
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in CLI_COMMANDS:
+        import context_cli
+        return context_cli.main(argv)
+    if argv and argv[0] in BUILDERS:
+        return launch_gui(argv[0])
+    if argv:
+        print(f"usage: context_builder_launcher.py [{'|'.join(BUILDERS)}] | {{{','.join(CLI_COMMANDS)}}} ...",
+              file=sys.stderr)
+        return 2
+    return launch_gui()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Context CLI
+Command-line interface for rendering contexts without the GUI
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import context_engine
+import token_budget
+import xml_writer
+
+
+def load_fields(path):
+    if not path:
+        return {}
+    if path == "-":
+        fields = json.load(sys.stdin)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            fields = json.load(f)
+    if not isinstance(fields, dict):
+        raise ValueError("expected a JSON object of field values")
+    return fields
+
+
+def iter_specs(stream):
+    """Yield (index, spec) pairs from a JSONL stream, skipping blank lines."""
+    for index, line in enumerate(stream):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            spec = json.loads(line)
+        except ValueError as e:
+            yield index, {"error": f"invalid JSON: {e}"}
+            continue
+        if not isinstance(spec, dict):
+            spec = {"error": f"expected a JSON object, got {type(spec).__name__}"}
+        yield index, spec
+
+
+def output_name(index, spec, extension):
+    name = spec.get("output") or f"{index:05d}_{spec.get('template', 'context')}{extension}"
+    # Records may only name files inside the output directory
+    return os.path.basename(name)
+
+
+def parse_assignments(items, convert=str):
+    """Parse repeated FIELD=VALUE options into a dict."""
+    result = {}
+    for item in items:
+        name, sep, value = item.rpartition("=")
+        if not sep or not name:
+            raise ValueError(f"expected FIELD=VALUE, got {item!r}")
+        result[name] = convert(value)
+    return result
+
+
+def build_budget(args):
+    """Return a token_budget.Budget from the command-line options, or None when no limit is set."""
+    sections = parse_assignments(args.section_budget, int)
+    if args.max_tokens is None and not sections:
+        return None
+    return token_budget.Budget(max_tokens=args.max_tokens, sections=sections,
+                               priorities=parse_assignments(args.priority, int), policy=args.policy,
+                               policies=parse_assignments(args.section_policy), counter=args.tokenizer)
+
+
+def build_clock(args):
+    tz = context_engine.parse_timezone(args.timezone) if args.timezone else context_engine.DEFAULT_TZ
+    if args.reproducible or os.environ.get(context_engine.SOURCE_DATE_EPOCH):
+        return context_engine.reproducible_clock(tz)
+    return context_engine.Clock(tz)
+
+
+def render_options(args):
+    """Collect the options shared by every record of a run; specs may override dedupe and validate."""
+    return {"budget": build_budget(args), "dedupe": args.dedupe, "validate": args.validate,
+            "clock": build_clock(args), "cache": not args.no_cache}
+
+
+def iter_spec(spec, options=None):
+    options = options or {}
+    if "error" in spec:
+        raise ValueError(spec["error"])
+    if "template" not in spec:
+        raise ValueError("spec is missing 'template'")
+    xml = spec.get("xml", False)
+    # Each worker process keeps its own cache, so repeated specs in a run render once per worker
+    chunks = context_engine.iter_render(spec["template"], spec.get("fields", {}), xml=xml,
+                                        budget=options.get("budget"),
+                                        dedupe=spec.get("dedupe", options.get("dedupe", False)),
+                                        clock=options.get("clock"),
+                                        cache=context_engine.RENDER_CACHE if options.get("cache") else None)
+    if xml and spec.get("validate", options.get("validate", False)):
+        chunks = xml_writer.iter_validated(chunks)
+    return chunks
+
+
+def render_spec(spec, options=None):
+    return "".join(iter_spec(spec, options))
+
+
+def render_to_file(job):
+    index, spec, out_dir, extension, options = job
+    try:
+        chunks = iter_spec(spec, options)
+        path = os.path.join(out_dir, output_name(index, spec, extension))
+        # Never leaves a half-written context behind, e.g. when validation fails midway
+        context_engine.write_context_file(chunks, path)
+        return index, path, None
+    except Exception as e:
+        return index, None, str(e)
+
+
+def render_to_record(job):
+    index, spec, options = job
+    try:
+        return index, spec.get("id", index), spec.get("template"), render_spec(spec, options), None
+    except Exception as e:
+        return index, spec.get("id", index), spec.get("template"), None, str(e)
+
+
+def iter_analysis_inputs(paths, extensions):
+    """Yield (name, path, text) per context: files and directories are read by the worker,
+    JSONL records (e.g. from batch --jsonl) carry their text in "context"."""
+    for path in paths:
+        if path == "-" or path.endswith(".jsonl"):
+            stream = sys.stdin if path == "-" else open(path, 'r', encoding='utf-8')
+            try:
+                for index, record in iter_specs(stream):
+                    name = record.get("id", f"{path}:{index + 1}")
+                    yield str(name), None, record.get("context", record.get("text"))
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+        elif os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.endswith(extensions):
+                        full = os.path.join(dirpath, filename)
+                        yield full, full, None
+        else:
+            yield path, path, None
+
+
+def analyze_job(job):
+    name, path, text = job
+    # Imported here so rendering workers never pay for the analyzer's patterns
+    import context_analyzer
+    try:
+        if path is not None:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+        if not isinstance(text, str):
+            raise ValueError("record has no 'context' text")
+        return name, context_analyzer.analyze(text), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+def run_jobs(func, jobs, workers, chunksize):
+    if workers == 1:
+        yield from map(func, jobs)
+        return
+    # multiprocessing is only worth importing for a parallel batch
+    from multiprocessing import Pool
+    with Pool(processes=workers) as pool:
+        yield from pool.imap(func, jobs, chunksize=chunksize)
+
+
+def render_formats(args, fields, budget, clock):
+    """Write --formats side by side from one read of the fields; -o is the shared base path."""
+    if not args.output:
+        print("context-cli: --formats needs -o/--output as the base path", file=sys.stderr)
+        return 2
+    formats = context_engine.parse_formats(args.formats)
+    try:
+        groups = context_engine.iter_format_groups(args.template, fields, formats, budget, args.dedupe, clock)
+    except ValueError as e:
+        print(f"context-cli: {e}", file=sys.stderr)
+        return 2
+    if args.validate:
+        groups = [(names, xml_writer.iter_validated(chunks) if "xml" in names else chunks) for names, chunks in groups]
+    try:
+        context_engine.write_formats(groups, context_engine.format_paths(args.output, formats))
+    except xml_writer.XmlValidationError as e:
+        print(f"context-cli: rendered XML is not well-formed: {e}", file=sys.stderr)
+        return 1
+    except OSError as e:
+        print(f"context-cli: cannot write {args.output}: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def cmd_render(args):
+    budget = build_budget(args)
+    clock = build_clock(args)
+    try:
+        fields = load_fields(args.fields)
+    except (OSError, ValueError) as e:
+        print(f"context-cli: cannot read fields from {args.fields}: {e}", file=sys.stderr)
+        return 2
+    if args.formats:
+        return render_formats(args, fields, budget, clock)
+    if budget is None and args.token_report:
+        budget = token_budget.Budget(counter=args.tokenizer)
+
+    try:
+        if budget is None:
+            chunks = context_engine.iter_render(args.template, fields, xml=args.xml, dedupe=args.dedupe, clock=clock)
+        else:
+            plan, values = context_engine.prepare(args.template, fields, xml=args.xml, clock=clock)
+            texts, usages = context_engine.render_sections(plan, values, budget, args.dedupe)
+            chunks = iter(texts)
+    except ValueError as e:
+        print(f"context-cli: {e}", file=sys.stderr)
+        return 2
+    if budget is not None and args.token_report:
+        print(token_budget.format_report(usages, budget.counter.name), file=sys.stderr)
+
+    if args.validate and args.xml:
+        chunks = xml_writer.iter_validated(chunks)
+
+    try:
+        if args.output:
+            context_engine.write_context_file(chunks, args.output)
+        else:
+            context_engine.write_context(chunks, sys.stdout)
+            sys.stdout.write("\n")
+    except xml_writer.XmlValidationError as e:
+        print(f"context-cli: rendered XML is not well-formed: {e}", file=sys.stderr)
+        return 1
+    except OSError as e:
+        print(f"context-cli: cannot write {args.output or 'standard output'}: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def cmd_batch(args):
+    options = render_options(args)
+    stream = sys.stdin if args.specs == "-" else open(args.specs, 'r', encoding='utf-8')
+    failures = 0
+    count = 0
+    try:
+        if args.out_dir:
+            os.makedirs(args.out_dir, exist_ok=True)
+            jobs = ((index, spec, args.out_dir, args.extension, options) for index, spec in iter_specs(stream))
+            for index, path, error in run_jobs(render_to_file, jobs, args.workers, args.chunksize):
+                count += 1
+                if error:
+                    failures += 1
+                    print(f"line {index + 1}: {error}", file=sys.stderr)
+        else:
+            out = sys.stdout if args.jsonl == "-" else open(args.jsonl, 'w', encoding='utf-8')
+            try:
+                jobs = ((index, spec, options) for index, spec in iter_specs(stream))
+                for index, record_id, template, context, error in run_jobs(render_to_record, jobs, args.workers, args.chunksize):
+                    count += 1
+                    record = {"id": record_id, "template": template}
+                    if error:
+                        failures += 1
+                        record["error"] = error
+                        print(f"line {index + 1}: {error}", file=sys.stderr)
+                    else:
+                        record["context"] = context
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    print(f"Rendered {count - failures}/{count} contexts", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def cmd_analyze(args):
+    import context_analyzer
+    extensions = tuple(args.extension or (".md", ".txt", ".xml"))
+    jobs = iter_analysis_inputs(args.inputs, extensions)
+    out = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    count = failures = below = total = 0
+    try:
+        for name, analysis, error in run_jobs(analyze_job, jobs, args.workers, args.chunksize):
+            count += 1
+            if error:
+                failures += 1
+                print(f"{name}: {error}", file=sys.stderr)
+                continue
+            total += analysis.score
+            if analysis.score < args.min_score:
+                below += 1
+            if args.text:
+                out.write(context_analyzer.format_report(analysis, name) + "\n")
+            else:
+                out.write(json.dumps({"name": name, **analysis.to_dict()}, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    scored = count - failures
+    mean = total / scored if scored else 0
+    print(f"Analyzed {scored}/{count} contexts: mean score {mean:.1f}, {below} below {args.min_score}", file=sys.stderr)
+    return 1 if failures or below else 0
+
+
+def add_budget_arguments(parser):
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Replace content repeated across sections with a back-reference")
+    parser.add_argument("--validate", action="store_true",
+                        help="Check that --xml output is well-formed XML while streaming it")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="Stamp SOURCE_DATE_EPOCH (or the Unix epoch) instead of the current time")
+    parser.add_argument("--timezone", metavar="ZONE",
+                        help="Time zone of the Created stamp: UTC, local, an offset like +02:00 or an IANA name "
+                             "(default: -07:00)")
+    group = parser.add_argument_group("token budget")
+    group.add_argument("--max-tokens", type=int, help="Trim the least important sections until the context fits")
+    group.add_argument("--section-budget", action="append", default=[], metavar="FIELD=TOKENS",
+                       help="Token limit for one section, e.g. \"Existing Code=4000\" (repeatable)")
+    group.add_argument("--priority", action="append", default=[], metavar="FIELD=N",
+                       help="Higher priority sections are trimmed last for --max-tokens (default 0, repeatable)")
+    group.add_argument("--policy", choices=token_budget.POLICIES, default="middle",
+                       help="Part of an over-budget section to keep (default: middle, which keeps both ends)")
+    group.add_argument("--section-policy", action="append", default=[], metavar="FIELD=POLICY",
+                       help="Truncation policy for one section (repeatable)")
+    group.add_argument("--tokenizer", default="auto",
+                       help="approx, tiktoken[:encoding] or auto (tiktoken when installed, default)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="context-cli", description="Render AI contexts without the GUI")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    render_parser = subparsers.add_parser("render", help="Render a single context")
+    render_parser.add_argument("template", help="Template id (e.g. bug_report) or app type id (e.g. web_app)")
+    render_parser.add_argument("--fields", help="JSON file of field values ('-' for stdin)")
+    render_parser.add_argument("--xml", action="store_true", help="Render app types with XML tags")
+    render_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    render_parser.add_argument("--formats", metavar="LIST",
+                               help="Write several formats from one render, e.g. markdown,xml,json "
+                                    f"(choose from {', '.join(context_engine.EXPORT_FORMATS)}); -o is the base path")
+    render_parser.add_argument("--token-report", action="store_true", help="Print tokens per section to stderr")
+    add_budget_arguments(render_parser)
+    render_parser.set_defaults(func=cmd_render)
+
+    batch_parser = subparsers.add_parser("batch", help="Render a JSONL stream of form specs in parallel")
+    batch_parser.add_argument("specs", help="JSONL file of {\"template\", \"fields\", \"xml\", \"output\", \"id\"} records ('-' for stdin)")
+    target = batch_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out-dir", help="Write one file per record into this directory")
+    target.add_argument("--jsonl", help="Write results as JSONL to this file ('-' for stdout)")
+    batch_parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                              help="Worker processes (default: CPU count)")
+    batch_parser.add_argument("--chunksize", type=int, default=16, help="Records handed to a worker at a time")
+    batch_parser.add_argument("--extension", default=".md", help="Extension for generated file names")
+    batch_parser.add_argument("--no-cache", action="store_true",
+                              help="Render every record from scratch instead of reusing identical earlier ones")
+    add_budget_arguments(batch_parser)
+    batch_parser.set_defaults(func=cmd_batch)
+
+    analyze_parser = subparsers.add_parser("analyze", help="Score rendered contexts 0-100 in parallel")
+    analyze_parser.add_argument("inputs", nargs="+",
+                                help="Context files, directories of them, or JSONL with a \"context\" per record ('-' for stdin)")
+    analyze_parser.add_argument("-o", "--output", default="-", help="Write one JSON result per context here (default: stdout)")
+    analyze_parser.add_argument("--text", action="store_true", help="Write readable reports instead of JSON")
+    analyze_parser.add_argument("--min-score", type=int, default=0,
+                                help="Exit with status 1 when any context scores below this")
+    analyze_parser.add_argument("--extension", action="append",
+                                help="File extension to analyze in directories (default: .md, .txt, .xml; repeatable)")
+    analyze_parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                                help="Worker processes (default: CPU count)")
+    analyze_parser.add_argument("--chunksize", type=int, default=64, help="Contexts handed to a worker at a time")
+    analyze_parser.set_defaults(func=cmd_analyze)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, "workers", 1) < 1:
+        print("--workers must be at least 1", file=sys.stderr)
+        return 2
+    # Reject bad budget and clock options up front rather than once per batch record
+    if hasattr(args, "tokenizer"):
+        try:
+            build_budget(args)
+            build_clock(args)
+            token_budget.get_counter(args.tokenizer)
+            if getattr(args, "formats", None):
+                context_engine.parse_formats(args.formats)
+                if args.token_report:
+                    raise ValueError("--token-report cannot be combined with --formats")
+        except ValueError as e:
+            print(f"context-cli: {e}", file=sys.stderr)
+            return 2
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
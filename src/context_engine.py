@@ -0,0 +1,718 @@
+"""
+Context Engine
+Headless rendering core shared by the context builders
+"""
+
+import io
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from render_plan import (TEXT, FORMAT, LINE, BLOCK, XML_INLINE, XML_TEXT, XML_LIST,
+                         XML_REQUIREMENTS, XML_ATTR, XML_GROUP, ATTACHMENTS,
+                         XML_ATTACHMENTS, compile_plan, iter_plan,
+                         iter_xml_list)
+
+# Template ids rendered by ContextTemplateBuilder
+TEMPLATE_NAMES = ["app_development", "mcp_development", "bug_report", "feature_request"]
+
+# Application type ids rendered by AppContextBuilder
+APP_TYPES = ["web_app", "desktop_app", "cli_tool", "api_service", "mobile_app"]
+
+
+# Offset stamped into contexts unless a clock says otherwise
+DEFAULT_TZ = timezone(timedelta(hours=-7))
+SOURCE_DATE_EPOCH = "SOURCE_DATE_EPOCH"
+
+RENDER_CACHE_SIZE = 32             # renders kept by a RenderCache
+RENDER_CACHE_CHARS = 32 * 1024**2  # characters kept across them; larger renders are not cached
+
+
+# --- Clock ---
+
+class Clock:
+    """Supplies the moment stamped into contexts: the current time in tz, or a fixed one.
+
+    A naive fixed moment is taken to be in tz. Clocks are picklable, so they can be passed
+    to batch workers.
+    """
+
+    def __init__(self, tz=DEFAULT_TZ, fixed=None):
+        self.tz = tz
+        self.fixed = fixed
+
+    def now(self):
+        moment = datetime.now(self.tz) if self.fixed is None else self.fixed
+        if moment.tzinfo is None:
+            return moment.replace(tzinfo=self.tz)
+        return moment.astimezone(self.tz)
+
+
+def reproducible_clock(tz=DEFAULT_TZ):
+    """Return a clock fixed at SOURCE_DATE_EPOCH (or the Unix epoch), so renders are byte-identical."""
+    epoch = int(os.environ.get(SOURCE_DATE_EPOCH) or 0)
+    return Clock(tz, datetime.fromtimestamp(epoch, timezone.utc))
+
+
+def default_clock():
+    # Honours the reproducible-builds convention, so the builders can be pinned from the environment
+    if os.environ.get(SOURCE_DATE_EPOCH):
+        return reproducible_clock()
+    return Clock()
+
+
+def parse_timezone(text):
+    """Parse "UTC", "local", an offset like "+05:30" or an IANA name like "Europe/Paris"."""
+    name = text.strip()
+    if name.upper() in ("UTC", "Z"):
+        return timezone.utc
+    if name.lower() == "local":
+        return datetime.now().astimezone().tzinfo
+    if name[:1] in "+-" and name[1:].replace(":", "").isdigit():
+        digits = name[1:].replace(":", "")
+        if len(digits) not in (2, 4):
+            raise ValueError(f"Invalid UTC offset: {text}")
+        offset = timedelta(hours=int(digits[:2]), minutes=int(digits[2:] or 0))
+        return timezone(-offset if name[0] == "-" else offset)
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone: {text}") from None
+
+
+def format_timestamp(clock=None):
+    now = (clock or default_clock()).now()
+    offset = now.strftime("%z")
+    return now.strftime("%A, %Y-%m-%dT%H:%M:%S.%f")[:-3] + offset[:3] + ":" + offset[3:5]
+
+
+# --- Render cache ---
+
+class RenderCache:
+    """LRU of rendered section texts keyed by plan and normalized field values.
+
+    Values are normalized by dropping empty fields, which render exactly like missing
+    ones, and ordering the rest by name. Sections that stamp the time or read
+    attached files are rendered again on every hit, so a hit returns exactly what a
+    fresh render would. Safe to share between threads.
+    """
+
+    def __init__(self, maxsize=RENDER_CACHE_SIZE, max_chars=RENDER_CACHE_CHARS):
+        self.maxsize = maxsize
+        self.max_chars = max_chars
+        self.entries = OrderedDict()
+        self.chars = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, plan, values):
+        # str hashes are computed once per string and compared exactly, so nothing can collide
+        return plan, tuple(sorted((name, value if isinstance(value, str) else str(value))
+                                  for name, value in values.items() if value and name != CREATED))
+
+    def volatile(self, section):
+        return CREATED in section.fields or section.op in (ATTACHMENTS, XML_ATTACHMENTS)
+
+    def cacheable(self, key):
+        # The rendered text is at least as large as the values, so this rules out a store up front
+        return sum(len(value) for name, value in key[1]) <= self.max_chars // 4
+
+    def lookup(self, key):
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        return cached
+
+    def iter_sections(self, plan, values):
+        """Yield the rendered text of each section of plan, rendering only what is not cached.
+
+        A render is stored once it has been consumed to the end.
+        """
+        key = self.key(plan, values)
+        if not self.cacheable(key):
+            with self.lock:
+                self.misses += 1
+            for section in plan:
+                yield section.render(values)
+            return
+        cached = self.lookup(key)
+        if cached is not None:
+            for section, text in zip(plan, cached):
+                yield section.render(values) if text is None else text
+            return
+
+        texts = []
+        for section in plan:
+            text = section.render(values)
+            texts.append(None if self.volatile(section) else text)
+            yield text
+        self.store(key, tuple(texts))
+
+    def iter_chunks(self, plan, values):
+        """Yield the rendered context as chunks, like iter_plan, reusing cached sections.
+
+        Renders too large to be stored and volatile sections are streamed chunk by chunk,
+        so large values and attached files are never joined into one string.
+        """
+        key = self.key(plan, values)
+        if not self.cacheable(key):
+            with self.lock:
+                self.misses += 1
+            yield from iter_plan(plan, values)
+            return
+        cached = self.lookup(key)
+        if cached is not None:
+            for section, text in zip(plan, cached):
+                if text is None:
+                    yield from section.iter_chunks(values)
+                else:
+                    yield text
+            return
+
+        texts = []
+        for section in plan:
+            if self.volatile(section):
+                texts.append(None)
+                yield from section.iter_chunks(values)
+            else:
+                text = section.render(values)
+                texts.append(text)
+                yield text
+        self.store(key, tuple(texts))
+
+    def sections(self, plan, values):
+        return list(self.iter_sections(plan, values))
+
+    def store(self, key, texts):
+        # The key holds the field values, so they count towards the limit too
+        size = entry_size(key, texts)
+        if size > self.max_chars // 4:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = texts
+            self.chars += size
+            while self.entries and (len(self.entries) > self.maxsize or self.chars > self.max_chars):
+                self.chars -= entry_size(*self.entries.popitem(last=False))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.chars = 0
+
+
+def entry_size(key, texts):
+    return sum(len(value) for name, value in key[1]) + sum(len(text) for text in texts if text is not None)
+
+
+# Shared by the builders and by each batch worker process
+RENDER_CACHE = RenderCache()
+
+
+def prepare(template_name, data, xml=False, clock=None):
+    """Return the (plan, values) pair that renders a template id or app type id."""
+    if template_name in TEMPLATE_NAMES:
+        return TEMPLATE_PLANS[template_name], template_values(template_name, data, clock)
+    if template_name in APP_TYPES:
+        return (XML_PLAN if xml else APP_PLAN), app_values(template_name, data, clock)
+    raise ValueError(f"Unknown template or app type: {template_name}")
+
+
+def render_sections(plan, values, budget=None, dedupe=False, cache=None):
+    """Render each section whole, deduplicated and/or fitted to a token budget.
+
+    Returns (section texts, token_budget.SectionUsage list or None).
+    """
+    texts = cache.sections(plan, values) if cache is not None else None
+    if dedupe:
+        from dedup import dedupe_sections
+        from token_budget import section_name
+        texts = dedupe_sections([section_name(section) for section in plan],
+                                texts or [section.render(values) for section in plan])
+    if budget is None:
+        return texts, None
+    from token_budget import apply_budget
+    return apply_budget(plan, values, budget, texts)
+
+
+def iter_render(template_name, data, xml=False, budget=None, dedupe=False, clock=None, cache=None):
+    """Yield the context for a template id or app type id as a stream of chunks.
+
+    With a token_budget.Budget or dedupe, sections are rendered whole before being post-processed.
+    With a RenderCache, unchanged sections come from an earlier render of the same values.
+    """
+    plan, values = prepare(template_name, data, xml, clock)
+    if budget is None and not dedupe:
+        return iter_plan(plan, values) if cache is None else cache.iter_chunks(plan, values)
+    texts, _ = render_sections(plan, values, budget, dedupe, cache)
+    return iter(texts)
+
+
+def iter_prepared(plan, values, budget=None, dedupe=False, cache=None):
+    """Yield the context for an already prepared plan; no work is done until chunks are consumed."""
+    if budget is None and not dedupe:
+        yield from (iter_plan(plan, values) if cache is None else cache.iter_chunks(plan, values))
+    else:
+        texts, _ = render_sections(plan, values, budget, dedupe, cache)
+        yield from texts
+
+
+def render(template_name, data, xml=False, budget=None, dedupe=False, clock=None, cache=None):
+    """Render a context for a template id or app type id from plain field values."""
+    return "".join(iter_render(template_name, data, xml, budget, dedupe, clock, cache))
+
+
+def write_context(chunks, sink, encoding='utf-8'):
+    """Write rendered chunks to a text stream, binary stream or socket as they are produced.
+
+    Returns the number of characters written.
+    """
+    written = 0
+    if hasattr(sink, "sendall"):
+        for chunk in chunks:
+            sink.sendall(chunk.encode(encoding))
+            written += len(chunk)
+    elif isinstance(sink, io.TextIOBase):
+        for chunk in chunks:
+            sink.write(chunk)
+            written += len(chunk)
+    else:
+        for chunk in chunks:
+            sink.write(chunk.encode(encoding))
+            written += len(chunk)
+    return written
+
+
+def write_context_file(chunks, path, encoding='utf-8', progress=None):
+    """Write rendered chunks to path atomically, through a temp file in the same directory.
+
+    The temp file is fsynced and then moved over path with os.replace, so a failure part
+    way through leaves any existing file untouched. progress(characters) is called after
+    each chunk. Returns the number of characters written.
+    """
+    return write_context_files(chunks, (path,), encoding, progress)
+
+
+def write_context_files(chunks, paths, encoding='utf-8', progress=None):
+    """Write the same rendered chunks to several paths atomically, as write_context_file does.
+
+    Chunks are produced once and written to every file. No file is replaced until all of
+    them are complete. Returns the number of characters in the stream.
+    """
+    return write_streams([(paths, chunks)], encoding, progress)
+
+
+def write_streams(streams, encoding='utf-8', progress=None):
+    """Write each (paths, chunks) stream to its paths; all files are replaced together at the end.
+
+    Every stream is rendered into temporary files first, so an error in any of them leaves
+    all the targets untouched. Returns the characters rendered; progress gets the running total.
+    """
+    temp_paths = {}
+    for paths, chunks in streams:
+        for path in paths:
+            directory, name = os.path.split(os.path.abspath(path))
+            temp_paths[path] = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+    files = []
+    written = 0
+    try:
+        for paths, chunks in streams:
+            if progress is not None:
+                chunks = iter_progress(chunks, lambda count, done=written: progress(done + count))
+            group = []
+            for path in paths:
+                group.append(open(temp_paths[path], 'x', encoding=encoding))
+                files.append(group[-1])
+            for chunk in chunks:
+                for f in group:
+                    f.write(chunk)
+                written += len(chunk)
+            for f in group:
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+        for path, temp_path in temp_paths.items():
+            if os.path.exists(path):
+                os.chmod(temp_path, os.stat(path).st_mode)
+            os.replace(temp_path, path)
+    except BaseException:
+        for f in files:
+            f.close()
+        for temp_path in temp_paths.values():
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        raise
+    return written
+
+
+def iter_progress(chunks, progress):
+    written = 0
+    for chunk in chunks:
+        yield chunk
+        written += len(chunk)
+        progress(written)
+
+
+# --- Multi-format export ---
+
+# Export format -> file extension; plain and markdown share one rendering
+EXPORT_FORMATS = {"plain": ".txt", "markdown": ".md", "xml": ".xml", "json": ".json"}
+TEXT_FORMATS = ("plain", "markdown")
+
+
+def parse_formats(text):
+    """Parse a comma-separated list of export formats, e.g. "markdown,xml,json"."""
+    formats = [name.strip().lower() for name in text.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown export format(s): {', '.join(unknown)} (choose from {', '.join(EXPORT_FORMATS)})")
+    if not formats:
+        raise ValueError("No export formats given")
+    return list(dict.fromkeys(formats))
+
+
+def format_paths(base_path, formats):
+    """Return {format: path} for a base path, dropping a known extension the user typed."""
+    root, extension = os.path.splitext(base_path)
+    if extension.lower() not in EXPORT_FORMATS.values():
+        root = base_path
+    return {name: root + EXPORT_FORMATS[name] for name in formats}
+
+
+def field_values(values):
+    """Return prepared values without the ones the renderers add, whose names start with "@"."""
+    return {name: value for name, value in values.items() if not name.startswith("@")}
+
+
+def iter_format_groups(template_name, data, formats, budget=None, dedupe=False, clock=None):
+    """Return (formats, chunks) pairs for exporting one form in several formats at once.
+
+    Formats that serialize identically share one lazy chunk stream, and every format is
+    stamped with the same moment. Chunks are only rendered as they are consumed.
+    """
+    if "xml" in formats and template_name not in APP_TYPES:
+        raise ValueError(f"XML export is only available for app types, not {template_name}")
+    now = (clock or default_clock()).now()
+    clock = Clock(now.tzinfo, now)
+
+    groups = []
+    text_formats = [name for name in formats if name in TEXT_FORMATS]
+    if text_formats:
+        plan, values = prepare(template_name, data, False, clock)
+        groups.append((text_formats, iter_prepared(plan, values, budget, dedupe)))
+    if "xml" in formats:
+        plan, values = prepare(template_name, data, True, clock)
+        groups.append((["xml"], iter_prepared(plan, values, budget, dedupe)))
+    if "json" in formats:
+        # The same shape as a batch spec, so an export can be rendered again with context_cli.py batch
+        document = {"template": template_name, "created": format_timestamp(clock), "fields": field_values(data)}
+        groups.append((["json"], iter([json.dumps(document, ensure_ascii=False, indent=2) + "\n"])))
+    return groups
+
+
+def write_formats(groups, paths, encoding='utf-8', progress=None):
+    """Write each (formats, chunks) group to its formats' paths; returns the characters rendered.
+
+    Nothing is replaced until every format has rendered, so a failure in one leaves all of them as they were.
+    """
+    streams = [([paths[name] for name in formats], chunks) for formats, chunks in groups]
+    return write_streams(streams, encoding, progress)
+
+
+# --- Template builder plans ---
+
+# Values the renderers add next to the form fields
+TEMPLATE_TITLE = "@template"
+APP_TYPE_TITLE = "@app_type"
+CREATED = "@created"
+
+TEMPLATE_HEADER = (FORMAT, """--- CONTEXT ENTRY BEGIN ---
+Generated by AI Context Template Builder
+Template: {}
+Created: {}
+--- CONTEXT ENTRY END ---
+
+--- CONTEXT ENTRY BEGIN ---
+""", (TEMPLATE_TITLE, CREATED), True, ("", ""))
+
+TEMPLATE_FOOTER = (TEXT, "\n--- CONTEXT ENTRY END ---\n\n--- USER MESSAGE BEGIN ---\n[Your request here]\n--- USER MESSAGE END ---")
+
+APP_SECTION_PLAN = compile_plan([
+    (LINE, "PROJECT", "Project Name", True, "Unnamed Project"),
+    (FORMAT, "TYPE: {} using {}\n", ("Project Type", "Programming Language"), True, ("Not specified", "Not specified")),
+    (LINE, "FRAMEWORK", "Framework"),
+    (LINE, "TARGET PLATFORM", "Target Platform", True, "Not specified"),
+    (TEXT, "\n"),
+    (BLOCK, "REQUIREMENTS", "Requirements"),
+    (BLOCK, "EXISTING CODE", "Existing Code"),
+    (ATTACHMENTS, "EXISTING CODE FILES", "Existing Code Files"),
+    (BLOCK, "DEPENDENCIES", "Dependencies"),
+    (BLOCK, "UI/UX REQUIREMENTS", "UI Requirements"),
+    (BLOCK, "TESTING REQUIREMENTS", "Testing Requirements"),
+])
+
+MCP_SECTION_PLAN = compile_plan([
+    (LINE, "MCP SERVER", "MCP Server Name", True, "Unnamed Server"),
+    (LINE, "DESCRIPTION", "Server Description", True, "No description provided"),
+    (TEXT, "\nMCP PROTOCOL REQUIREMENTS:\n"
+           "- Follow MCP specification from https://modelcontextprotocol.io/\n"
+           "- Implement proper JSON-RPC 2.0 communication\n"
+           "- Include proper error handling and validation\n"
+           "- Support standard MCP lifecycle methods\n\n"),
+    (BLOCK, "TOOLS TO IMPLEMENT", "Tools to Implement"),
+    (BLOCK, "RESOURCES", "Resources to Provide"),
+    (BLOCK, "PROMPTS", "Prompts to Include"),
+    (BLOCK, "CONFIGURATION", "Configuration Options"),
+    (BLOCK, "ERROR HANDLING", "Error Handling"),
+    (BLOCK, "INTEGRATION", "Integration Requirements"),
+])
+
+BUG_SECTION_PLAN = compile_plan([
+    (LINE, "BUG REPORT", "Bug Title", True, "Untitled Bug"),
+    (TEXT, "\n"),
+    (BLOCK, "CURRENT BEHAVIOR", "Current Behavior", True, "Not specified"),
+    (BLOCK, "EXPECTED BEHAVIOR", "Expected Behavior", True, "Not specified"),
+    (BLOCK, "REPRODUCTION STEPS", "Steps to Reproduce", True, "Not provided"),
+    (BLOCK, "ERROR MESSAGES", "Error Messages"),
+    (BLOCK, "ENVIRONMENT", "Environment", True, "Not specified"),
+    (BLOCK, "RELEVANT CODE", "Code Context"),
+    (ATTACHMENTS, "ATTACHED FILES", "Attached Files"),
+])
+
+FEATURE_SECTION_PLAN = compile_plan([
+    (LINE, "FEATURE REQUEST", "Feature Name", True, "Unnamed Feature"),
+    (LINE, "PRIORITY", "Priority", True, "Not specified"),
+    (TEXT, "\n"),
+    (BLOCK, "DESCRIPTION", "Feature Description", True, "No description provided"),
+    (BLOCK, "USER STORIES", "User Stories", True, "Not provided"),
+    (BLOCK, "ACCEPTANCE CRITERIA", "Acceptance Criteria", True, "Not specified"),
+    (BLOCK, "TECHNICAL REQUIREMENTS", "Technical Requirements"),
+    (BLOCK, "INTEGRATION POINTS", "Integration Points"),
+])
+
+SECTION_PLANS = {
+    "app_development": APP_SECTION_PLAN,
+    "mcp_development": MCP_SECTION_PLAN,
+    "bug_report": BUG_SECTION_PLAN,
+    "feature_request": FEATURE_SECTION_PLAN,
+}
+
+TEMPLATE_PLANS = {
+    name: compile_plan([TEMPLATE_HEADER, *plan, TEMPLATE_FOOTER])
+    for name, plan in SECTION_PLANS.items()
+}
+
+
+# --- App builder plans ---
+
+PLAIN_CHECKLIST = """DEVELOPMENT CHECKLIST:
+□ Set up development environment
+□ Initialize version control (Git)
+□ Create project structure
+□ Implement core features
+□ Add user authentication
+□ Set up database/data storage
+□ Implement error handling
+□ Add logging and monitoring
+□ Write comprehensive tests
+□ Create deployment pipeline
+□ Document APIs and usage
+□ Perform security review
+□ Optimize performance
+□ Plan maintenance strategy
+
+QUALITY ASSURANCE:
+□ Unit tests for business logic
+□ Integration tests for components
+□ End-to-end user workflow tests
+□ Performance and load testing
+□ Security vulnerability assessment
+□ Accessibility compliance check
+□ Cross-platform compatibility
+□ User acceptance testing
+--- CONTEXT ENTRY END ---
+
+--- USER MESSAGE BEGIN ---
+Build me this application based on the specification above
+--- USER MESSAGE END ---"""
+
+XML_CHECKLIST = """<development_checklist>
+<task status="pending">Set up development environment</task>
+<task status="pending">Initialize version control (Git)</task>
+<task status="pending">Create project structure</task>
+<task status="pending">Implement core features</task>
+<task status="pending">Add user authentication</task>
+<task status="pending">Set up database/data storage</task>
+<task status="pending">Implement error handling</task>
+<task status="pending">Add logging and monitoring</task>
+<task status="pending">Write comprehensive tests</task>
+<task status="pending">Create deployment pipeline</task>
+<task status="pending">Document APIs and usage</task>
+<task status="pending">Perform security review</task>
+<task status="pending">Optimize performance</task>
+<task status="pending">Plan maintenance strategy</task>
+</development_checklist>
+
+<quality_assurance>
+<test_type>Unit tests for business logic</test_type>
+<test_type>Integration tests for components</test_type>
+<test_type>End-to-end user workflow tests</test_type>
+<test_type>Performance and load testing</test_type>
+<test_type>Security vulnerability assessment</test_type>
+<test_type>Accessibility compliance check</test_type>
+<test_type>Cross-platform compatibility</test_type>
+<test_type>User acceptance testing</test_type>
+</quality_assurance>
+</application_specification>
+--- CONTEXT ENTRY END ---
+
+--- USER MESSAGE BEGIN ---
+<request>
+Build me this application based on the specification above
+</request>
+--- USER MESSAGE END ---"""
+
+# Type-specific fields listed under their own upper-cased heading
+APP_DETAIL_FIELDS = ['Authentication', 'Target OS', 'Command Structure', 'API Type', 'Target Platforms', 'Device Features',
+                     'Styling/CSS', 'UI Library', 'Output Format', 'Documentation', 'App Store Strategy', 'Backend Services']
+
+APP_PLAN = compile_plan([
+    (FORMAT, """--- CONTEXT ENTRY BEGIN ---
+Generated by App Development Context Builder
+Application Type: {}
+Created: {}
+--- CONTEXT ENTRY END ---
+
+--- CONTEXT ENTRY BEGIN ---
+APPLICATION SPECIFICATION
+
+""", (APP_TYPE_TITLE, CREATED), True, ("", "")),
+    (LINE, "PROJECT", "Project Name", True, "Unnamed Application"),
+    (LINE, "TYPE", APP_TYPE_TITLE, True, ""),
+    (LINE, "DESCRIPTION", "Project Description", True, "No description provided"),
+    (TEXT, "\n"),
+    (BLOCK, "TARGET USERS", "Target Users", True, "Not specified"),
+    (BLOCK, "CORE FEATURES", "Core Features", True, "No features specified"),
+    (LINE, "FRONTEND", "Frontend Framework"),
+    (LINE, "BACKEND", "Backend Framework"),
+    (LINE, "DATABASE", "Database"),
+    (LINE, "FRAMEWORK", "Desktop Framework"),
+    (LINE, "CLI FRAMEWORK", "CLI Framework"),
+    (LINE, "API FRAMEWORK", "API Framework"),
+    (LINE, "MOBILE FRAMEWORK", "Mobile Framework"),
+    (TEXT, "\n"),
+    *[(BLOCK, field.upper().replace(' ', '_'), field) for field in APP_DETAIL_FIELDS],
+    (BLOCK, "TECHNICAL REQUIREMENTS", "Technical Requirements"),
+    (BLOCK, "DEPENDENCIES", "Dependencies"),
+    (BLOCK, "TESTING STRATEGY", "Testing Strategy"),
+    (BLOCK, "DEPLOYMENT", "Deployment"),
+    (ATTACHMENTS, "EXISTING CODE", "Existing Code Files"),
+    (TEXT, PLAIN_CHECKLIST),
+])
+
+XML_PLAN = compile_plan([
+    (FORMAT, """--- CONTEXT ENTRY BEGIN ---
+<metadata>
+<generated_by>App Development Context Builder</generated_by>
+<application_type>{}</application_type>
+<created>{}</created>
+<xml_enhanced>true</xml_enhanced>
+</metadata>
+--- CONTEXT ENTRY END ---
+
+--- CONTEXT ENTRY BEGIN ---
+<application_specification>
+
+<project_info>
+""", (APP_TYPE_TITLE, CREATED), True, ("", "")),
+    (XML_INLINE, "name", "Project Name", True, "Unnamed Application"),
+    (XML_INLINE, "type", APP_TYPE_TITLE, True, ""),
+    (XML_INLINE, "description", "Project Description", True, "No description provided"),
+    (TEXT, "</project_info>\n\n"),
+    (XML_TEXT, "target_audience", "Target Users", True, "Not specified"),
+    (XML_LIST, "core_features", "Core Features", True, "No features specified"),
+    (XML_GROUP, "technical_stack", ("Frontend Framework", "Backend Framework", "Database"), False, None, (
+        (XML_ATTR, "frontend framework", "Frontend Framework"),
+        (XML_ATTR, "backend framework", "Backend Framework"),
+        (XML_ATTR, "database type", "Database"),
+        (XML_ATTR, "styling framework", "Styling/CSS"),
+    )),
+    (XML_REQUIREMENTS, "technical_requirements", "Technical Requirements"),
+    (XML_LIST, "dependencies", "Dependencies"),
+    (XML_LIST, "testing_strategy", "Testing Strategy"),
+    (XML_TEXT, "deployment_plan", "Deployment"),
+    (XML_ATTACHMENTS, "existing_code", "Existing Code Files"),
+    (TEXT, XML_CHECKLIST),
+])
+
+
+# --- Renderers ---
+
+def template_values(template_name, data, clock=None):
+    return {**data, TEMPLATE_TITLE: template_name.replace('_', ' ').title(), CREATED: format_timestamp(clock)}
+
+
+def app_values(app_type, data, clock=None):
+    return {**data, APP_TYPE_TITLE: app_type_label(app_type), CREATED: format_timestamp(clock)}
+
+
+def app_type_label(app_type):
+    return app_type.replace('_', ' ').title()
+
+
+def iter_context(template_name, data):
+    return iter_plan(TEMPLATE_PLANS[template_name], template_values(template_name, data))
+
+
+def iter_app_context(app_type, data):
+    return iter_plan(APP_PLAN, app_values(app_type, data))
+
+
+def iter_xml_context(app_type, data):
+    return iter_plan(XML_PLAN, app_values(app_type, data))
+
+
+def build_context(template_name, data):
+    return "".join(iter_context(template_name, data))
+
+
+def build_app_section(data):
+    return "".join(iter_plan(APP_SECTION_PLAN, data))
+
+
+def build_mcp_section(data):
+    return "".join(iter_plan(MCP_SECTION_PLAN, data))
+
+
+def build_bug_section(data):
+    return "".join(iter_plan(BUG_SECTION_PLAN, data))
+
+
+def build_feature_section(data):
+    return "".join(iter_plan(FEATURE_SECTION_PLAN, data))
+
+
+def build_app_context(app_type, data):
+    return "".join(iter_app_context(app_type, data))
+
+
+def build_xml_context(app_type, data):
+    return "".join(iter_xml_context(app_type, data))
+
+
+def format_xml_list(text):
+    return "".join(iter_xml_list(text))
+
+
+def format_xml_requirements(text):
+    return "".join(iter_xml_list(text, "requirement"))
@@ -0,0 +1,344 @@
+"""
+Context Templates
+Form field schemas for the context builders
+"""
+
+from functools import lru_cache
+
+
+# --- Template builder schemas ---
+
+APP_DEVELOPMENT_FIELDS = {
+    "Project Name": {
+        "type": "entry", "required": True,
+        "tooltip": "Enter a clear, descriptive name for your project (e.g., 'Customer Management System', 'Weather Dashboard')"
+    },
+    "Project Type": {
+        "type": "combo", "values": ["Web App", "Desktop App", "CLI Tool", "API Service"], "required": True,
+        "tooltip": "Select the type of application you want to build:\n• Web App: Browser-based application\n• Desktop App: Standalone GUI application\n• CLI Tool: Command-line interface\n• API Service: Backend service with REST/GraphQL API"
+    },
+    "Programming Language": {
+        "type": "combo", "values": ["Python", "JavaScript", "TypeScript", "Java", "C#", "Go"], "required": True,
+        "tooltip": "Choose your primary programming language. Consider:\n• Python: Great for rapid development, data processing\n• JavaScript/TypeScript: Web development, Node.js\n• Java/C#: Enterprise applications\n• Go: High-performance services"
+    },
+    "Framework": {
+        "type": "entry", "required": False,
+        "tooltip": "Specify the framework or library (e.g., Flask, React, Django, Express, .NET Core). Leave blank if unsure."
+    },
+    "Requirements": {
+        "type": "text", "height": 8, "required": True, 
+        "placeholder": "List specific requirements, one per line",
+        "tooltip": "List specific, measurable requirements:\n• User can login with email/password\n• System displays real-time data updates\n• Export data to CSV format\n• Support 1000+ concurrent users\n\nBe specific about what the app should DO, not how it should work."
+    },
+    "Existing Code": {
+        "type": "text", "height": 6, "required": False, 
+        "placeholder": "Paste existing code or file structure",
+        "tooltip": "Include any existing code, file structure, or database schemas that should be considered:\n• Current file organization\n• Existing functions/classes\n• Database tables\n• API endpoints\n\nThis helps AI understand what already exists."
+    },
+    "Existing Code Files": {
+        "type": "attachment", "height": 3, "required": False,
+        "tooltip": "Attach source files or a project folder instead of pasting them. Only the paths are kept in the form; file contents are streamed into the context when it is exported, so large files never load into the window."
+    },
+    "Dependencies": {
+        "type": "text", "height": 4, "required": False, 
+        "placeholder": "List dependencies and versions",
+        "tooltip": "List required libraries, packages, or external services:\n• Python: flask==2.0.1, sqlalchemy>=1.4\n• Node.js: express@4.18.0, mongoose@6.0\n• External APIs: Stripe, SendGrid, AWS S3\n• Databases: PostgreSQL 13+, Redis"
+    },
+    "Target Platform": {
+        "type": "combo", "values": ["Windows", "Linux", "macOS", "Cross-platform"], "required": True,
+        "tooltip": "Select where your application will run:\n• Windows: Windows-specific features\n• Linux: Server deployments, containers\n• macOS: Mac-specific applications\n• Cross-platform: Works on multiple operating systems"
+    },
+    "UI Requirements": {
+        "type": "text", "height": 4, "required": False, 
+        "placeholder": "Describe UI/UX requirements",
+        "tooltip": "Describe the user interface and experience:\n• Layout: Dashboard with sidebar navigation\n• Colors: Corporate blue theme\n• Responsive: Mobile-friendly design\n• Accessibility: Screen reader support\n• Components: Data tables, charts, forms"
+    },
+    "Testing Requirements": {
+        "type": "text", "height": 3, "required": False, 
+        "placeholder": "Testing strategy and requirements",
+        "tooltip": "Specify testing approach:\n• Unit tests for core functions\n• Integration tests for API endpoints\n• End-to-end tests for user workflows\n• Performance tests for 1000+ users\n• Security testing for authentication"
+    }
+}
+
+MCP_DEVELOPMENT_FIELDS = {
+    "MCP Server Name": {
+        "type": "entry", "required": True,
+        "tooltip": "Choose a descriptive name for your MCP server (e.g., 'file-manager', 'database-connector', 'weather-api')"
+    },
+    "Server Description": {
+        "type": "text", "height": 3, "required": True, 
+        "placeholder": "What does this MCP server do?",
+        "tooltip": "Clearly describe what your MCP server provides:\n• 'Manages local file operations and directory browsing'\n• 'Connects to PostgreSQL databases for data queries'\n• 'Provides weather data from OpenWeatherMap API'\n\nBe specific about the main purpose and capabilities."
+    },
+    "Tools to Implement": {
+        "type": "text", "height": 6, "required": True, 
+        "placeholder": "List tools with descriptions, one per line",
+        "tooltip": "List each tool your MCP will provide:\n• read_file: Read contents of a text file\n• write_file: Write content to a file\n• list_directory: List files in a directory\n• execute_query: Run SQL queries on database\n\nFormat: tool_name: description of what it does"
+    },
+    "Resources to Provide": {
+        "type": "text", "height": 4, "required": False, 
+        "placeholder": "List resources (files, data sources, etc.)",
+        "tooltip": "Resources are data sources your MCP exposes:\n• file://path/to/config.json\n• database://localhost:5432/mydb\n• api://weather.example.com/current\n\nResources provide read-only access to data."
+    },
+    "Prompts to Include": {
+        "type": "text", "height": 4, "required": False, 
+        "placeholder": "List prompt templates",
+        "tooltip": "Prompt templates help users interact with your MCP:\n• 'Analyze this file for security issues'\n• 'Generate SQL query for customer data'\n• 'Create backup script for database'\n\nThese guide users on how to use your tools effectively."
+    },
+    "Configuration Options": {
+        "type": "text", "height": 4, "required": False, 
+        "placeholder": "Environment variables, settings, etc.",
+        "tooltip": "Configuration your MCP server needs:\n• DATABASE_URL: Connection string\n• API_KEY: Authentication token\n• MAX_FILE_SIZE: File size limit in MB\n• DEBUG_MODE: Enable debug logging\n\nInclude environment variables and settings."
+    },
+    "Error Handling": {
+        "type": "text", "height": 3, "required": False, 
+        "placeholder": "Specific error scenarios to handle",
+        "tooltip": "Important error cases to handle gracefully:\n• File not found or permission denied\n• Database connection failures\n• API rate limits exceeded\n• Invalid input parameters\n• Network timeouts"
+    },
+    "Integration Requirements": {
+        "type": "text", "height": 3, "required": False, 
+        "placeholder": "How should this integrate with other systems?",
+        "tooltip": "How your MCP connects to other systems:\n• Authentication with OAuth2\n• Webhook notifications\n• Integration with existing APIs\n• Data synchronization requirements\n• Security and permission models"
+    }
+}
+
+BUG_REPORT_FIELDS = {
+    "Bug Title": {
+        "type": "entry", "required": True,
+        "tooltip": "Write a clear, specific title:\n• Good: 'Login fails with 500 error when password contains special characters'\n• Bad: 'Login broken'\n\nInclude what's broken and key symptoms."
+    },
+    "Current Behavior": {
+        "type": "text", "height": 4, "required": True, 
+        "placeholder": "What is happening now?",
+        "tooltip": "Describe exactly what happens when the bug occurs:\n• User clicks login button\n• Page shows 500 Internal Server Error\n• No error message displayed to user\n• Browser console shows 'TypeError: Cannot read property...'\n\nBe specific about what you observe."
+    },
+    "Expected Behavior": {
+        "type": "text", "height": 4, "required": True, 
+        "placeholder": "What should happen instead?",
+        "tooltip": "Describe what should happen in the normal case:\n• User should be logged in successfully\n• Dashboard page should load\n• Welcome message should appear\n• Navigation menu should be visible\n\nExplain the correct behavior clearly."
+    },
+    "Steps to Reproduce": {
+        "type": "text", "height": 6, "required": True, 
+        "placeholder": "Step-by-step reproduction",
+        "tooltip": "Provide exact steps to reproduce the bug:\n1. Open browser and go to login page\n2. Enter email: test@example.com\n3. Enter password: P@ssw0rd!\n4. Click 'Login' button\n5. Observe error message\n\nNumber each step clearly."
+    },
+    "Error Messages": {
+        "type": "text", "height": 4, "required": False, 
+        "placeholder": "Exact error messages or logs",
+        "tooltip": "Include exact error messages:\n• Browser console errors\n• Server log entries\n• Error dialog text\n• HTTP status codes\n• Stack traces\n\nCopy and paste the exact text."
+    },
+    "Environment": {
+        "type": "text", "height": 3, "required": True, 
+        "placeholder": "OS, Python version, dependencies",
+        "tooltip": "Specify your environment:\n• Operating System: Windows 10, macOS 12.1, Ubuntu 20.04\n• Browser: Chrome 96.0, Firefox 95.0\n• Python version: 3.9.7\n• Framework versions: Flask 2.0.1\n• Database: PostgreSQL 13.4"
+    },
+    "Code Context": {
+        "type": "text", "height": 6, "required": False, 
+        "placeholder": "Relevant code snippets",
+        "tooltip": "Include relevant code that might be causing the issue:\n• Function where error occurs\n• Configuration files\n• Database queries\n• API calls\n• Recent changes\n\nHelp identify the root cause."
+    },
+    "Attached Files": {
+        "type": "attachment", "height": 3, "required": False,
+        "tooltip": "Attach logs and source files by path. Contents are streamed into the context on export, so multi-megabyte logs never load into the window."
+    }
+}
+
+FEATURE_REQUEST_FIELDS = {
+    "Feature Name": {
+        "type": "entry", "required": True,
+        "tooltip": "Give your feature a clear, descriptive name:\n• 'User Profile Management'\n• 'Real-time Chat System'\n• 'CSV Data Export'\n\nMake it specific and actionable."
+    },
+    "Feature Description": {
+        "type": "text", "height": 4, "required": True, 
+        "placeholder": "What should this feature do?",
+        "tooltip": "Describe the feature's purpose and main functionality:\n• Allow users to update their profile information\n• Enable real-time messaging between users\n• Provide data export in multiple formats\n\nExplain the business value and user benefit."
+    },
+    "User Stories": {
+        "type": "text", "height": 6, "required": True, 
+        "placeholder": "As a user, I want... (one per line)",
+        "tooltip": "Write user stories in this format:\n• As a [user type], I want [goal] so that [benefit]\n• As a customer, I want to update my email address so that I receive notifications\n• As an admin, I want to export user data so that I can analyze usage patterns\n\nFocus on user goals and benefits."
+    },
+    "Acceptance Criteria": {
+        "type": "text", "height": 6, "required": True, 
+        "placeholder": "How to verify the feature works",
+        "tooltip": "Define specific, testable criteria:\n• Given [context], when [action], then [result]\n• User can successfully update email address\n• System validates email format before saving\n• Confirmation email is sent to new address\n• Old email receives notification of change\n\nMake criteria measurable and testable."
+    },
+    "Technical Requirements": {
+        "type": "text", "height": 4, "required": False, 
+        "placeholder": "Technical constraints or requirements",
+        "tooltip": "Specify technical considerations:\n• Performance: Page load under 2 seconds\n• Security: Encrypt sensitive data\n• Scalability: Support 10,000 concurrent users\n• Integration: Connect with existing user database\n• Compatibility: Work on mobile devices"
+    },
+    "Integration Points": {
+        "type": "text", "height": 3, "required": False, 
+        "placeholder": "How does this integrate with existing code?",
+        "tooltip": "Describe how this feature connects to existing systems:\n• Uses existing user authentication system\n• Integrates with current database schema\n• Connects to email service API\n• Updates existing user dashboard\n• Requires changes to user model"
+    },
+    "Priority": {
+        "type": "combo", "values": ["High", "Medium", "Low"], "required": True,
+        "tooltip": "Set feature priority:\n• High: Critical for next release, blocks other work\n• Medium: Important but can wait for next sprint\n• Low: Nice to have, can be deferred\n\nConsider business impact and user needs."
+    }
+}
+
+TEMPLATES = {
+    "app_development": APP_DEVELOPMENT_FIELDS,
+    "mcp_development": MCP_DEVELOPMENT_FIELDS,
+    "bug_report": BUG_REPORT_FIELDS,
+    "feature_request": FEATURE_REQUEST_FIELDS
+}
+
+
+# --- App builder schemas ---
+
+# Fields every app type starts with; Project Name's tooltip is filled in per app type
+APP_COMMON_FIELDS = {
+    "Project Name": {
+        "type": "entry", "required": True,
+        "tooltip": "Enter a clear, descriptive name for your {app_type}:\n• Be specific: 'Task Manager Pro' not 'My App'\n• Avoid generic terms like 'System' or 'Tool'\n• Consider branding and user recognition"
+    },
+    "Project Description": {
+        "type": "text", "height": 3, "required": True,
+        "tooltip": "Describe what your application does and why it's valuable:\n• Focus on user benefits and problems solved\n• Mention key features and capabilities\n• Keep it concise but comprehensive"
+    },
+    "Target Users": {
+        "type": "text", "height": 2, "required": True,
+        "tooltip": "Who will use this application?\n• Primary users: 'Small business owners managing inventory'\n• Secondary users: 'Employees tracking daily tasks'\n• User personas help guide design decisions"
+    },
+    "Core Features": {
+        "type": "text", "height": 6, "required": True,
+        "tooltip": "List the main features your application must have:\n• User authentication and profiles\n• Data visualization with charts\n• Export functionality (PDF, CSV)\n• Real-time notifications\n• Search and filtering\n\nPrioritize essential features first."
+    }
+}
+
+APP_SPECIFIC_FIELDS = {
+    "web_app": {
+        "Frontend Framework": {
+            "type": "combo", "values": ["React", "Vue.js", "Angular", "Svelte", "Next.js", "Nuxt.js", "Vanilla JavaScript", "TypeScript", "jQuery"], "required": False,
+            "tooltip": "Choose your frontend technology:\n• React: Large ecosystem, component-based\n• Vue.js: Gentle learning curve, flexible\n• Angular: Full framework, TypeScript-first\n• Svelte: Compile-time optimization\n• Next.js: React with SSR/SSG\n• Nuxt.js: Vue with SSR/SSG\n• Vanilla JavaScript: No framework dependencies\n• TypeScript: Type-safe JavaScript\n• jQuery: Legacy support, simple DOM manipulation"
+        },
+        "Backend Framework": {
+            "type": "combo", "values": ["Python (Django)", "Python (Flask)", "Python (FastAPI)", "Node.js (Express)", "Node.js (NestJS)", "Ruby on Rails", "PHP (Laravel)", "Java (Spring Boot)", "C# (ASP.NET Core)", "Go (Gin)", "Rust (Actix)"], "required": True,
+            "tooltip": "Select your backend framework:\n• Django: Python, batteries included, rapid development\n• Flask: Python, lightweight, flexible\n• FastAPI: Python, modern, automatic API docs\n• Express: Node.js, minimal, flexible\n• NestJS: Node.js, TypeScript, enterprise-grade\n• Rails: Ruby, convention over configuration\n• Laravel: PHP, elegant syntax, full-featured\n• Spring Boot: Java, enterprise, microservices\n• ASP.NET Core: C#, high performance, cross-platform\n• Gin: Go, fast, minimal\n• Actix: Rust, extremely fast, safe"
+        },
+        "Database": {
+            "type": "combo", "values": ["PostgreSQL", "MySQL", "MongoDB", "SQLite", "Redis", "Cassandra", "DynamoDB", "Firebase"], "required": True,
+            "tooltip": "Choose your database:\n• PostgreSQL: Advanced features, JSON support, ACID\n• MySQL: Reliable, widely supported, fast\n• MongoDB: Document-based, flexible schema\n• SQLite: Lightweight, serverless, embedded\n• Redis: In-memory, caching, pub/sub\n• Cassandra: Distributed, high availability\n• DynamoDB: AWS NoSQL, serverless\n• Firebase: Google, real-time, easy setup"
+        },
+        "Authentication": {
+            "type": "text", "height": 2, "required": False,
+            "tooltip": "Specify authentication requirements:\n• Email/password with verification\n• OAuth (Google, GitHub, Facebook, Apple)\n• Two-factor authentication (2FA)\n• Role-based access control (RBAC)\n• JWT tokens with refresh\n• Session management\n• Single Sign-On (SSO)"
+        },
+        "Styling/CSS": {
+            "type": "combo", "values": ["Tailwind CSS", "Bootstrap", "Material-UI", "Ant Design", "Chakra UI", "Styled Components", "CSS Modules", "SCSS/Sass", "Vanilla CSS"], "required": False,
+            "tooltip": "Choose your styling approach:\n• Tailwind CSS: Utility-first, highly customizable\n• Bootstrap: Component library, responsive\n• Material-UI: Google's Material Design\n• Ant Design: Enterprise-class UI language\n• Chakra UI: Modular, accessible components\n• Styled Components: CSS-in-JS\n• CSS Modules: Scoped CSS\n• SCSS/Sass: CSS preprocessor\n• Vanilla CSS: Pure CSS, no dependencies"
+        }
+    },
+    "desktop_app": {
+        "Desktop Framework": {
+            "type": "combo", "values": ["Electron", "Python (Tkinter)", "Python (PyQt/PySide)", "Python (Kivy)", "C# (WPF)", "C# (WinUI)", "Java (Swing)", "Java (JavaFX)", "C++ (Qt)", "Rust (Tauri)", "Go (Fyne)"], "required": True,
+            "tooltip": "Choose your desktop framework:\n• Electron: Web technologies, cross-platform, large apps\n• Tkinter: Python built-in, simple GUIs\n• PyQt/PySide: Professional Python GUIs, native look\n• Kivy: Python, touch-friendly, mobile support\n• WPF: Modern Windows applications, XAML\n• WinUI: Latest Windows UI framework\n• Swing: Cross-platform Java GUIs, mature\n• JavaFX: Modern Java UI, rich graphics\n• Qt: C++, native performance, cross-platform\n• Tauri: Rust backend, web frontend, small size\n• Fyne: Go, simple, cross-platform"
+        },
+        "Target OS": {
+            "type": "combo", "values": ["Windows", "macOS", "Linux", "Cross-platform"], "required": True,
+            "tooltip": "Select target operating systems:\n• Windows: Largest desktop market, .NET ecosystem\n• macOS: Premium user base, App Store\n• Linux: Developer and enterprise users\n• Cross-platform: Maximum reach, consistent experience"
+        },
+        "Installation Method": {
+            "type": "text", "height": 2, "required": False,
+            "tooltip": "How will users install your app?\n• Installer package (.msi, .dmg, .deb, .rpm)\n• Portable executable (no installation)\n• App store distribution (Microsoft Store, Mac App Store)\n• Package managers (Chocolatey, Homebrew, apt)\n• Auto-updater integration\n• Silent/enterprise deployment"
+        },
+        "UI Library": {
+            "type": "combo", "values": ["Native OS", "Material Design", "Fluent Design", "Custom Theme"], "required": False,
+            "tooltip": "Choose your UI design approach:\n• Native OS: Platform-specific look and feel\n• Material Design: Google's design language\n• Fluent Design: Microsoft's design system\n• Custom Theme: Branded, unique appearance"
+        }
+    },
+    "cli_tool": {
+        "CLI Framework": {
+            "type": "combo", "values": ["Python (Click)", "Python (argparse)", "Python (Typer)", "Node.js (Commander)", "Node.js (Yargs)", "Go (Cobra)", "Rust (Clap)", "C# (System.CommandLine)", "Java (Picocli)"], "required": True,
+            "tooltip": "Choose your CLI framework:\n• Click: Python, decorator-based, powerful features\n• argparse: Python built-in, standard library\n• Typer: Python, modern, type hints, FastAPI style\n• Commander: Node.js, feature-rich, popular\n• Yargs: Node.js, flexible, interactive\n• Cobra: Go, used by Docker, Kubernetes\n• Clap: Rust, performance-focused, derive macros\n• System.CommandLine: C#, modern .NET CLI\n• Picocli: Java, annotation-based, GraalVM ready"
+        },
+        "Command Structure": {
+            "type": "text", "height": 3, "required": True,
+            "tooltip": "Define your command structure:\n• mytool init --config config.json\n• mytool process --input file.txt --output result.txt\n• mytool status --verbose\n• mytool deploy --env production\n\nInclude subcommands, options, and arguments."
+        },
+        "Configuration": {
+            "type": "text", "height": 2, "required": False,
+            "tooltip": "How will your CLI be configured?\n• Configuration files (JSON, YAML, TOML, INI)\n• Environment variables\n• Command-line flags and options\n• Interactive setup wizard\n• Config file auto-generation\n• Profile/workspace support"
+        },
+        "Output Format": {
+            "type": "combo", "values": ["Plain Text", "JSON", "YAML", "Table", "Progress Bars", "Interactive"], "required": False,
+            "tooltip": "Choose output formatting:\n• Plain Text: Simple, readable output\n• JSON: Machine-readable, structured\n• YAML: Human-readable, structured\n• Table: Tabular data display\n• Progress Bars: Long-running operations\n• Interactive: Menus, prompts, TUI"
+        }
+    },
+    "api_service": {
+        "API Framework": {
+            "type": "combo", "values": ["Python (FastAPI)", "Python (Django REST)", "Python (Flask-RESTful)", "Node.js (Express)", "Node.js (NestJS)", "Java (Spring Boot)", "C# (ASP.NET Core)", "Go (Gin)", "Go (Echo)", "Rust (Actix)", "Ruby (Rails API)"], "required": True,
+            "tooltip": "Choose your API framework:\n• FastAPI: Python, automatic docs, type hints, async\n• Django REST: Python, batteries included, serializers\n• Flask-RESTful: Python, lightweight, flexible\n• Express: Node.js, minimal, middleware-based\n• NestJS: Node.js, TypeScript, decorator-based\n• Spring Boot: Java, enterprise-grade, microservices\n• ASP.NET Core: C#, high performance, cross-platform\n• Gin: Go, fast HTTP router, minimal\n• Echo: Go, high performance, middleware\n• Actix: Rust, extremely fast, actor-based\n• Rails API: Ruby, convention over configuration"
+        },
+        "API Type": {
+            "type": "combo", "values": ["REST", "GraphQL", "gRPC", "WebSocket", "Server-Sent Events"], "required": True,
+            "tooltip": "Select your API type:\n• REST: Standard HTTP methods, widely supported\n• GraphQL: Flexible queries, single endpoint, type-safe\n• gRPC: High performance, binary protocol, streaming\n• WebSocket: Real-time, bidirectional communication\n• Server-Sent Events: Real-time, server-to-client"
+        },
+        "Authentication": {
+            "type": "combo", "values": ["JWT", "OAuth 2.0", "API Keys", "Basic Auth", "Bearer Token", "mTLS"], "required": True,
+            "tooltip": "Choose authentication method:\n• JWT: Stateless, scalable tokens, claims-based\n• OAuth 2.0: Industry standard, secure, delegated auth\n• API Keys: Simple, good for service-to-service\n• Basic Auth: Simple but less secure, base64 encoded\n• Bearer Token: Token-based, stateless\n• mTLS: Mutual TLS, certificate-based, high security"
+        },
+        "Documentation": {
+            "type": "combo", "values": ["OpenAPI/Swagger", "GraphQL Playground", "Postman", "Insomnia", "Custom Docs"], "required": False,
+            "tooltip": "API documentation approach:\n• OpenAPI/Swagger: Standard, interactive docs\n• GraphQL Playground: GraphQL schema explorer\n• Postman: Collection-based, team collaboration\n• Insomnia: REST client with documentation\n• Custom Docs: Tailored documentation site"
+        }
+    },
+    "mobile_app": {
+        "Mobile Framework": {
+            "type": "combo", "values": ["React Native", "Flutter", "Native iOS (Swift)", "Native Android (Kotlin)", "Xamarin", "Ionic", "Cordova/PhoneGap", "Unity (Games)", "Expo"], "required": True,
+            "tooltip": "Choose your mobile framework:\n• React Native: JavaScript, code sharing, large community\n• Flutter: Dart, high performance, single codebase\n• Native iOS: Swift, platform-specific, best performance\n• Native Android: Kotlin, platform-specific, Material Design\n• Xamarin: C#, Microsoft ecosystem, native performance\n• Ionic: Web technologies, hybrid apps, plugins\n• Cordova/PhoneGap: HTML/CSS/JS, web-based\n• Unity: Game development, 3D/2D, cross-platform\n• Expo: React Native with managed workflow"
+        },
+        "Target Platforms": {
+            "type": "combo", "values": ["iOS only", "Android only", "Both iOS and Android", "Web Progressive App"], "required": True,
+            "tooltip": "Select target platforms:\n• iOS only: Premium market, consistent hardware, App Store\n• Android only: Larger market share, diverse devices, Google Play\n• Both: Maximum reach, more development effort\n• Web Progressive App: Web-based, app-like experience"
+        },
+        "Device Features": {
+            "type": "text", "height": 3, "required": False,
+            "tooltip": "What device features will you use?\n• Camera for photo/video capture\n• GPS for location services and mapping\n• Push notifications for engagement\n• Biometric authentication (Face ID, Touch ID)\n• Offline data storage and sync\n• Accelerometer/Gyroscope for motion\n• Bluetooth for device connectivity\n• NFC for payments/data transfer\n• Background processing"
+        },
+        "App Store Strategy": {
+            "type": "text", "height": 2, "required": False,
+            "tooltip": "Distribution and monetization:\n• Free app with ads\n• Paid app (one-time purchase)\n• Freemium with in-app purchases\n• Subscription model\n• Enterprise distribution\n• Beta testing strategy (TestFlight, Play Console)\n• App Store Optimization (ASO)"
+        },
+        "Backend Services": {
+            "type": "combo", "values": ["Firebase", "AWS Amplify", "Supabase", "Custom API", "Parse", "Back4App"], "required": False,
+            "tooltip": "Choose backend services:\n• Firebase: Google, real-time database, auth, hosting\n• AWS Amplify: Amazon, full-stack, GraphQL\n• Supabase: Open source Firebase alternative\n• Custom API: Your own backend service\n• Parse: Open source, self-hosted\n• Back4App: Parse hosting service"
+        }
+    }
+}
+
+# Fields every app type ends with
+APP_TRAILING_FIELDS = {
+    "Technical Requirements": {
+        "type": "text", "height": 4, "required": False,
+        "tooltip": "Specify technical constraints and requirements:\n• Performance: Load time under 2 seconds\n• Scalability: Support 10,000 concurrent users\n• Security: Encrypt sensitive data\n• Compatibility: Support modern browsers/OS versions\n• Accessibility: WCAG 2.1 compliance"
+    },
+    "Dependencies": {
+        "type": "text", "height": 3, "required": False,
+        "tooltip": "List external dependencies:\n• Third-party libraries and versions\n• External APIs and services\n• Database requirements\n• System dependencies\n• Development tools"
+    },
+    "Testing Strategy": {
+        "type": "text", "height": 3, "required": False,
+        "tooltip": "Define your testing approach:\n• Unit tests for core business logic\n• Integration tests for API endpoints\n• End-to-end tests for user workflows\n• Performance tests for load handling\n• Security tests for vulnerabilities"
+    },
+    "Deployment": {
+        "type": "text", "height": 2, "required": False,
+        "tooltip": "How will you deploy your application?\n• Cloud platforms: AWS, Azure, Google Cloud\n• Containerization: Docker, Kubernetes\n• CI/CD pipelines: GitHub Actions, Jenkins\n• Monitoring: Application performance monitoring\n• Backup and recovery strategies"
+    },
+    "Existing Code Files": {
+        "type": "attachment", "height": 3, "required": False,
+        "tooltip": "Attach source files or a whole project folder. Folders are walked honoring .gitignore, binaries are skipped, and a file tree plus file contents are added to the context on export."
+    }
+}
+
+
+@lru_cache(maxsize=None)
+def app_form_fields(app_type):
+    """Return the ordered field schema for an app type, built once per type."""
+    project_name = APP_COMMON_FIELDS["Project Name"]
+    common_fields = dict(APP_COMMON_FIELDS)
+    common_fields["Project Name"] = dict(project_name, tooltip=project_name["tooltip"].format(app_type=app_type.replace('_', ' ')))
+    return {**common_fields, **APP_SPECIFIC_FIELDS[app_type], **APP_TRAILING_FIELDS}
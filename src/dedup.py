@@ -0,0 +1,113 @@
+"""
+Dedup
+Replaces content repeated across rendered sections with a short back-reference
+"""
+
+import hashlib
+import re
+
+WINDOW = 3          # consecutive non-blank lines that must repeat before they are replaced
+MIN_CHARS = 40      # normalized characters a block or window needs to be worth replacing
+
+WHITESPACE = re.compile(r"\s+")
+ELEMENT = re.compile(r"<(\w+)>(.*)</\1>")
+
+
+def normalize(line):
+    line = WHITESPACE.sub(" ", line).strip()
+    # <item>x</item> and <requirement>x</requirement> hold the same content
+    element = ELEMENT.fullmatch(line)
+    return element.group(2).strip() if element else line
+
+
+def digest(lines):
+    return hashlib.blake2b("\n".join(lines).encode("utf-8"), digest_size=12).digest()
+
+
+def back_reference(count, name):
+    return f"[{count} line{'s' if count != 1 else ''} repeated from {name} above]"
+
+
+def dedupe_sections(names, texts):
+    """Return texts with repeats of earlier named sections replaced by back-references.
+
+    Whole repeated values and runs of WINDOW or more repeated lines are both caught, after
+    whitespace normalization. Sections named None (static template text) are left alone.
+    """
+    seen = {}   # hash of a normalized block or line window -> name of the section it first appeared in
+    result = []
+    for name, text in zip(names, texts):
+        if name is None or not text:
+            result.append(text)
+            continue
+        lines = text.split("\n")
+        content = [(index, normalize(line)) for index, line in enumerate(lines)]
+        content = [(index, line) for index, line in content if line]
+        normalized = [line for index, line in content]
+
+        # The opening label line and any closing XML tag frame the value and never take part
+        first = 1
+        last = len(content) - 1 if len(content) > 1 and normalized[-1].startswith("</") else len(content)
+        body = normalized[first:last]
+
+        # Windows are hashed over non-blank lines so blank-line differences do not hide a repeat
+        keys = []
+        for start in range(first, last - WINDOW + 1):
+            window = normalized[start:start + WINDOW]
+            keys.append((start, digest(window) if sum(map(len, window)) >= MIN_CHARS else None))
+
+        # Mark every line covered by a window that an earlier section already contained
+        source = [None] * len(content)
+        for start, key in keys:
+            origin = seen.get(key) if key is not None else None
+            if origin is not None:
+                for offset in range(WINDOW):
+                    if source[start + offset] is None:
+                        source[start + offset] = origin
+
+        body_key = digest(body) if sum(map(len, body)) >= MIN_CHARS else None
+        if body_key in seen and len(body) < WINDOW:
+            # Short values repeated whole, e.g. the same one-line answer in two fields
+            for position in range(first, last):
+                source[position] = seen[body_key]
+
+        if any(source):
+            result.append(replace_runs(lines, content, source))
+        else:
+            result.append(text)
+
+        for start, key in keys:
+            if key is not None:
+                seen.setdefault(key, name)
+        if body_key is not None:
+            seen.setdefault(body_key, name)
+    return result
+
+
+def replace_runs(lines, content, source):
+    """Collapse each run of repeated lines into a single back-reference line."""
+    replaced = {}   # first line index of a run -> (last line index, count, origin)
+    position = 0
+    while position < len(content):
+        origin = source[position]
+        if origin is None:
+            position += 1
+            continue
+        end = position
+        while end + 1 < len(content) and source[end + 1] == origin:
+            end += 1
+        replaced[content[position][0]] = (content[end][0], end - position + 1, origin)
+        position = end + 1
+
+    output = []
+    index = 0
+    while index < len(lines):
+        if index in replaced:
+            last, count, origin = replaced[index]
+            indent = lines[index][:len(lines[index]) - len(lines[index].lstrip())]
+            output.append(indent + back_reference(count, origin))
+            index = last + 1
+        else:
+            output.append(lines[index])
+            index += 1
+    return "\n".join(output)
@@ -0,0 +1,97 @@
+"""
+Export Worker
+Writes rendered contexts to disk on a background thread, reporting progress to the Tk loop
+"""
+
+import os
+import queue
+import threading
+import time
+
+import context_engine
+from instrumentation import NULL_TRACE, iter_timed
+
+POLL_INTERVAL = 50   # ms between checks on a running export
+
+
+class ExportWorker:
+    """Runs one export at a time off the Tk main thread.
+
+    The worker thread only renders and writes. Progress and completion are picked up by
+    poll(), which runs on the Tk loop through after(), so widgets are never touched from
+    the worker.
+    """
+
+    def __init__(self, widget, on_progress=None, poll_interval=POLL_INTERVAL):
+        self.widget = widget
+        self.on_progress = on_progress
+        self.poll_interval = poll_interval
+        self.results = queue.Queue()
+        self.thread = None
+        self.path = None
+        self.on_done = None
+        self.written = 0
+        self.trace = NULL_TRACE
+
+    @property
+    def busy(self):
+        return self.thread is not None
+
+    def start(self, chunks, path, on_done, trace=NULL_TRACE):
+        """Write chunks to path; on_done(path, characters, error) is called on the Tk thread.
+
+        Time spent producing chunks is traced as "render" and the rest of the write as
+        "write"; the trace is finished on the Tk thread just before on_done.
+        """
+        self.launch([(["file"], chunks)], {"file": path}, path, on_done, trace)
+
+    def start_formats(self, groups, paths, on_done, trace=NULL_TRACE):
+        """Write context_engine.iter_format_groups() output to paths ({format: path}).
+
+        on_done gets the paths dict in place of a single path.
+        """
+        self.launch(groups, paths, paths, on_done, trace)
+
+    def launch(self, groups, paths, target, on_done, trace):
+        if self.busy:
+            raise RuntimeError("An export is already running")
+        self.path = target
+        self.on_done = on_done
+        self.written = 0
+        self.trace = trace
+        groups = [(formats, iter_timed(chunks, trace, "render")) for formats, chunks in groups]
+        # Not a daemon: closing the window mid-export still lets the files be completed
+        self.thread = threading.Thread(target=self.run, args=(groups, paths), name="context-export")
+        self.thread.start()
+        self.widget.after(self.poll_interval, self.poll)
+
+    def run(self, groups, paths):
+        trace = self.trace
+        start = time.perf_counter()
+        try:
+            written = context_engine.write_formats(groups, paths, progress=self.report)
+            if trace.enabled:
+                trace.add("write", time.perf_counter() - start - trace.seconds("render"), written)
+                trace.info["bytes"] = sum(os.path.getsize(path) for path in paths.values())
+            self.results.put((written, None))
+        except Exception as e:
+            self.results.put((self.written, e))
+
+    def report(self, written):
+        # Called per chunk on the worker; poll() only ever reads the latest count
+        self.written = written
+
+    def poll(self):
+        try:
+            written, error = self.results.get_nowait()
+        except queue.Empty:
+            if self.on_progress:
+                self.on_progress(self.written)
+            self.widget.after(self.poll_interval, self.poll)
+            return
+
+        self.thread.join()
+        self.thread = None
+        self.trace.finish(error=str(error) if error is not None else None)
+        self.trace = NULL_TRACE
+        self.on_done(self.path, written, error)
@@ -0,0 +1,119 @@
+"""
+History Panel
+Searchable list of previously generated contexts, shown as a builder tab
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+from context_engine import iter_prepared
+from render_plan import REFERENCE_ONLY
+
+SEARCH_DELAY = 200   # ms of typing pause before the search runs
+RESULT_LIMIT = 200
+
+
+def record_preview(store, template, live_preview, xml=False, texts=None):
+    """Save the previewed context; it is rendered and compressed on the store's writer thread.
+
+    texts may hold the section texts the preview has just rendered from its values, which
+    are then saved as they are instead of being rendered again.
+    """
+    if texts is not None:
+        fields = {name: value for name, value in live_preview.values.items() if not name.startswith("@")}
+        store.save_async(template, fields, iter(texts), xml)
+        return
+    values = live_preview.export_values()
+    fields = {name: value for name, value in values.items() if not name.startswith("@")}
+    # Attachments are saved as references; their files are read again when the entry is reused
+    values[REFERENCE_ONLY] = True
+    store.save_async(template, fields, iter_prepared(live_preview.plan, values), xml)
+
+
+class HistoryPanel:
+    """Search box, result list and actions over a HistoryStore, limited to one builder's templates.
+
+    on_load(entry) is called with a HistoryEntry (fields included) to clone it into the form.
+    """
+
+    def __init__(self, parent, store, templates, on_load, delay=SEARCH_DELAY):
+        self.store = store
+        self.templates = list(templates)
+        self.on_load = on_load
+        self.delay = delay
+        self.after_id = None
+
+        search_frame = ttk.Frame(parent)
+        search_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
+        self.query_var = tk.StringVar()
+        entry = ttk.Entry(search_frame, textvariable=self.query_var)
+        entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        entry.bind("<KeyRelease>", self.query_changed)
+        self.count_var = tk.StringVar()
+        ttk.Label(search_frame, textvariable=self.count_var).pack(side=tk.LEFT, padx=5)
+
+        list_frame = ttk.Frame(parent)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.tree = ttk.Treeview(list_frame, columns=("when", "template", "title"), show="headings",
+                                 selectmode="browse")
+        for column, heading, width in (("when", "Created", 130), ("template", "Template", 140),
+                                       ("title", "Title", 420)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, stretch=(column == "title"))
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Double-1>", lambda e: self.load_selected())
+
+        button_frame = ttk.Frame(parent)
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="Load into Form", command=self.load_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Copy Context", command=self.copy_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Delete", command=self.delete_selected).pack(side=tk.LEFT, padx=5)
+
+        # Results are refreshed whenever the tab is shown, so new renders appear without polling
+        parent.bind("<Map>", lambda e: self.refresh(), add="+")
+
+    def query_changed(self, event=None):
+        if self.after_id is not None:
+            self.tree.after_cancel(self.after_id)
+        self.after_id = self.tree.after(self.delay, self.refresh)
+
+    def refresh(self):
+        self.after_id = None
+        entries = self.store.search(self.query_var.get(), self.templates, RESULT_LIMIT)
+        self.tree.delete(*self.tree.get_children())
+        for entry in entries:
+            template = entry.template.replace('_', ' ').title() + (" (XML)" if entry.xml else "")
+            self.tree.insert("", tk.END, iid=str(entry.id), values=(entry.when, template, entry.title))
+        self.count_var.set(f"{len(entries)} found")
+
+    def selected_id(self):
+        selection = self.tree.selection()
+        return int(selection[0]) if selection else None
+
+    def load_selected(self):
+        entry_id = self.selected_id()
+        entry = self.store.get(entry_id) if entry_id is not None else None
+        if entry is not None:
+            self.on_load(entry)
+
+    def copy_selected(self):
+        from tkinter import messagebox
+        entry_id = self.selected_id()
+        body = self.store.body(entry_id) if entry_id is not None else None
+        if body is None:
+            return
+        self.tree.clipboard_clear()
+        self.tree.clipboard_append(body)
+        messagebox.showinfo("Success", "Context copied to clipboard!")
+
+    def delete_selected(self):
+        from tkinter import messagebox
+        entry_id = self.selected_id()
+        if entry_id is None or not messagebox.askyesno("Delete", "Delete this context from history?"):
+            return
+        self.store.delete(entry_id)
+        self.refresh()
@@ -0,0 +1,233 @@
+"""
+History Store
+Local SQLite history of generated contexts with full-text search and retention
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from functools import lru_cache
+
+from ingest_cache import content_hash
+
+DEFAULT_MAX_ENTRIES = 2000     # newest contexts kept
+DEFAULT_MAX_AGE_DAYS = 180     # older contexts are dropped
+HISTORY_ENV = "CONTEXT_BUILDER_HISTORY"
+
+# The first of these a context has becomes its title in search results
+TITLE_FIELDS = ("Project Name", "MCP Server Name", "Bug Title", "Feature Name")
+
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+CREATE TABLE IF NOT EXISTS contexts (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    template TEXT NOT NULL,
+    xml INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    body BLOB NOT NULL,
+    digest TEXT NOT NULL UNIQUE
+);
+CREATE INDEX IF NOT EXISTS contexts_created ON contexts (created);
+CREATE VIRTUAL TABLE IF NOT EXISTS contexts_fts USING fts5(title, template, content, tokenize='unicode61');
+"""
+
+STOP = object()
+
+
+class HistoryEntry:
+    """One saved context; the body stays compressed in the store until asked for."""
+
+    def __init__(self, id, created, template, xml, title, fields=None):
+        self.id = id
+        self.created = created
+        self.template = template
+        self.xml = bool(xml)
+        self.title = title
+        self.fields = fields
+
+    @property
+    def when(self):
+        return time.strftime("%Y-%m-%d %H:%M", time.localtime(self.created))
+
+
+def entry_title(template, fields):
+    for name in TITLE_FIELDS:
+        if fields.get(name):
+            return fields[name].strip().split("\n")[0][:120]
+    return template.replace('_', ' ').title()
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    words = [word.replace('"', '""') for word in text.split()]
+    return " AND ".join(f'"{word}"*' for word in words)
+
+
+class HistoryStore:
+    """Saved contexts keyed by (template, xml, field values).
+
+    Saving the same inputs again refreshes the existing entry instead of adding a near
+    duplicate. Bodies are zlib-compressed, field values are indexed with FTS5, and
+    entries beyond max_entries or older than max_age_days are pruned on save.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.queue = None
+        self.thread = None
+
+    # --- Writing ---
+
+    def save(self, template, fields, chunks, xml=False):
+        """Save a rendered context; chunks are compressed as they are consumed. Returns its id."""
+        compressor = zlib.compressobj(6)
+        body = b"".join(compressor.compress(chunk.encode('utf-8')) for chunk in chunks) + compressor.flush()
+        fields_json = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+        digest = content_hash(f"{template}\0{int(xml)}\0{fields_json}".encode('utf-8'))
+        title = entry_title(template, fields)
+        searchable = "\n".join(str(value) for value in fields.values())
+        now = time.time()
+
+        with self.lock, self.db:
+            row = self.db.execute("SELECT id FROM contexts WHERE digest = ?", (digest,)).fetchone()
+            if row is not None:
+                entry_id = row[0]
+                self.db.execute("UPDATE contexts SET created = ?, body = ? WHERE id = ?", (now, body, entry_id))
+            else:
+                entry_id = self.db.execute(
+                    "INSERT INTO contexts (created, template, xml, title, fields, body, digest) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (now, template, int(bool(xml)), title, fields_json, body, digest)).lastrowid
+                self.db.execute("INSERT INTO contexts_fts (rowid, title, template, content) VALUES (?, ?, ?, ?)",
+                                (entry_id, title, template.replace('_', ' '), searchable))
+            self.prune(now)
+        return entry_id
+
+    def save_async(self, template, fields, chunks, xml=False, on_saved=None):
+        """Queue a save for the writer thread; rendering and compression happen there too."""
+        if self.thread is None:
+            self.queue = queue.Queue()
+            self.thread = threading.Thread(target=self.run, name="context-history", daemon=True)
+            self.thread.start()
+        self.queue.put((template, fields, chunks, xml, on_saved))
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            try:
+                if job is STOP:
+                    return
+                template, fields, chunks, xml, on_saved = job
+                try:
+                    entry_id = self.save(template, fields, chunks, xml)
+                except Exception:
+                    # History is best effort; a failed save must never disturb the builder
+                    continue
+                if on_saved:
+                    on_saved(entry_id)
+            finally:
+                self.queue.task_done()
+
+    def wait(self):
+        """Block until every queued save has been written."""
+        if self.thread is not None:
+            self.queue.join()
+
+    def prune(self, now):
+        # Caller holds the lock inside a transaction
+        doomed = self.db.execute("SELECT id FROM contexts WHERE created < ?",
+                                 (now - self.max_age_days * 86400,)).fetchall()
+        doomed += self.db.execute("SELECT id FROM contexts ORDER BY created DESC LIMIT -1 OFFSET ?",
+                                  (self.max_entries,)).fetchall()
+        if doomed:
+            self.db.executemany("DELETE FROM contexts WHERE id = ?", doomed)
+            self.db.executemany("DELETE FROM contexts_fts WHERE rowid = ?", doomed)
+
+    def delete(self, entry_id):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM contexts WHERE id = ?", (entry_id,))
+            self.db.execute("DELETE FROM contexts_fts WHERE rowid = ?", (entry_id,))
+
+    # --- Reading ---
+
+    def search(self, text="", templates=None, limit=100):
+        """Return entries matching every word of text (newest first when text is empty)."""
+        clauses = []
+        params = []
+        if text.strip():
+            source = "contexts_fts f JOIN contexts c ON c.id = f.rowid"
+            clauses.append("contexts_fts MATCH ?")
+            params.append(fts_query(text))
+            order = "f.rank, c.created DESC"
+        else:
+            source = "contexts c"
+            order = "c.created DESC"
+        if templates:
+            clauses.append(f"c.template IN ({','.join('?' * len(templates))})")
+            params.extend(templates)
+
+        sql = f"SELECT c.id, c.created, c.template, c.xml, c.title FROM {source}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order} LIMIT ?"
+        with self.lock:
+            try:
+                rows = self.db.execute(sql, (*params, limit)).fetchall()
+            except sqlite3.OperationalError:
+                # Text FTS5 cannot parse, e.g. a lone quote
+                return []
+        return [HistoryEntry(*row) for row in rows]
+
+    def get(self, entry_id):
+        """Return the entry with its field values, or None."""
+        with self.lock:
+            row = self.db.execute("SELECT id, created, template, xml, title, fields FROM contexts WHERE id = ?",
+                                  (entry_id,)).fetchone()
+        if row is None:
+            return None
+        return HistoryEntry(*row[:5], fields=json.loads(row[5]))
+
+    def body(self, entry_id):
+        with self.lock:
+            row = self.db.execute("SELECT body FROM contexts WHERE id = ?", (entry_id,)).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(STOP)
+            self.thread.join()
+            self.thread = None
+        self.db.close()
+
+
+def default_history_path():
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "context_builder", "history.sqlite3")
+
+
+@lru_cache(maxsize=None)
+def default_store():
+    """Return the shared history store, or None when disabled or unavailable.
+
+    Set CONTEXT_BUILDER_HISTORY to a file path to move it, or to "off" to disable it.
+    """
+    path = os.environ.get(HISTORY_ENV) or default_history_path()
+    if path.lower() in ("0", "off", "none"):
+        return None
+    try:
+        return HistoryStore(path)
+    except (OSError, sqlite3.Error):
+        return None
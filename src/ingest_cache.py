@@ -0,0 +1,169 @@
+"""
+Ingest Cache
+Persistent, content-addressed cache of processed source files for repository ingestion
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+DEFAULT_MAX_BYTES = 512 << 20   # cached text kept before least-recently-used entries are evicted
+FLUSH_BYTES = 16 << 20          # pending writes held in memory before they are committed
+CACHE_ENV = "CONTEXT_BUILDER_INGEST_CACHE"
+
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    text TEXT,
+    skipped TEXT,
+    bytes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs (last_used);
+"""
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class IngestCache:
+    """Maps (path, size, mtime) to a content hash, and content hashes to processed output.
+
+    A stat match skips reading the file entirely; a content-hash match (e.g. after a checkout
+    rewrote mtimes) skips processing it. Safe to share between reader threads.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.pending_files = {}
+        self.pending_blobs = {}
+        self.pending_bytes = 0
+        self.touched = {}
+
+    def snapshot(self, root):
+        """Return {path: (size, mtime_ns, hash)} for every cached file under root, in one query."""
+        root = os.path.join(os.path.abspath(root), "")
+        # Paths under root sort between root + sep and the next character after sep
+        upper = root[:-1] + chr(ord(root[-1]) + 1)
+        with self.lock:
+            rows = self.db.execute("SELECT path, size, mtime_ns, hash FROM files WHERE path >= ? AND path < ?",
+                                   (root, upper)).fetchall()
+        return {path: (size, mtime_ns, digest) for path, size, mtime_ns, digest in rows}
+
+    def load_blobs(self, digests):
+        """Return {hash: (text, skipped)} for the cached digests among digests."""
+        found = {}
+        digests = list(digests)
+        with self.lock:
+            for start in range(0, len(digests), 500):
+                chunk = digests[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for digest, text, skipped in self.db.execute(
+                        f"SELECT hash, text, skipped FROM blobs WHERE hash IN ({placeholders})", chunk):
+                    found[digest] = (text, skipped)
+            now = time.time()
+            for digest in found:
+                self.touched[digest] = now
+        return found
+
+    def lookup_hash(self, path, size, mtime_ns, digest):
+        """Return (text, skipped) for content already processed under any path, or None."""
+        with self.lock:
+            cached = self.pending_blobs.get(digest)
+            if cached is None:
+                cached = self.db.execute("SELECT text, skipped FROM blobs WHERE hash = ?", (digest,)).fetchone()
+                if cached is None:
+                    return None
+                self.touched[digest] = time.time()
+            self.pending_files[path] = (size, mtime_ns, digest)
+            return cached[:2]
+
+    def store(self, path, size, mtime_ns, digest, text, skipped):
+        nbytes = len(text) if text else 0
+        with self.lock:
+            self.pending_files[path] = (size, mtime_ns, digest)
+            self.pending_blobs[digest] = (text, skipped, nbytes)
+            self.pending_bytes += nbytes
+            if self.pending_bytes >= FLUSH_BYTES:
+                self.commit()
+
+    def flush(self):
+        with self.lock:
+            self.commit()
+
+    def commit(self):
+        # Caller holds the lock
+        if not (self.pending_files or self.pending_blobs or self.touched):
+            return
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO blobs (hash, text, skipped, bytes, last_used) VALUES (?, ?, ?, ?, ?)",
+                [(digest, text, skipped, nbytes, now) for digest, (text, skipped, nbytes) in self.pending_blobs.items()])
+            self.db.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                [(path, size, mtime_ns, digest) for path, (size, mtime_ns, digest) in self.pending_files.items()])
+            self.db.executemany("UPDATE blobs SET last_used = ? WHERE hash = ?",
+                                [(used, digest) for digest, used in self.touched.items()])
+            self.evict()
+        self.pending_files.clear()
+        self.pending_blobs.clear()
+        self.pending_bytes = 0
+        self.touched.clear()
+
+    def evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(bytes), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used content until well under the limit, then any paths pointing at it
+        target = self.max_bytes * 0.9
+        doomed = []
+        for digest, nbytes in self.db.execute("SELECT hash, bytes FROM blobs ORDER BY last_used"):
+            if total <= target:
+                break
+            doomed.append((digest,))
+            total -= nbytes
+        self.db.executemany("DELETE FROM blobs WHERE hash = ?", doomed)
+        self.db.execute("DELETE FROM files WHERE hash NOT IN (SELECT hash FROM blobs)")
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+
+def default_cache_path():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "context_builder", "ingest.sqlite3")
+
+
+@lru_cache(maxsize=None)
+def default_cache():
+    """Return the shared on-disk cache, or None when disabled or unavailable.
+
+    Set CONTEXT_BUILDER_INGEST_CACHE to a file path to move it, or to "off" to disable it.
+    """
+    path = os.environ.get(CACHE_ENV) or default_cache_path()
+    if path.lower() in ("0", "off", "none"):
+        return None
+    try:
+        return IngestCache(path)
+    except (OSError, sqlite3.Error):
+        return None
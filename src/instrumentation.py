@@ -0,0 +1,213 @@
+"""
+Instrumentation
+Per-stage durations and sizes of generate and export operations, free when disabled
+"""
+
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+TRACE_ENV = "CONTEXT_BUILDER_TRACE"
+
+
+class Stage:
+    """Times a with-block as one stage of a trace; set size to the characters it handled."""
+
+    __slots__ = ("trace", "name", "size", "start")
+
+    def __init__(self, trace, name, size=None):
+        self.trace = trace
+        self.name = name
+        self.size = size
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, time.perf_counter() - self.start, self.size)
+        return False
+
+
+class Trace:
+    """Stages of one generate or export, in the order they were recorded.
+
+    Stages may be added from any thread; the trace is finished once, on the thread that
+    completes the operation. Repeated stage names are summed, so a stage done in many
+    small steps (e.g. widget inserts) reports its total.
+    """
+
+    enabled = True
+
+    def __init__(self, recorder, operation, **info):
+        self.recorder = recorder
+        self.operation = operation
+        self.info = info
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.total = None
+
+    def stage(self, name, size=None):
+        return Stage(self, name, size)
+
+    def add(self, name, seconds, size=None):
+        with self.lock:
+            previous = self.stages.get(name)
+            if previous is not None:
+                seconds += previous[0]
+                if previous[1] is not None:
+                    size = previous[1] + (size or 0)
+            self.stages[name] = (seconds, size)
+
+    def seconds(self, name):
+        with self.lock:
+            return self.stages.get(name, (0.0, None))[0]
+
+    def finish(self, **info):
+        self.total = time.perf_counter() - self.start
+        self.info.update(info)
+        self.recorder.finish(self)
+
+    def to_dict(self):
+        return {"operation": self.operation, "started": self.started, "total_ms": round(self.total * 1000, 3),
+                "stages": [{"name": name, "ms": round(seconds * 1000, 3), "chars": size}
+                           for name, (seconds, size) in self.stages.items()],
+                **self.info}
+
+    def summary(self):
+        """One line for a status bar, e.g. "export 41 ms: form read 2 ms · render 30 ms (1.2M chars) · ..."."""
+        parts = []
+        for name, (seconds, size) in self.stages.items():
+            part = f"{name} {seconds * 1000:.0f} ms"
+            if size:
+                part += f" ({format_count(size)} chars)"
+            parts.append(part)
+        return f"{self.operation} {self.total * 1000:.0f} ms: " + " · ".join(parts)
+
+
+def format_count(count):
+    for unit, scale in (("G", 10**9), ("M", 10**6), ("k", 10**3)):
+        if count >= scale:
+            return f"{count / scale:.1f}{unit}"
+    return str(count)
+
+
+class NullStage:
+    __slots__ = ("size",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullTrace:
+    """Stands in for a Trace when instrumentation is off; every call is a no-op."""
+
+    enabled = False
+
+    def stage(self, name, size=None):
+        return NullStage()
+
+    def add(self, name, seconds, size=None):
+        pass
+
+    def seconds(self, name):
+        return 0.0
+
+    def finish(self, **info):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+class NullRecorder:
+    enabled = False
+
+    def begin(self, operation, **info):
+        return NULL_TRACE
+
+    def subscribe(self, listener):
+        pass
+
+
+class Recorder:
+    """Hands finished traces to listeners and, with a log path, appends them as JSON lines."""
+
+    enabled = True
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self.listeners = []
+        self.lock = threading.Lock()
+        if log_path:
+            directory = os.path.dirname(log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def begin(self, operation, **info):
+        return Trace(self, operation, **info)
+
+    def subscribe(self, listener):
+        """Call listener(trace) for every finished trace, on the thread that finished it."""
+        self.listeners.append(listener)
+
+    def finish(self, trace):
+        if self.log_path:
+            line = json.dumps(trace.to_dict(), ensure_ascii=False) + "\n"
+            try:
+                with self.lock, open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            except OSError:
+                pass
+        for listener in self.listeners:
+            listener(trace)
+
+
+def iter_timed(chunks, trace, name):
+    """Yield chunks, adding the time spent producing them and their size to one stage of trace."""
+    if not trace.enabled:
+        return chunks
+    return timed_chunks(iter(chunks), trace, name)
+
+
+def timed_chunks(chunks, trace, name):
+    seconds = 0.0
+    size = 0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                seconds += time.perf_counter() - start
+                return
+            seconds += time.perf_counter() - start
+            size += len(chunk)
+            yield chunk
+    finally:
+        trace.add(name, seconds, size)
+
+
+@lru_cache(maxsize=None)
+def default_recorder():
+    """Return the shared recorder; a NullRecorder unless CONTEXT_BUILDER_TRACE is set.
+
+    "on" shows stage timings in the builders' status bar; a file path also appends every
+    trace to that file as a JSON line.
+    """
+    setting = os.environ.get(TRACE_ENV, "")
+    if setting.lower() in ("", "0", "off", "none"):
+        return NullRecorder()
+    if setting.lower() in ("1", "on"):
+        return Recorder()
+    try:
+        return Recorder(setting)
+    except OSError:
+        return Recorder()
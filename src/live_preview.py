@@ -0,0 +1,280 @@
+"""
+Live Preview
+Keeps a preview Text widget in sync with a form, re-rendering only changed sections
+"""
+
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from instrumentation import NULL_TRACE, iter_timed
+from render_plan import REFERENCE_ONLY
+
+MARK_PREFIX = "live_section_"
+POLL_INTERVAL = 10      # ms between drains of the render queue
+FRAME_BUDGET = 0.008    # seconds of widget inserts per drain, so the loop keeps up with 60 fps
+INSERT_CHUNK = 1 << 16  # characters per Text insert
+
+
+class LivePreview:
+    """Renders a plan into a Text widget with one mark per section and patches sections in place.
+
+    Full renders build section text on a worker thread; the Tk loop drains the results a
+    frame's worth at a time, so large inputs never block the window.
+    """
+
+    def __init__(self, text_widget, read_field, delay=300, on_busy=None, cache=None):
+        self.text = text_widget
+        self.read_field = read_field
+        self.delay = delay
+        self.on_busy = on_busy
+        self.cache = cache      # context_engine.RenderCache reused by repeated full renders
+        self.enabled = False
+        self.plan = ()
+        self.values = {}
+        self.dirty = set()
+        self.after_id = None
+        self.generation = 0
+        self.pending = None     # (queue, generation) of the render being drained
+        self.partial = None     # (section index, text, offset) of a section being inserted
+        self.trace = NULL_TRACE  # instrumentation.Trace of the render being drained
+        self.on_done = None     # called with the section texts once the render is drained
+        self.texts = None       # section texts drained so far, kept only for on_done
+
+    def mark(self, index):
+        return f"{MARK_PREFIX}{index}"
+
+    @property
+    def rendering(self):
+        return self.pending is not None
+
+    def render(self, plan, values, trace=NULL_TRACE, on_done=None):
+        """Render the whole plan in the background, remembering where each section starts.
+
+        on_done(texts) is called with the rendered section texts once they are all in the
+        widget. A newer render supersedes one still in progress; its trace is never finished
+        and its on_done never called.
+        """
+        self.cancel()
+        self.plan = plan
+        self.values = dict(values)
+        # Attached files are shown as placeholders so the widget never holds their contents
+        self.values[REFERENCE_ONLY] = True
+        self.dirty.clear()
+
+        for name in self.text.mark_names():
+            if name.startswith(MARK_PREFIX):
+                self.text.mark_unset(name)
+        with trace.stage("clear"):
+            self.text.delete("1.0", tk.END)
+
+        self.generation += 1
+        results = queue.Queue()
+        self.pending = (results, self.generation)
+        self.partial = None
+        self.trace = trace
+        self.on_done = on_done
+        self.texts = [] if on_done is not None else None
+        threading.Thread(target=self.render_worker, args=(plan, self.values, results, self.generation, trace),
+                         name="context-render", daemon=True).start()
+        if self.on_busy:
+            self.on_busy(True)
+        self.text.after(POLL_INTERVAL, self.drain, self.generation)
+
+    def render_worker(self, plan, values, results, generation, trace=NULL_TRACE):
+        if self.cache is not None:
+            texts = self.cache.iter_sections(plan, values)
+        else:
+            texts = (section.render(values) for section in plan)
+        texts = iter_timed(texts, trace, "render")
+        index = 0
+        try:
+            for index, text in enumerate(texts):
+                if generation != self.generation:
+                    return
+                results.put((index, text))
+        except Exception as e:
+            # Re-raised on the Tk thread, where callback errors are reported
+            results.put((index, e))
+            return
+        results.put((len(plan), None))
+
+    def drain(self, generation):
+        if self.pending is None or self.pending[1] != generation:
+            return
+        results = self.pending[0]
+        deadline = time.perf_counter() + FRAME_BUDGET
+        while time.perf_counter() < deadline:
+            if self.partial is None:
+                try:
+                    index, text = results.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(text, Exception):
+                    self.on_done = None
+                    self.finish_render()
+                    raise text
+                self.text.mark_set(self.mark(index), "end-1c")
+                if text is None:
+                    self.text.mark_gravity(self.mark(index), tk.RIGHT)
+                    self.finish_render()
+                    return
+                self.text.mark_gravity(self.mark(index), tk.LEFT)
+                self.partial = (index, text, 0)
+                if self.texts is not None:
+                    self.texts.append(text)
+
+            index, text, offset = self.partial
+            piece = text[offset:offset + INSERT_CHUNK]
+            if self.trace.enabled:
+                with self.trace.stage("insert", len(piece)):
+                    self.text.insert(tk.END, piece)
+            else:
+                self.text.insert(tk.END, piece)
+            offset += INSERT_CHUNK
+            self.partial = (index, text, offset) if offset < len(text) else None
+        self.text.after(POLL_INTERVAL, self.drain, generation)
+
+    def finish_render(self):
+        self.pending = None
+        self.partial = None
+        self.trace.finish(sections=len(self.plan))
+        self.trace = NULL_TRACE
+        on_done, texts = self.on_done, self.texts
+        self.on_done = self.texts = None
+        if self.on_busy:
+            self.on_busy(False)
+        if on_done is not None:
+            on_done(texts)
+        # Edits made while rendering are patched in now
+        if self.dirty:
+            self.flush()
+
+    def field_changed(self, field_name):
+        """Queue a field for re-rendering once typing pauses."""
+        if not self.enabled or not self.plan:
+            return
+        self.dirty.add(field_name)
+        if self.after_id is not None:
+            self.text.after_cancel(self.after_id)
+        self.after_id = self.text.after(self.delay, self.flush)
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.text.after_cancel(self.after_id)
+            self.after_id = None
+
+    def read_dirty(self, values):
+        """Fold the queued fields' current values into values; return the names that changed."""
+        return self.read_fields(values, self.dirty)
+
+    def read_fields(self, values, field_names):
+        """Fold the named fields' current values into values; return the names that changed.
+
+        read_field returns None for a field the form no longer shows, which is left as it was.
+        """
+        changed = set()
+        for field_name in field_names:
+            value = self.read_field(field_name)
+            if value is None:
+                continue
+            if value != values.get(field_name, ""):
+                changed.add(field_name)
+                if value:
+                    values[field_name] = value
+                else:
+                    values.pop(field_name, None)
+        return changed
+
+    def flush(self):
+        self.after_id = None
+        if not self.dirty or self.rendering:
+            # A render in progress patches queued edits once it finishes
+            return
+
+        changed = self.read_dirty(self.values)
+        self.dirty.clear()
+
+        for index, section in enumerate(self.plan):
+            if changed.intersection(section.fields):
+                self.patch(index, section.render(self.values))
+
+    def export_values(self):
+        """Return the form's current values for the previewed plan, with attachments switched back to full contents.
+
+        Every field of the plan is read again, since edits are only tracked while live preview is on.
+        """
+        self.cancel()
+        self.flush()
+        values = dict(self.values)
+        # Read into a copy, which leaves the widget and a render in progress alone
+        self.read_fields(values, {name for section in self.plan for name in section.fields if not name.startswith("@")})
+        values.pop(REFERENCE_ONLY, None)
+        return values
+
+    def iter_export(self, dedupe=False):
+        """Yield the full context for the previewed plan, with attached files streamed from disk.
+
+        The form's current values are read now, on the calling thread; rendering happens as
+        chunks are consumed, so the iterator can be drained on a worker thread.
+        """
+        from context_engine import iter_prepared
+        return iter_prepared(self.plan, self.export_values(), dedupe=dedupe)
+
+    def measure(self, counter, on_done):
+        """Count the tokens of each section of the full export on a worker thread.
+
+        The form's current values are read now; attached files are read on the worker, and
+        on_done(usages) is called back on the Tk thread.
+        """
+        from token_budget import measure
+        plan, values = self.plan, self.export_values()
+        results = queue.Queue()
+
+        def work():
+            try:
+                results.put(measure(plan, values, counter))
+            except Exception as e:
+                # Re-raised on the Tk thread, where callback errors are reported
+                results.put(e)
+
+        def poll():
+            try:
+                usages = results.get_nowait()
+            except queue.Empty:
+                self.text.after(POLL_INTERVAL, poll)
+                return
+            if isinstance(usages, Exception):
+                raise usages
+            on_done(usages)
+
+        threading.Thread(target=work, name="token-report", daemon=True).start()
+        self.text.after(POLL_INTERVAL, poll)
+
+    def patch(self, index, content):
+        # Marks at the insertion point must stay before the new text for earlier
+        # sections and move after it for later ones, so set gravity per patch
+        for other in range(len(self.plan) + 1):
+            self.text.mark_gravity(self.mark(other), tk.LEFT if other <= index else tk.RIGHT)
+        self.text.delete(self.mark(index), self.mark(index + 1))
+        if content:
+            self.text.insert(self.mark(index), content)
+
+
+def watch_widget(widget, callback):
+    """Call callback() whenever the user edits a form widget."""
+    if isinstance(widget, tk.Text):
+        def on_modified(event):
+            if widget.edit_modified():
+                widget.edit_modified(False)
+                callback()
+        widget.bind("<<Modified>>", on_modified, add="+")
+        # Placeholder text may already have set the flag, which would swallow the first edit
+        widget.edit_modified(False)
+    elif isinstance(widget, ttk.Combobox):
+        widget.bind("<<ComboboxSelected>>", lambda e: callback(), add="+")
+    else:
+        for sequence in ("<KeyRelease>", "<<Paste>>", "<<Cut>>"):
+            widget.bind(sequence, lambda e: callback(), add="+")
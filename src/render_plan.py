@@ -0,0 +1,288 @@
+"""
+Render Plan
+Immutable section plans executed by the context renderers
+"""
+
+import os
+
+from attachments import parse_paths, iter_file_text, describe
+from xml_writer import escape_text, escape_attr
+
+# Format ops
+TEXT = "text"                  # static text, emitted as-is
+FORMAT = "format"              # label is a format string filled from several fields
+LINE = "line"                  # LABEL: value
+BLOCK = "block"                # LABEL:\nvalue\n\n
+XML_INLINE = "xml_inline"      # <label>value</label>, values are escaped in every XML op
+XML_TEXT = "xml_text"          # <label>\nvalue\n</label>
+XML_LIST = "xml_list"          # <label> with one <item> per line
+XML_REQUIREMENTS = "xml_requirements"  # <label> with one <requirement> per line
+XML_ATTR = "xml_attr"          # <tag attr="value"/>, label is "tag attr"
+XML_GROUP = "xml_group"        # <label> around children, emitted when any trigger field is set
+ATTACHMENTS = "attachments"    # LABEL: then each attached file or directory streamed between markers
+XML_ATTACHMENTS = "xml_attachments"  # <label> around a <file> or <repository> per attachment
+
+# When set in the render data, attachments render as one-line placeholders instead of file contents
+REFERENCE_ONLY = "@reference_only"
+
+
+def iter_lines(text):
+    """Yield the stripped, non-empty lines of text without splitting it into a list."""
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find('\n', start)
+        if end == -1:
+            end = length
+        line = text[start:end].strip()
+        if line:
+            yield line
+        start = end + 1
+
+
+def iter_xml_list(text, tag="item"):
+    first = True
+    for line in iter_lines(text or ""):
+        line = escape_text(line)
+        yield f"<{tag}>{line}</{tag}>" if first else f"\n<{tag}>{line}</{tag}>"
+        first = False
+
+
+def resolve(section, data):
+    """Return the value a section renders, or None when an optional field is empty."""
+    value = data.get(section.field)
+    if value:
+        return value
+    if section.required:
+        return section.default
+    return None
+
+
+def emit_text(section, data):
+    yield section.label
+
+
+def emit_format(section, data):
+    values = [data.get(field) or default for field, default in zip(section.field, section.default)]
+    if section.required or any(data.get(field) for field in section.field):
+        yield section.label.format(*values)
+
+
+def emit_line(section, data):
+    value = resolve(section, data)
+    if value is not None:
+        yield f"{section.label}: {value}\n"
+
+
+def emit_block(section, data):
+    value = resolve(section, data)
+    if value is not None:
+        # Field values are yielded as their own chunk so large pastes are never copied
+        yield f"{section.label}:\n"
+        yield value
+        yield "\n\n"
+
+
+def emit_xml_inline(section, data):
+    value = resolve(section, data)
+    if value is not None:
+        yield f"<{section.label}>{escape_text(value)}</{section.label}>\n"
+
+
+def emit_xml_text(section, data):
+    value = resolve(section, data)
+    if value is not None:
+        yield f"<{section.label}>\n"
+        yield escape_text(value)
+        yield f"\n</{section.label}>\n\n"
+
+
+def emit_xml_list(section, data, tag="item"):
+    value = resolve(section, data)
+    if value is not None:
+        yield f"<{section.label}>\n"
+        yield from iter_xml_list(value, tag)
+        yield f"\n</{section.label}>\n\n"
+
+
+def emit_xml_requirements(section, data):
+    return emit_xml_list(section, data, "requirement")
+
+
+def emit_xml_attr(section, data):
+    value = resolve(section, data)
+    if value is not None:
+        yield f"<{section.label}=\"{escape_attr(value)}\"/>\n"
+
+
+def emit_xml_group(section, data):
+    if any(data.get(field) for field in section.field):
+        yield f"<{section.label}>\n"
+        for child in section.children:
+            yield from child.emit(child, data)
+        yield f"</{section.label}>\n\n"
+
+
+def iter_file(path):
+    """Yield a file's text streamed from disk, always ending with a newline."""
+    last = "\n"
+    try:
+        for chunk in iter_file_text(path):
+            yield chunk
+            last = chunk
+    except OSError as e:
+        yield f"[could not read file: {e.strerror or e}]\n"
+        return
+    except ValueError as e:
+        yield f"[{e} omitted]\n"
+        return
+    if not last.endswith("\n"):
+        yield "\n"
+
+
+def ingest_directory(root):
+    """Return (file count, tree lines, ordered sources) for a directory attachment."""
+    # Ingest pulls in the thread pool, so it is only imported when a directory is attached
+    from ingest_cache import default_cache
+    from repo_ingest import ingest, iter_tree
+    relpaths, sources = ingest(root, cache=default_cache())
+    return len(relpaths), iter_tree(relpaths), sources
+
+
+def emit_attachments(section, data):
+    paths = parse_paths(data.get(section.field))
+    if not paths:
+        return
+    yield f"{section.label}:\n"
+    for path in paths:
+        if data.get(REFERENCE_ONLY):
+            yield describe(path) + "\n"
+        elif os.path.isdir(path):
+            count, tree, sources = ingest_directory(path)
+            yield f"--- DIRECTORY: {path} ({count} files) ---\nFILE TREE:\n"
+            for line in tree:
+                yield line + "\n"
+            yield "\n"
+            for source in sources:
+                if source.skipped == "binary":
+                    continue
+                yield f"--- FILE: {source.relpath} ---\n"
+                if source.text is None:
+                    yield f"[{source.skipped}, omitted]\n"
+                elif source.text:
+                    yield source.text
+                    if not source.text.endswith("\n"):
+                        yield "\n"
+                yield "--- END FILE ---\n"
+            yield "--- END DIRECTORY ---\n"
+        else:
+            yield f"--- FILE: {path} ---\n"
+            yield from iter_file(path)
+            yield "--- END FILE ---\n"
+    yield "\n"
+
+
+def emit_xml_attachments(section, data):
+    paths = parse_paths(data.get(section.field))
+    if not paths:
+        return
+    yield f"<{section.label}>\n"
+    for path in paths:
+        if data.get(REFERENCE_ONLY):
+            yield escape_text(describe(path)) + "\n"
+        elif os.path.isdir(path):
+            count, tree, sources = ingest_directory(path)
+            yield f"<repository path=\"{escape_attr(path)}\" files=\"{count}\">\n<file_tree>\n"
+            for line in tree:
+                yield escape_text(line) + "\n"
+            yield "</file_tree>\n"
+            for source in sources:
+                if source.skipped == "binary":
+                    continue
+                if source.text is None:
+                    yield f"<file path=\"{escape_attr(source.relpath)}\" omitted=\"{escape_attr(source.skipped)}\"/>\n"
+                    continue
+                yield f"<file path=\"{escape_attr(source.relpath)}\">\n"
+                if source.text:
+                    yield escape_text(source.text)
+                    if not source.text.endswith("\n"):
+                        yield "\n"
+                yield "</file>\n"
+            yield "</repository>\n"
+        else:
+            yield f"<file path=\"{escape_attr(path)}\">\n"
+            for chunk in iter_file(path):
+                yield escape_text(chunk)
+            yield "</file>\n"
+    yield f"</{section.label}>\n\n"
+
+
+EMITTERS = {
+    TEXT: emit_text,
+    FORMAT: emit_format,
+    LINE: emit_line,
+    BLOCK: emit_block,
+    XML_INLINE: emit_xml_inline,
+    XML_TEXT: emit_xml_text,
+    XML_LIST: emit_xml_list,
+    XML_REQUIREMENTS: emit_xml_requirements,
+    XML_ATTR: emit_xml_attr,
+    XML_GROUP: emit_xml_group,
+    ATTACHMENTS: emit_attachments,
+    XML_ATTACHMENTS: emit_xml_attachments,
+}
+
+
+class Section:
+    """One step of a render plan: a label, a format op and the field(s) it reads."""
+
+    __slots__ = ("op", "label", "field", "required", "default", "children", "fields", "emit")
+
+    def __init__(self, op, label, field=None, required=False, default=None, children=()):
+        if op not in EMITTERS:
+            raise ValueError(f"Unknown format op: {op}")
+        children = tuple(Section(*child) if isinstance(child, tuple) else child for child in children)
+        if isinstance(field, list):
+            field = tuple(field)
+        if isinstance(default, list):
+            default = tuple(default)
+
+        # Every field whose value can change this section's output
+        if field is None:
+            fields = ()
+        elif isinstance(field, tuple):
+            fields = field
+        else:
+            fields = (field,)
+        for child in children:
+            fields += tuple(f for f in child.fields if f not in fields)
+
+        for name, value in (("op", op), ("label", label), ("field", field), ("required", required),
+                            ("default", default), ("children", children), ("fields", fields),
+                            ("emit", EMITTERS[op])):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Render plan sections are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Render plan sections are immutable")
+
+    def __repr__(self):
+        return f"Section({self.op!r}, {self.label!r}, {self.field!r})"
+
+    def iter_chunks(self, data):
+        return self.emit(self, data)
+
+    def render(self, data):
+        return "".join(self.emit(self, data))
+
+
+def compile_plan(rows):
+    """Compile (op, label, field, required, default[, children]) rows into an immutable plan."""
+    return tuple(row if isinstance(row, Section) else Section(*row) for row in rows)
+
+
+def iter_plan(plan, data):
+    for section in plan:
+        yield from section.emit(section, data)
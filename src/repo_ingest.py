@@ -0,0 +1,258 @@
+"""
+Repository Ingest
+Walks a project directory honoring .gitignore and reads its source files in parallel
+"""
+
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from attachments import SNIFF_SIZE, format_size
+from ingest_cache import content_hash
+
+MAX_FILE_SIZE = 1 << 20     # larger files are listed but their contents are omitted
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+BATCH_SIZE = 64             # files read per thread pool task
+ALWAYS_IGNORED = {".git", ".hg", ".svn"}
+
+
+# --- .gitignore matching ---
+
+class IgnoreRule:
+    """One .gitignore pattern, matched against paths relative to the directory holding it."""
+
+    def __init__(self, regex, negate, dir_only, base):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+        self.base = base
+
+    def matches(self, relpath, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not relpath.startswith(self.base + "/"):
+                return False
+            relpath = relpath[len(self.base) + 1:]
+        return self.regex.fullmatch(relpath) is not None
+
+
+def translate_pattern(pattern):
+    """Translate a gitignore glob into a regex over '/'-separated paths."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            parts.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            parts.append(f"[{body}]")
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+
+def compile_rule(line, base):
+    line = line.rstrip("\n\r")
+    if not line.strip() or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    if line.startswith("\\"):
+        line = line[1:]
+    line = line.rstrip()
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the .gitignore's directory
+    regex = translate_pattern(line.lstrip("/"))
+    if "/" not in line:
+        regex = "(?:.*/)?" + regex
+    return IgnoreRule(re.compile(regex), negate, dir_only, base)
+
+
+def load_ignore_rules(directory, base):
+    try:
+        with open(os.path.join(directory, ".gitignore"), 'r', encoding='utf-8', errors='replace') as f:
+            lines = f.readlines()
+    except OSError:
+        return []
+    rules = [compile_rule(line, base) for line in lines]
+    return [rule for rule in rules if rule is not None]
+
+
+def is_ignored(rules, relpath, is_dir):
+    ignored = False
+    for rule in rules:
+        if rule.negate == ignored and rule.matches(relpath, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+# --- Walking and reading ---
+
+def walk_repository(root):
+    """Return the relative paths of every non-ignored file under root, depth-first in name order."""
+    files = []
+    stack = [("", load_ignore_rules(root, ""))]
+    while stack:
+        reldir, rules = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, reldir)) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            relpath = f"{reldir}/{entry.name}" if reldir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name not in ALWAYS_IGNORED and not is_ignored(rules, relpath, True):
+                    subdirs.append(relpath)
+            elif entry.is_file(follow_symlinks=False) and not is_ignored(rules, relpath, False):
+                files.append(relpath)
+
+        # Visited in reverse so the stack pops subdirectories in name order
+        for relpath in reversed(subdirs):
+            stack.append((relpath, rules + load_ignore_rules(os.path.join(root, relpath), relpath)))
+    files.sort(key=lambda relpath: relpath.split("/"))
+    return files
+
+
+class SourceFile:
+    """An ingested file: its text, or the reason its contents were skipped."""
+
+    def __init__(self, relpath, size, text=None, skipped=None):
+        self.relpath = relpath
+        self.size = size
+        self.text = text
+        self.skipped = skipped
+
+
+def process_source(relpath, size, data):
+    if b"\0" in data[:SNIFF_SIZE]:
+        return SourceFile(relpath, size, skipped="binary")
+    return SourceFile(relpath, size, text=data.decode('utf-8', errors='replace'))
+
+
+def read_source(root, relpath, max_file_size=MAX_FILE_SIZE, cache=None):
+    path = os.path.abspath(os.path.join(root, relpath))
+    try:
+        stat = os.stat(path)
+        size = stat.st_size
+        if size > max_file_size:
+            return SourceFile(relpath, size, skipped=f"larger than {format_size(max_file_size)}")
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return SourceFile(relpath, 0, skipped=e.strerror or str(e))
+
+    if cache is None:
+        return process_source(relpath, size, data)
+    digest = content_hash(data)
+    cached = cache.lookup_hash(path, size, stat.st_mtime_ns, digest)
+    if cached is not None:
+        return SourceFile(relpath, size, *cached)
+    source = process_source(relpath, size, data)
+    cache.store(path, size, stat.st_mtime_ns, digest, source.text, source.skipped)
+    return source
+
+
+def read_batch(root, relpaths, max_file_size, cache=None, known=None):
+    """Read a batch of files, serving the unchanged ones from the cache in a single query."""
+    if cache is None:
+        return [read_source(root, relpath, max_file_size) for relpath in relpaths]
+
+    hits = {}
+    for relpath in relpaths:
+        path = os.path.abspath(os.path.join(root, relpath))
+        entry = known.get(path)
+        if entry is None:
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if (stat.st_size, stat.st_mtime_ns) == entry[:2]:
+            hits[relpath] = entry
+    blobs = cache.load_blobs({entry[2] for entry in hits.values()})
+
+    sources = []
+    for relpath in relpaths:
+        entry = hits.get(relpath)
+        if entry is not None and entry[2] in blobs:
+            sources.append(SourceFile(relpath, entry[0], *blobs[entry[2]]))
+        else:
+            sources.append(read_source(root, relpath, max_file_size, cache))
+    return sources
+
+
+def iter_sources(root, relpaths, workers=DEFAULT_WORKERS, max_file_size=MAX_FILE_SIZE, batch_size=BATCH_SIZE,
+                 cache=None):
+    """Yield a SourceFile per path, in order, reading ahead on a thread pool.
+
+    Paths are handed out in batches so small files do not pay per-task overhead, and at
+    most a few batches per worker are held in memory at once. With a cache, unchanged files
+    are served from it without being read.
+    """
+    known = cache.snapshot(root) if cache is not None else None
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for start in range(0, len(relpaths), batch_size):
+                batch = relpaths[start:start + batch_size]
+                pending.append(pool.submit(read_batch, root, batch, max_file_size, cache, known))
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+    finally:
+        if cache is not None:
+            cache.flush()
+
+
+def iter_tree(relpaths):
+    """Yield an indented file tree, one line per directory and file."""
+    previous = []
+    for relpath in relpaths:
+        parts = relpath.split("/")
+        directories = parts[:-1]
+        common = 0
+        while common < min(len(previous), len(directories)) and previous[common] == directories[common]:
+            common += 1
+        for depth in range(common, len(directories)):
+            yield "  " * depth + directories[depth] + "/"
+        yield "  " * len(directories) + parts[-1]
+        previous = directories
+
+
+def ingest(root, workers=DEFAULT_WORKERS, max_file_size=MAX_FILE_SIZE, cache=None):
+    """Return (relpaths, sources) for a project directory; sources is a lazy ordered iterator."""
+    relpaths = walk_repository(root)
+    return relpaths, iter_sources(root, relpaths, workers, max_file_size, cache=cache)
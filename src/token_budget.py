@@ -0,0 +1,343 @@
+"""
+Token Budget
+Token estimation, per-section budgets and truncation policies for rendered contexts
+"""
+
+import re
+from functools import lru_cache
+
+from render_plan import (ATTACHMENTS, BLOCK, FORMAT, LINE, TEXT, XML_ATTACHMENTS, XML_ATTR, XML_GROUP, XML_INLINE,
+                         XML_LIST, XML_REQUIREMENTS, XML_TEXT)
+
+POLICIES = ("head", "tail", "middle")   # which part of an over-budget section is kept
+MIN_SECTION_TOKENS = 32                  # a section trimmed for the total budget keeps at least this much
+TEMPLATE_SECTION = "(template)"          # report name for static text and metadata
+
+XML_OPS = {XML_INLINE, XML_TEXT, XML_LIST, XML_REQUIREMENTS, XML_ATTR, XML_GROUP, XML_ATTACHMENTS}
+TAG_PATTERN = re.compile(r"<(/?)([^\s/>]+)[^>]*?(/?)>")
+
+
+# --- Counters ---
+
+class ApproxCounter:
+    """Fast estimate of roughly four characters per token, with no dependencies."""
+
+    name = "approx"
+    chars_per_token = 4
+
+    def count(self, text):
+        return (len(text) + self.chars_per_token - 1) // self.chars_per_token
+
+    def cut(self, text, tokens, from_end=False):
+        chars = tokens * self.chars_per_token
+        if chars <= 0:
+            return ""
+        return text[-chars:] if from_end else text[:chars]
+
+
+class TiktokenCounter:
+    """Exact counts from a locally installed tiktoken encoding."""
+
+    def __init__(self, encoding_name="cl100k_base"):
+        import tiktoken
+        self.name = f"tiktoken:{encoding_name}"
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(self, text):
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def cut(self, text, tokens, from_end=False):
+        if tokens <= 0:
+            return ""
+        encoded = self.encoding.encode(text, disallowed_special=())
+        return self.encoding.decode(encoded[-tokens:] if from_end else encoded[:tokens])
+
+
+@lru_cache(maxsize=None)
+def get_counter(name="auto"):
+    """Return a counter for "approx", "tiktoken[:encoding]" or "auto" (tiktoken when available)."""
+    if name == "approx":
+        return ApproxCounter()
+    if name == "auto":
+        try:
+            return TiktokenCounter()
+        except Exception:
+            # Not installed, or the encoding is not available offline
+            return ApproxCounter()
+    if name.startswith("tiktoken"):
+        _, _, encoding_name = name.partition(":")
+        try:
+            return TiktokenCounter(encoding_name or "cl100k_base")
+        except ImportError:
+            raise ValueError("tiktoken is not installed; use the approx counter instead")
+    raise ValueError(f"Unknown token counter: {name}")
+
+
+# --- Budgets ---
+
+class Budget:
+    """Token limits for a render: an overall limit plus optional per-section limits.
+
+    Sections are named by their field (e.g. "Existing Code"). When the total is over budget,
+    sections with the lowest priority are trimmed first, largest first within a priority.
+    """
+
+    def __init__(self, max_tokens=None, sections=None, priorities=None, policy="middle", policies=None,
+                 counter="auto"):
+        for name in [policy, *(policies or {}).values()]:
+            if name not in POLICIES:
+                raise ValueError(f"Unknown truncation policy: {name}")
+        self.max_tokens = max_tokens
+        self.sections = dict(sections or {})
+        self.priorities = dict(priorities or {})
+        self.policy = policy
+        self.policies = dict(policies or {})
+        self.counter_name = counter
+
+    @property
+    def counter(self):
+        return get_counter(self.counter_name)
+
+    def policy_for(self, name):
+        return self.policies.get(name, self.policy)
+
+
+class SectionUsage:
+    """Tokens one rendered section uses, before and after budgeting."""
+
+    def __init__(self, name, tokens, original=None, limit=None):
+        self.name = name
+        self.tokens = tokens
+        self.original = tokens if original is None else original
+        self.limit = limit
+
+    @property
+    def truncated(self):
+        return self.tokens < self.original
+
+
+def section_name(section):
+    """Return the name a section is budgeted and reported under, or None for static text."""
+    if section.op == TEXT:
+        return None
+    fields = [field for field in section.fields if not field.startswith("@")]
+    return " / ".join(fields) if fields else None
+
+
+def truncate(text, max_tokens, policy, counter, xml=False):
+    """Cut text down to about max_tokens, keeping the head, the tail or both ends.
+
+    With xml, cuts never split a tag or an entity, and elements left open or unopened by
+    the cut are closed or reopened around the marker, so the result stays well-formed.
+    """
+    original = counter.count(text)
+    if original <= max_tokens:
+        return text
+    marker = f"[... {original - max_tokens} tokens truncated ...]\n"
+    keep = max(max_tokens - counter.count(marker), 0)
+    while True:
+        result = cut_text(text, keep, policy, counter, marker, xml)
+        # Repaired tags cost a few tokens of their own
+        over = counter.count(result) - max_tokens
+        if over <= 0 or keep == 0:
+            return result
+        keep = max(keep - over, 0)
+
+
+def cut_text(text, keep, policy, counter, marker, xml):
+    head = tail = ""
+    if policy in ("head", "middle"):
+        head = counter.cut(text, keep - keep // 2 if policy == "middle" else keep)
+        if xml:
+            head = xml_safe_head(head)
+        # Prefer cutting at a line boundary when one is reasonably close
+        newline = head.rfind("\n")
+        if newline > len(head) // 2:
+            head = head[:newline + 1]
+        elif head:
+            head += "\n"
+    if policy in ("tail", "middle"):
+        tail = counter.cut(text, keep // 2 if policy == "middle" else keep, from_end=True)
+        if xml:
+            tail = xml_safe_tail(tail)
+        newline = tail.find("\n")
+        if 0 <= newline < len(tail) // 2:
+            tail = tail[newline + 1:]
+    if xml:
+        head, tail = balance_tags(head, tail)
+    return head + marker + tail
+
+
+def xml_safe_head(head):
+    """Drop a partial tag or entity from the end of head."""
+    for start, end in (("<", ">"), ("&", ";")):
+        index = head.rfind(start)
+        if index > head.rfind(end):
+            head = head[:index]
+    return head
+
+
+def xml_safe_tail(tail):
+    """Drop a partial tag or entity from the start of tail."""
+    for start, end in (("<", ">"), ("&", ";")):
+        index = tail.find(end)
+        if index >= 0 and not 0 <= tail.find(start) < index:
+            tail = tail[index + 1:]
+    return tail
+
+
+def balance_tags(head, tail):
+    """Close the elements head leaves open and reopen those tail closes, unless they pair up."""
+    opened = []
+    for match in TAG_PATTERN.finditer(head):
+        closing, name, empty = match.groups()
+        if empty:
+            continue
+        if not closing:
+            opened.append(name)
+        elif opened and opened[-1] == name:
+            opened.pop()
+    closed = []    # innermost first
+    depth = []
+    for match in TAG_PATTERN.finditer(tail):
+        closing, name, empty = match.groups()
+        if empty:
+            continue
+        if not closing:
+            depth.append(name)
+        elif depth and depth[-1] == name:
+            depth.pop()
+        else:
+            closed.append(name)
+
+    # The outermost elements opened in head and closed in tail need no repair
+    shared = 0
+    while (shared < min(len(opened), len(closed))
+           and opened[shared] == closed[len(closed) - 1 - shared]):
+        shared += 1
+    closers = "".join(f"</{name}>" for name in reversed(opened[shared:]))
+    openers = "".join(f"<{name}>" for name in reversed(closed[:len(closed) - shared]))
+    if closers:
+        head = head.rstrip("\n") + closers + "\n"
+    return head, openers + tail
+
+
+def measure(plan, values, counter=None):
+    """Return a SectionUsage per named section, counting rendered chunks as they stream."""
+    counter = counter or get_counter()
+    usages = {}
+    for section in plan:
+        name = section_name(section) or TEMPLATE_SECTION
+        tokens = sum(counter.count(chunk) for chunk in section.iter_chunks(values))
+        if name in usages:
+            usages[name].tokens += tokens
+            usages[name].original += tokens
+        else:
+            usages[name] = SectionUsage(name, tokens)
+    return list(usages.values())
+
+
+def section_frame(section):
+    """Return the (prefix, suffix) a section's op writes around its value(s)."""
+    label = section.label
+    if section.op == LINE:
+        return f"{label}: ", "\n"
+    if section.op in (BLOCK, ATTACHMENTS):
+        return f"{label}:\n", "\n\n" if section.op == BLOCK else "\n"
+    if section.op == FORMAT:
+        parts = label.split("{}")
+        return parts[0], parts[-1]
+    if section.op == XML_INLINE:
+        return f"<{label}>", f"</{label}>\n"
+    if section.op in (XML_TEXT, XML_LIST, XML_REQUIREMENTS):
+        return f"<{label}>\n", f"\n</{label}>\n\n"
+    if section.op in (XML_GROUP, XML_ATTACHMENTS):
+        return f"<{label}>\n", f"</{label}>\n\n"
+    if section.op == XML_ATTR:
+        return f"<{label}=\"", "\"/>\n"
+    return "", ""
+
+
+def split_section(section, text):
+    """Split rendered section text into (prefix, value, suffix); budgets only ever cut the value."""
+    prefix, suffix = section_frame(section)
+    if len(text) < len(prefix) + len(suffix) or not (text.startswith(prefix) and text.endswith(suffix)):
+        # e.g. rewritten by deduplication; the whole text is cut then
+        return "", text, ""
+    return prefix, text[len(prefix):len(text) - len(suffix)], suffix
+
+
+def apply_budget(plan, values, budget, texts=None):
+    """Render plan within budget; return (section texts, SectionUsage list).
+
+    texts may hold the already rendered sections, e.g. after deduplication. Limits count
+    and cut a section's value only; its label or tags and trailing separator are kept.
+    """
+    counter = budget.counter
+    texts = [section.render(values) for section in plan] if texts is None else list(texts)
+    names = [section_name(section) for section in plan]
+    counts = [counter.count(text) for text in texts]
+    originals = list(counts)
+    limits = [None] * len(plan)
+
+    def cut(index, limit):
+        """Cut a section's value to limit tokens; returns False when it already fits."""
+        prefix, value, suffix = split_section(plan[index], texts[index])
+        if counter.count(value) <= limit:
+            return False
+        value = truncate(value, limit, budget.policy_for(names[index]), counter, xml=plan[index].op in XML_OPS)
+        if value.endswith("\n") and suffix.startswith("\n"):
+            # The marker line already ends the value
+            value = value[:-1]
+        texts[index] = prefix + value + suffix
+        counts[index] = counter.count(texts[index])
+        limits[index] = limit if limits[index] is None else min(limits[index], limit)
+        return True
+
+    # Per-section limits first
+    for index, name in enumerate(names):
+        limit = budget.sections.get(name)
+        if limit is not None:
+            cut(index, limit)
+
+    # Then trim the least important sections until the whole context fits
+    if budget.max_tokens is not None:
+        excess = sum(counts) - budget.max_tokens
+        candidates = sorted((index for index, name in enumerate(names) if name is not None),
+                            key=lambda index: (budget.priorities.get(names[index], 0), -counts[index]))
+        for index in candidates:
+            if excess <= 0:
+                break
+            before = counts[index]
+            value_tokens = counter.count(split_section(plan[index], texts[index])[1])
+            if value_tokens <= MIN_SECTION_TOKENS:
+                continue
+            cut(index, max(value_tokens - excess, MIN_SECTION_TOKENS))
+            excess -= before - counts[index]
+
+    usages = {}
+    for index, name in enumerate(names):
+        name = name or TEMPLATE_SECTION
+        if name in usages:
+            usages[name].tokens += counts[index]
+            usages[name].original += originals[index]
+        else:
+            usages[name] = SectionUsage(name, counts[index], originals[index], limits[index])
+    return texts, list(usages.values())
+
+
+def format_report(usages, counter_name=None):
+    """Return a plain-text table of tokens per section."""
+    width = max([len(usage.name) for usage in usages] + [7])
+    lines = [f"{'Section':<{width}}  {'Tokens':>9}  {'Original':>9}"]
+    for usage in usages:
+        if not usage.original:
+            continue
+        note = "  truncated" if usage.truncated else ""
+        lines.append(f"{usage.name:<{width}}  {usage.tokens:>9,}  {usage.original:>9,}{note}")
+    total = sum(usage.tokens for usage in usages)
+    original = sum(usage.original for usage in usages)
+    lines.append(f"{'TOTAL':<{width}}  {total:>9,}  {original:>9,}")
+    if counter_name:
+        lines.append(f"(counted with {counter_name})")
+    return "\n".join(lines)
@@ -0,0 +1,94 @@
+"""
+Tooltip Manager
+One lazily-resolved tooltip per root window instead of a ToolTip object per widget
+"""
+
+import tkinter as tk
+
+
+class TooltipManager:
+    """Shows tooltips for registered widgets using a single Toplevel and one set of bindings.
+
+    Widgets register either a string or a callable returning the text; callables are
+    only evaluated when the pointer actually rests on the widget.
+    """
+
+    @classmethod
+    def for_root(cls, widget):
+        """Return the manager for widget's toplevel window, creating it on first use."""
+        root = widget.winfo_toplevel()
+        # Kept on the window itself: widget paths like "." repeat across Tk instances,
+        # and the manager goes away with its window
+        manager = getattr(root, "tooltip_manager", None)
+        if manager is None:
+            manager = root.tooltip_manager = cls(root)
+        return manager
+
+    def __init__(self, root, delay=500, wraplength=420):
+        self.root = root
+        self.delay = delay
+        self.wraplength = wraplength
+        self.sources = {}
+        self.window = None
+        self.label = None
+        self.after_id = None
+        self.current = None
+
+        # Every widget's bindtags include its toplevel, so these see all pointer traffic
+        root.bind("<Enter>", self.on_enter, add="+")
+        root.bind("<Leave>", self.on_leave, add="+")
+        root.bind("<ButtonPress>", self.on_leave, add="+")
+
+    def register(self, widget, text):
+        self.sources[str(widget)] = text
+
+    def unregister(self, widget):
+        self.sources.pop(str(widget), None)
+
+    def resolve(self, widget):
+        source = self.sources.get(str(widget))
+        if callable(source):
+            source = source()
+        return source or ""
+
+    def on_enter(self, event):
+        key = str(event.widget)
+        if key not in self.sources:
+            return
+        self.cancel()
+        self.current = key
+        self.after_id = self.root.after(self.delay, self.show, event.widget, event.x_root, event.y_root)
+
+    def on_leave(self, event):
+        self.cancel()
+        self.hide()
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def show(self, widget, x, y):
+        self.after_id = None
+        if str(widget) != self.current:
+            return
+        text = self.resolve(widget)
+        if not text:
+            return
+
+        if self.window is None:
+            self.window = tk.Toplevel(self.root)
+            self.window.wm_overrideredirect(True)
+            self.label = tk.Label(self.window, justify=tk.LEFT, background="#ffffe0",
+                                  relief=tk.SOLID, borderwidth=1, wraplength=self.wraplength,
+                                  padx=4, pady=2)
+            self.label.pack()
+        self.label.configure(text=text)
+        self.window.wm_geometry(f"+{x + 16}+{y + 12}")
+        self.window.deiconify()
+        self.window.lift()
+
+    def hide(self):
+        self.current = None
+        if self.window is not None:
+            self.window.withdraw()
@@ -0,0 +1,365 @@
+"""
+Virtual Form
+Canvas-backed form that only creates widgets for rows near the viewport
+"""
+
+import bisect
+import tkinter as tk
+from tkinter import ttk, scrolledtext, font as tkfont
+
+from attachments import parse_paths
+from live_preview import watch_widget
+from tooltip_manager import TooltipManager
+
+OVERSCAN = 200      # pixels of rows kept realized above and below the viewport
+ROW_PADX = 5
+ROW_PADY = 5
+
+
+class FormRow:
+    """A recyclable row: container, label and one input widget of a given kind."""
+
+    def __init__(self, kind, frame, label, widget):
+        self.kind = kind
+        self.frame = frame
+        self.label = label
+        self.widget = widget
+        self.field_name = None
+        self.item = None
+
+
+class VirtualForm:
+    """Scrollable form whose field values live in a model, with widgets recycled as rows scroll by.
+
+    style is "label" for a label above each input or "labelframe" for inputs inside a titled frame.
+    on_change(field_name) is called whenever the user edits a field.
+    """
+
+    def __init__(self, parent, style="label", on_change=None):
+        self.style = style
+        self.on_change = on_change
+
+        self.canvas = tk.Canvas(parent)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True, padx=5)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.bind("<Configure>", self.on_configure)
+        self.tooltips = TooltipManager.for_root(parent)
+
+        self.line_height = tkfont.nametofont("TkDefaultFont").metrics("linespace")
+        self.text_line_height = tkfont.nametofont("TkFixedFont").metrics("linespace")
+
+        # Per-form state, cached by form key
+        self.models = {}
+        self.layouts = {}
+
+        self.key = None
+        self.schema = {}
+        self.values = {}
+        self.names = []
+        self.tops = []
+        self.heights = []
+
+        self.realized = {}      # row index -> FormRow
+        self.rows_by_name = {}  # field name -> FormRow
+        self.pool = {"entry": [], "combo": [], "text": [], "attachment": []}
+        self.dirty = set()      # fields whose widget holds newer text than the model
+        self.loading = False
+        self.carried = []       # fields the last load carried over from the previous form
+
+    # --- Form switching ---
+
+    def load(self, key, schema):
+        """Show the form for key, keeping each form's values and carrying shared fields over."""
+        previous_schema = self.schema
+        previous_values = self.values
+        self.release_all()
+
+        self.key = key
+        self.schema = schema
+        self.values = self.models.setdefault(key, {})
+
+        # Fields shared with the previous form keep what the user typed there
+        self.carried = []
+        if previous_schema is not schema:
+            for name, config in schema.items():
+                previous = previous_schema.get(name)
+                if previous is not None and previous["type"] == config["type"]:
+                    value = previous_values.get(name, "")
+                    if value != self.values.get(name, ""):
+                        self.carried.append(name)
+                    self.values[name] = value
+
+        if key not in self.layouts:
+            self.layouts[key] = self.compute_layout(schema)
+        self.names, self.tops, self.heights, total_height = self.layouts[key]
+
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), total_height))
+        self.canvas.yview_moveto(0)
+        self.update_viewport()
+
+    def compute_layout(self, schema):
+        names = list(schema)
+        tops = []
+        heights = []
+        y = 0
+        for name in names:
+            height = self.row_height(schema[name])
+            tops.append(y + ROW_PADY)
+            heights.append(height)
+            y += height + 2 * ROW_PADY
+        return names, tops, heights, y
+
+    def row_height(self, config):
+        # Rows get a fixed height so the layout never has to be measured from live widgets
+        header = self.line_height + (8 if self.style == "labelframe" else 4)
+        padding = 14 if self.style == "labelframe" else 8
+        if config["type"] == "text":
+            body = config.get("height", 4) * self.text_line_height + 10
+        elif config["type"] == "attachment":
+            # The list sits beside a column of three buttons, so it is at least that tall
+            body = max(config.get("height", 3) * self.line_height, 3 * (self.line_height + 12)) + 10
+        else:
+            body = self.line_height + 10
+        return header + body + padding
+
+    # --- Viewport ---
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.update_viewport()
+
+    def on_configure(self, event):
+        width = self.row_width()
+        for row in self.realized.values():
+            self.canvas.itemconfigure(row.item, width=width)
+        if self.names:
+            self.canvas.configure(scrollregion=(0, 0, event.width, self.layouts[self.key][3]))
+        self.update_viewport()
+
+    def row_width(self):
+        return max(self.canvas.winfo_width() - 2 * ROW_PADX, 1)
+
+    def update_viewport(self):
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = max(bisect.bisect_right(self.tops, top - OVERSCAN) - 1, 0)
+        last = min(bisect.bisect_left(self.tops, bottom + OVERSCAN), len(self.names))
+        wanted = range(first, last)
+
+        for index in list(self.realized):
+            if index not in wanted:
+                self.release(index)
+        for index in wanted:
+            if index not in self.realized:
+                self.realize(index)
+
+    # --- Row recycling ---
+
+    def create_row(self, kind):
+        if self.style == "labelframe":
+            frame = ttk.LabelFrame(self.canvas)
+            label = frame
+            padx, pady = 10, 5
+        else:
+            frame = ttk.Frame(self.canvas)
+            label = ttk.Label(frame)
+            label.pack(anchor=tk.W)
+            padx, pady = 0, 2
+
+        if kind == "entry":
+            widget = ttk.Entry(frame)
+            widget.pack(fill=tk.X, padx=padx, pady=pady)
+        elif kind == "combo":
+            widget = ttk.Combobox(frame, state="readonly")
+            widget.pack(fill=tk.X, padx=padx, pady=pady)
+        elif kind == "attachment":
+            box = ttk.Frame(frame)
+            box.pack(fill=tk.BOTH, expand=True, padx=padx, pady=pady)
+            widget = tk.Listbox(box, selectmode=tk.EXTENDED)
+            widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            buttons = ttk.Frame(box)
+            buttons.pack(side=tk.RIGHT, fill=tk.Y, padx=(5, 0))
+            ttk.Button(buttons, text="Add Files...", command=lambda: self.add_files(row)).pack(fill=tk.X)
+            ttk.Button(buttons, text="Add Folder...", command=lambda: self.add_folder(row)).pack(fill=tk.X, pady=(4, 0))
+            ttk.Button(buttons, text="Remove", command=lambda: self.remove_files(row)).pack(fill=tk.X, pady=(4, 0))
+        else:
+            widget = scrolledtext.ScrolledText(frame, wrap=tk.WORD)
+            widget.pack(fill=tk.BOTH, expand=True, padx=padx, pady=pady)
+
+        row = FormRow(kind, frame, label, widget)
+        if kind != "attachment":
+            watch_widget(widget, lambda: self.edited(row))
+        # Tooltip text is looked up from whichever field the row shows when hovered
+        self.tooltips.register(widget, lambda: self.tooltip_for(row))
+        if label is not frame:
+            self.tooltips.register(label, lambda: self.tooltip_for(row))
+        if kind == "text":
+            widget.bind("<FocusIn>", lambda e: self.clear_placeholder(row), add="+")
+        return row
+
+    def realize(self, index):
+        name = self.names[index]
+        config = self.schema[name]
+        pool = self.pool[config["type"]]
+        row = pool.pop() if pool else self.create_row(config["type"])
+
+        row.field_name = name
+        label_text = name + (" *" if config.get("required") else "")
+        if self.style == "labelframe":
+            row.frame.configure(text=label_text)
+        else:
+            row.label.configure(text=label_text)
+        if row.kind == "combo":
+            row.widget.configure(values=config["values"])
+        elif row.kind == "text":
+            row.widget.configure(height=config.get("height", 4))
+        self.load_row(row)
+
+        row.item = self.canvas.create_window(ROW_PADX, self.tops[index], window=row.frame, anchor="nw",
+                                             width=self.row_width(), height=self.heights[index])
+        self.realized[index] = row
+        self.rows_by_name[name] = row
+
+    def release(self, index):
+        row = self.realized.pop(index)
+        self.sync(row)
+        self.canvas.delete(row.item)
+        del self.rows_by_name[row.field_name]
+        row.item = None
+        row.field_name = None
+        self.pool[row.kind].append(row)
+
+    def release_all(self):
+        for index in list(self.realized):
+            self.release(index)
+
+    # --- Model <-> widget ---
+
+    def load_row(self, row):
+        value = self.values.get(row.field_name, "")
+        widget = row.widget
+        self.loading = True
+        try:
+            if row.kind == "text":
+                widget.delete("1.0", tk.END)
+                widget.insert("1.0", value or self.schema[row.field_name].get("placeholder", ""))
+                widget.edit_modified(False)
+            elif row.kind == "combo":
+                widget.set(value)
+            elif row.kind == "attachment":
+                widget.delete(0, tk.END)
+                for path in parse_paths(value):
+                    widget.insert(tk.END, path)
+            else:
+                widget.delete(0, tk.END)
+                widget.insert(0, value)
+        finally:
+            self.loading = False
+
+    def read_row(self, row):
+        if row.kind == "attachment":
+            # Only paths are held here; contents are streamed from disk at render time
+            return "\n".join(row.widget.get(0, tk.END))
+        if row.kind != "text":
+            return row.widget.get()
+        value = row.widget.get("1.0", "end-1c")
+        if value.strip() == self.schema[row.field_name].get("placeholder"):
+            return ""
+        return value
+
+    def sync(self, row):
+        if row.field_name in self.dirty:
+            self.values[row.field_name] = self.read_row(row)
+            self.dirty.discard(row.field_name)
+
+    def edited(self, row):
+        if self.loading or row.field_name is None:
+            return
+        self.dirty.add(row.field_name)
+        if self.on_change:
+            self.on_change(row.field_name)
+
+    def tooltip_for(self, row):
+        if row.field_name is None:
+            return ""
+        return self.schema[row.field_name].get("tooltip", "")
+
+    def add_files(self, row):
+        from tkinter import filedialog
+        paths = filedialog.askopenfilenames(parent=self.canvas, title=f"Attach files to {row.field_name}")
+        self.attach(row, paths)
+
+    def add_folder(self, row):
+        from tkinter import filedialog
+        path = filedialog.askdirectory(parent=self.canvas, title=f"Attach a project folder to {row.field_name}")
+        if path:
+            self.attach(row, [path])
+
+    def attach(self, row, paths):
+        attached = set(row.widget.get(0, tk.END))
+        for path in paths:
+            if path not in attached:
+                row.widget.insert(tk.END, path)
+        if paths:
+            self.edited(row)
+
+    def remove_files(self, row):
+        selection = row.widget.curselection()
+        for index in reversed(selection):
+            row.widget.delete(index)
+        if selection:
+            self.edited(row)
+
+    def clear_placeholder(self, row):
+        placeholder = self.schema[row.field_name].get("placeholder")
+        if placeholder and row.widget.get("1.0", tk.END).strip() == placeholder:
+            row.widget.delete("1.0", tk.END)
+
+    # --- Public value API ---
+
+    def get(self, field_name):
+        row = self.rows_by_name.get(field_name)
+        if row is not None:
+            self.sync(row)
+        return self.values.get(field_name, "").strip()
+
+    def get_raw(self, field_name):
+        """Return a field's value exactly as typed, e.g. for saving it."""
+        row = self.rows_by_name.get(field_name)
+        if row is not None:
+            self.sync(row)
+        return self.values.get(field_name, "")
+
+    def get_values(self):
+        """Return the non-empty, stripped value of every field in the current form."""
+        for row in self.realized.values():
+            self.sync(row)
+        data = {}
+        for name in self.names:
+            value = self.values.get(name, "").strip()
+            if value:
+                data[name] = value
+        return data
+
+    def set(self, field_name, value):
+        self.values[field_name] = value
+        self.dirty.discard(field_name)
+        row = self.rows_by_name.get(field_name)
+        if row is not None:
+            self.load_row(row)
+
+    def restore(self, models, replace=False):
+        """Merge saved {form key: {field: value}} into the models, or replace those forms' values.
+
+        Values go straight into the model dicts; only the rows currently on screen are reloaded.
+        """
+        for key, values in models.items():
+            model = self.models.setdefault(key, {})
+            if replace:
+                model.clear()
+            model.update(values)
+        for row in self.realized.values():
+            self.dirty.discard(row.field_name)
+            self.load_row(row)
@@ -0,0 +1,80 @@
+"""
+XML Writer
+Escaping for XML text and attribute values, and streaming well-formedness checks
+"""
+
+import re
+from xml.parsers import expat
+
+# Order matters: "&" must be escaped before the entities that introduce it
+TEXT_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"))
+ATTR_ESCAPES = TEXT_ESCAPES + (('"', "&quot;"),)
+TEXT_SPECIAL = re.compile(r"[&<>]")
+ATTR_SPECIAL = re.compile(r"[&<>\"]")
+
+# Characters XML 1.0 does not allow at all, removed with a precomputed translate table
+INVALID_CHARS = [chr(code) for code in range(0x20) if code not in (0x09, 0x0A, 0x0D)] + ["\ufffe", "\uffff"]
+INVALID = re.compile("[" + "".join(INVALID_CHARS) + "]")
+INVALID_TABLE = dict.fromkeys(map(ord, INVALID_CHARS))
+
+VALIDATION_ROOT = "context"
+
+
+def strip_invalid(text):
+    return text.translate(INVALID_TABLE) if INVALID.search(text) else text
+
+
+def escape(text, special, escapes):
+    # A single C-level scan for the common case of nothing to escape, then C-level replaces;
+    # both stay linear in the size of the text
+    text = strip_invalid(text)
+    if special.search(text) is None:
+        return text
+    for char, entity in escapes:
+        text = text.replace(char, entity)
+    return text
+
+
+def escape_text(text):
+    """Escape text for use between tags."""
+    return escape(text, TEXT_SPECIAL, TEXT_ESCAPES)
+
+
+def escape_attr(text):
+    """Escape text for use inside a double-quoted attribute value."""
+    return escape(text, ATTR_SPECIAL, ATTR_ESCAPES)
+
+
+class XmlValidationError(ValueError):
+    """Raised when rendered XML is not well-formed."""
+
+    def __init__(self, message, line, column):
+        super().__init__(f"{message} (line {line}, column {column})")
+        self.line = line
+        self.column = column
+
+
+def iter_validated(chunks):
+    """Pass chunks through while checking that they form well-formed XML.
+
+    Contexts mix XML elements with plain separator lines, so the stream is parsed inside a
+    synthetic root element. Nothing is built from the parse; memory stays constant.
+    Raises XmlValidationError at the first problem.
+    """
+    parser = expat.ParserCreate()
+    try:
+        parser.Parse(f"<{VALIDATION_ROOT}>", False)
+        for chunk in chunks:
+            parser.Parse(chunk, False)
+            yield chunk
+        parser.Parse(f"</{VALIDATION_ROOT}>", True)
+    except expat.ExpatError as e:
+        # The synthetic root tag shifts columns on the first line only
+        column = e.offset - len(VALIDATION_ROOT) - 2 if e.lineno == 1 else e.offset
+        raise XmlValidationError(expat.ErrorString(e.code), e.lineno, column + 1) from None
+
+
+def check_well_formed(chunks):
+    """Raise XmlValidationError unless chunks form well-formed XML."""
+    for chunk in iter_validated(chunks):
+        pass
@@ -0,0 +1,108 @@
+import pytest
+
+from autosave import AutosaveJournal, FormAutosave, load_state
+
+
+class Form:
+    """The parts of VirtualForm that FormAutosave uses, with its carry-over on load."""
+
+    def __init__(self, key, schemas):
+        self.schemas = schemas
+        self.models = {key: {}}
+        self.key = key
+        self.carried = []
+        self.canvas = self
+
+    def load(self, key):
+        shared = [name for name in self.schemas[key] if name in self.schemas[self.key]]
+        previous = self.models[self.key]
+        values = self.models.setdefault(key, {})
+        self.key = key
+        self.carried = [name for name in shared if previous.get(name, "") != values.get(name, "")]
+        for name in shared:
+            values[name] = previous.get(name, "")
+
+    def restore(self, models):
+        for key, values in models.items():
+            self.models.setdefault(key, {}).update(values)
+
+    def get_raw(self, field_name):
+        return self.models[self.key].get(field_name, "")
+
+    def after(self, delay, callback):
+        return None
+
+    def after_cancel(self, after_id):
+        pass
+
+
+SCHEMAS = {"web_app": ["Project Name", "Browser Support"], "desktop_app": ["Project Name", "Target OS"]}
+
+
+@pytest.fixture
+def open_journal(tmp_path):
+    """Open journals on one path; each one's writer thread and file are closed after the test."""
+    path = str(tmp_path / "builder.journal")
+    journals = []
+
+    def open_journal():
+        journals.append(AutosaveJournal(path))
+        return journals[-1]
+    open_journal.path = path
+    yield open_journal
+    for journal in journals:
+        if journal.thread.is_alive():
+            journal.close()
+
+
+def test_restored_values_survive_the_form_switch(open_journal):
+    journal = open_journal()
+    journal.record_state(form="desktop_app")
+    journal.record("desktop_app", "Project Name", "Desk")
+    journal.close()
+
+    form = Form("web_app", SCHEMAS)
+    autosave = FormAutosave(form, open_journal())
+    state = autosave.restore(form.load)
+    autosave.close()
+    assert state["form"] == "desktop_app"
+    assert form.key == "desktop_app"
+    assert form.get_raw("Project Name") == "Desk"
+
+
+def test_carried_over_values_are_journaled(open_journal):
+    form = Form("web_app", SCHEMAS)
+    autosave = FormAutosave(form, open_journal())
+    form.models["web_app"]["Project Name"] = "Shared"
+    autosave.field_changed("Project Name")
+    form.load("desktop_app")
+    autosave.form_loaded("desktop_app")
+    autosave.close()
+
+    models, state = load_state(open_journal.path)
+    assert models["desktop_app"]["Project Name"] == "Shared"
+
+
+def test_builder_round_trip(tmp_path, monkeypatch):
+    tk = pytest.importorskip("tkinter")
+    monkeypatch.setenv("CONTEXT_BUILDER_AUTOSAVE", str(tmp_path))
+    monkeypatch.setenv("CONTEXT_BUILDER_HISTORY", "off")
+    from app_context_builder import AppContextBuilder
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    builder = AppContextBuilder(root)
+    builder.app_type_var.set("desktop_app")
+    builder.load_app_form()
+    builder.form_view.set("Project Name", "Desk")
+    builder.field_changed("Project Name")
+    builder.on_close()
+
+    root = tk.Tk()
+    try:
+        builder = AppContextBuilder(root)
+        assert builder.app_type_var.get() == "desktop_app"
+        assert builder.form_view.get_raw("Project Name") == "Desk"
+    finally:
+        builder.on_close()
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+import context_cli
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["render", "nope"], "Unknown template or app type: nope"),
+    (["render", "nope", "--formats", "markdown", "-o", "context"], "Unknown template or app type: nope"),
+    (["render", "web_app", "--fields", "missing.json"], "cannot read fields from missing.json"),
+])
+def test_render_input_errors_exit_2(argv, message, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    assert context_cli.main(argv) == 2
+    err = capsys.readouterr().err
+    assert err.startswith("context-cli: ")
+    assert message in err
+
+
+@pytest.mark.parametrize("content", ["{not json", "[1, 2]"])
+def test_render_rejects_bad_fields_file(content, tmp_path, capsys):
+    path = tmp_path / "fields.json"
+    path.write_text(content, encoding="utf-8")
+    assert context_cli.main(["render", "web_app", "--fields", str(path)]) == 2
+    assert capsys.readouterr().err.startswith(f"context-cli: cannot read fields from {path}")
+
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_batch_reports_non_object_lines(workers, tmp_path, capsys):
+    specs = tmp_path / "specs.jsonl"
+    specs.write_text('[1, 2]\n"x"\n{"template": "web_app", "fields": {"Project Name": "A"}}\n', encoding="utf-8")
+    output = tmp_path / "out.jsonl"
+    assert context_cli.main(["batch", str(specs), "--jsonl", str(output), "-j", workers]) == 1
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [record.get("error") for record in records] == [
+        "expected a JSON object, got list", "expected a JSON object, got str", None]
+    assert records[2]["template"] == "web_app" and "context" in records[2]
+    assert "Rendered 1/3 contexts" in capsys.readouterr().err
+
+
+def test_render_reports_unwritable_output(tmp_path, capsys):
+    path = tmp_path / "missing" / "context.md"
+    assert context_cli.main(["render", "web_app", "-o", str(path)]) == 2
+    assert capsys.readouterr().err.startswith(f"context-cli: cannot write {path}")
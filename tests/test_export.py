@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+import context_cli
+import context_engine
+from xml_writer import XmlValidationError
+
+FIELDS = {"Project Name": "Task Manager", "Core Features": "Boards\nLists"}
+
+
+def test_write_formats_writes_every_format(tmp_path):
+    formats = ["markdown", "plain", "xml", "json"]
+    paths = context_engine.format_paths(str(tmp_path / "context"), formats)
+    groups = context_engine.iter_format_groups("web_app", FIELDS, formats)
+    context_engine.write_formats(groups, paths)
+    assert sorted(os.listdir(tmp_path)) == ["context.json", "context.md", "context.txt", "context.xml"]
+    assert (tmp_path / "context.md").read_text(encoding="utf-8") == (tmp_path / "context.txt").read_text(encoding="utf-8")
+
+
+def test_failed_format_leaves_every_file_untouched(tmp_path):
+    formats = ["markdown", "plain", "xml"]
+    paths = context_engine.format_paths(str(tmp_path / "context"), formats)
+    for path in paths.values():
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("previous")
+
+    def failing(chunks):
+        yield from chunks
+        raise XmlValidationError("mismatched tag", 1, 1)
+
+    groups = [(names, failing(chunks) if "xml" in names else chunks)
+              for names, chunks in context_engine.iter_format_groups("web_app", FIELDS, formats)]
+    with pytest.raises(XmlValidationError):
+        context_engine.write_formats(groups, paths)
+    for path in paths.values():
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == "previous"
+    assert sorted(os.listdir(tmp_path)) == ["context.md", "context.txt", "context.xml"]
+
+
+def test_formats_reject_token_report(tmp_path, capsys):
+    status = context_cli.main(["render", "web_app", "--formats", "markdown,xml", "--token-report",
+                               "-o", str(tmp_path / "context")])
+    assert status == 2
+    assert "--token-report" in capsys.readouterr().err
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,29 @@
+import context_engine
+from live_preview import LivePreview
+from render_plan import REFERENCE_ONLY
+
+
+def preview_of(form, template="web_app"):
+    preview = LivePreview(None, lambda field_name: form.get(field_name, ""))
+    preview.plan, preview.values = context_engine.prepare(template, dict(form), clock=context_engine.reproducible_clock())
+    preview.values[REFERENCE_ONLY] = True
+    return preview
+
+
+def test_export_reads_edits_made_without_live_preview():
+    form = {"Project Name": "First", "Core Features": "Boards"}
+    preview = preview_of(form)
+    form["Project Name"] = "Second"
+    del form["Core Features"]
+    values = preview.export_values()
+    assert values["Project Name"] == "Second"
+    assert "Core Features" not in values
+    assert REFERENCE_ONLY not in values
+    assert "PROJECT: Second" in "".join(preview.iter_export())
+
+
+def test_fields_the_form_no_longer_shows_keep_their_previewed_values():
+    form = {"Project Name": "First"}
+    preview = preview_of(form)
+    preview.read_field = lambda field_name: None
+    assert preview.export_values()["Project Name"] == "First"
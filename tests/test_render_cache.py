@@ -0,0 +1,24 @@
+import context_engine
+from context_engine import RenderCache
+
+CLOCK = context_engine.reproducible_clock()
+
+
+def test_hit_matches_a_fresh_render():
+    cache = RenderCache()
+    fields = {"Project Name": "Task Manager", "Core Features": "Boards\nLists"}
+    fresh = context_engine.render("web_app", fields, clock=CLOCK)
+    for _ in range(2):
+        assert "".join(context_engine.iter_render("web_app", fields, clock=CLOCK, cache=cache)) == fresh
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_large_values_stream_without_being_stored():
+    cache = RenderCache(max_chars=4000)
+    steps = "Open the board\n" * 1000
+    fields = {"Bug Title": "Login fails", "Steps to Reproduce": steps}
+    chunks = list(context_engine.iter_render("bug_report", fields, clock=CLOCK, cache=cache))
+    # The value is passed through as its own chunk rather than copied into a joined section
+    assert any(chunk is steps for chunk in chunks)
+    assert "".join(chunks) == context_engine.render("bug_report", fields, clock=CLOCK)
+    assert not cache.entries
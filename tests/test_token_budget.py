@@ -0,0 +1,62 @@
+import pytest
+
+import context_engine
+from token_budget import POLICIES, Budget, get_counter, truncate
+from xml_writer import check_well_formed
+
+CLOCK = context_engine.reproducible_clock()
+LINE = "- Keep boards in sync across tabs & devices without <blocking> the UI\n"
+FIELDS = {"Project Name": "Task Manager", "Core Features": LINE * 400, "Technical Requirements": LINE * 100,
+          "Deployment": LINE * 50, "Frontend Framework": "R&D <next>"}
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+@pytest.mark.parametrize("max_tokens", [60, 200, 800, 3000])
+def test_budgeted_xml_is_well_formed(policy, max_tokens):
+    output = context_engine.render("web_app", FIELDS, xml=True, clock=CLOCK,
+                                   budget=Budget(max_tokens=max_tokens, policy=policy))
+    assert "tokens truncated" in output
+    check_well_formed([output])
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+@pytest.mark.parametrize("limit", [1, 33, 101])
+def test_section_budget_never_splits_entities(policy, limit):
+    fields = {"Project Name": "&" * 20000}
+    output = context_engine.render("web_app", fields, xml=True, clock=CLOCK,
+                                   budget=Budget(sections={"Project Name": limit}, policy=policy))
+    assert "tokens truncated" in output
+    check_well_formed([output])
+
+
+def test_xml_truncate_reopens_and_closes_cut_elements():
+    text = "<outer>\n<inner>\n" + "<item>a &amp; b</item>\n" * 200 + "</inner>\n</outer>\n"
+    counter = get_counter()
+    for policy in POLICIES:
+        result = truncate(text, 50, policy, counter, xml=True)
+        assert counter.count(result) <= 50
+        check_well_formed([result])
+
+
+def test_plain_truncate_keeps_line_boundaries():
+    text = "".join(f"line {index}\n" for index in range(200))
+    result = truncate(text, 40, "head", get_counter())
+    assert result.startswith("line 0\n")
+    assert result.endswith("tokens truncated ...]\n")
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_section_budget_keeps_label_and_separator(policy):
+    errors = "".join(f"Traceback line {index}: something failed\n" for index in range(700))
+    fields = {"Bug Title": "Login fails", "Error Messages": errors}
+    output = context_engine.render("bug_report", fields, clock=CLOCK,
+                                   budget=Budget(sections={"Error Messages": 60}, policy=policy, counter="approx"))
+    start = output.index("ERROR MESSAGES:\n")
+    end = output.index("\n\nENVIRONMENT:", start)
+    value = output[start + len("ERROR MESSAGES:\n"):end]
+    assert "tokens truncated" in value
+    assert get_counter("approx").count(value) <= 60
+    if policy != "tail":
+        assert value.startswith("Traceback line 0:")
+    if policy != "head":
+        assert value.endswith("Traceback line 699: something failed")